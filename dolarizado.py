@@ -1,14 +1,15 @@
-import yfinance as yf
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from financeiro.cambio import media_anual
+from financeiro.fundamentos import financials as get_financials
+
 
 def plot_lucro_brl_e_usd(ticker):
     # =========================
     # Lucro líquido (BRL)
     # =========================
-    acao = yf.Ticker(ticker)
-    financials = acao.financials
+    financials = get_financials(ticker)
 
     if financials.empty or "Net Income" not in financials.index:
         raise ValueError("Lucro líquido não encontrado para este ticker.")
@@ -19,17 +20,8 @@ def plot_lucro_brl_e_usd(ticker):
     # =========================
     # Dólar histórico (USD/BRL)
     # =========================
-    usd = yf.Ticker("USDBRL=X")
-
-    start_date = f"{anos.min()}-01-01"
-    end_date = f"{anos.max()}-12-31"
-
-    cambio = usd.history(start=start_date, end=end_date)
-
-    if cambio.empty:
-        raise ValueError("Não foi possível obter o câmbio USD/BRL.")
-
-    dolar_medio_anual = cambio["Close"].groupby(cambio.index.year).mean()
+    # Série completa em memória, compartilhada entre todos os tickers
+    dolar_medio_anual = media_anual()
 
     # =========================
     # Converter lucro para USD
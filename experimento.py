@@ -1,83 +1,92 @@
-import yfinance as yf
-import pandas as pd
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 
+from financeiro.paralelo import executar_em_paralelo
+from financeiro.tarefas import ExecutorTarefas, preaquecer
+from financeiro.tickers import ajustar_ticker
+
+
+def backtest_em_segundo_plano(tarefa, tickers, monthly_investment, start_date, end_date):
+    # pandas e yfinance entram aqui, não na abertura da janela
+    from financeiro.moedas import moeda
+    from financeiro.motor import get_stock_data_lote, inicio_sem_cambio, obter_historico
+
+    historicos = [None] * len(tickers)
+    moedas = [None] * len(tickers)
+    resultados = [None] * len(tickers)
+    concluidos = executar_em_paralelo(
+        lambda t: (obter_historico(t, start_date, end_date), moeda(t)), tickers
+    )
+    for feitos, (i, (historico, codigo)) in enumerate(concluidos, start=1):
+        tarefa.verificar()
+        historicos[i], moedas[i] = historico, codigo
+        # Cada ticker sai assim que chega, já em reais pelo câmbio de cada dia
+        (resultados[i],), (tir,), *_ = get_stock_data_lote(
+            [historico], monthly_investment, [moedas[i]], para="BRL"
+        )
+        error_msg, patrimonio, investido, data = resultados[i]
+        if error_msg:
+            tarefa.emitir(error_msg + "\n")
+        else:
+            tarefa.emitir(
+                f"{tickers[i]}: R${patrimonio:,.2f} (investido R${investido:,.2f}, "
+                f"TIR {tir:.2%} a.a.)\n"
+            )
+            inicio = inicio_sem_cambio(historico[1], data)
+            if inicio:
+                tarefa.emitir(
+                    f"{tickers[i]}: sem câmbio de {inicio} a {data}; "
+                    "aportes desse período ignorados\n"
+                )
+        tarefa.progresso(feitos, len(tickers))
+
+    # Totais da carteira numa só matriz pregões x tickers em reais, para
+    # somarem B3 e NYSE
+    _, _, s, total_investido, tir_carteira = get_stock_data_lote(
+        historicos, monthly_investment, moedas, para="BRL"
+    )
+    return tickers, resultados, s, total_investido, tir_carteira
+
+
+def mostrar_totais(resultado):
+    tickers, resultados, s, total_investido, tir_carteira = resultado
+    datas_iniciais = {
+        ticker: data_inicial
+        for ticker, (error_msg, _, _, data_inicial) in zip(tickers, resultados)
+        if not error_msg
+    }
 
-def get_stock_data(ticker, monthly_investment, start, end):
-    try:
-        stock = yf.Ticker(ticker)
-
-        # Preço ajustado = total return series (splits + dividendos)
-        hist = stock.history(start=start, end=end, auto_adjust=True)
-
-        if hist.empty:
-            return f"Erro: Não foi possível obter dados para {ticker}", 0, 0, None
-
-        hist = hist.dropna(subset=["Close"])
-        first_valid_date = hist.index.min().date()
-
-        df = hist[["Close"]].reset_index()
-        df.columns = ["Date", "Close"]
-
-        # Obter 1º dia de negociação de cada mês
-        df["Month"] = df["Date"].dt.to_period("M")
-        investment_days = df.groupby("Month")["Date"].first()
-        investment_days_set = set(investment_days)
-
-        shares = 0
-        total_aportes = 0
-
-        for _, row in df.iterrows():
-            if row["Date"] in investment_days_set:
-                if row["Close"] > 0:
-                    shares += monthly_investment / row["Close"]
-                    total_aportes += monthly_investment
-
-        latest_price = df.iloc[-1]["Close"]
-        patrimonio_total = shares * latest_price
-
-        return None, patrimonio_total, total_aportes, first_valid_date
-
-    except Exception as e:
-        return f"Erro ao processar {ticker}: {e}", 0, 0, None
+    output_text.insert(tk.END, f"Valor total do portfólio: R${s:,.2f}\n")
+    output_text.insert(tk.END, f"Valor total investido: R${total_investido:,.2f}\n")
+    output_text.insert(tk.END, f"TIR da carteira: {tir_carteira:.2%} a.a.\n")
+    for ticker, data in datas_iniciais.items():
+        output_text.insert(tk.END, f"Primeira data válida para {ticker}: {data}\n")
 
 
 def run_backtest():
-    output_text.delete("1.0", tk.END)
-    s = 0
-    total_investido = 0
-    datas_iniciais = {}
-
     a = tickers_entry.get().strip()
     monthly_investment = float(investment_entry.get() or 1000)
     start_date = start_date_entry.get() or "2000-01-01"
     end_date = end_date_entry.get() or "2025-02-01"
 
     if not a:
+        output_text.delete("1.0", tk.END)
         output_text.insert(tk.END, "Por favor, digite os tickers.")
         return
 
-    tickers = a.split(" ")
-
-    for ticker in tickers:
-        if ticker[-1] in "341":
-            ticker += ".SA"
-
-        error_msg, patrimonio, investido, data_inicial = get_stock_data(
-            ticker, monthly_investment, start_date, end_date
-        )
-        if error_msg:
-            output_text.insert(tk.END, error_msg + "\n")
-        else:
-            s += patrimonio
-            total_investido += investido
-            datas_iniciais[ticker] = data_inicial
+    tickers = [ajustar_ticker(t) for t in a.split(" ")]
 
-    output_text.insert(tk.END, f"Valor total do portfólio: R${s:,.2f}\n")
-    output_text.insert(tk.END, f"Valor total investido: R${total_investido:,.2f}\n")
-    for ticker, data in datas_iniciais.items():
-        output_text.insert(tk.END, f"Primeira data válida para {ticker}: {data}\n")
+    executor.enviar(
+        backtest_em_segundo_plano,
+        tickers,
+        monthly_investment,
+        start_date,
+        end_date,
+        ao_iniciar=lambda: output_text.delete("1.0", tk.END),
+        ao_emitir=lambda texto: output_text.insert(tk.END, texto),
+        ao_concluir=mostrar_totais,
+        ao_falhar=lambda erro: output_text.insert(tk.END, f"{erro}\n"),
+    )
 
 
 def copy_to_clipboard():
@@ -135,6 +144,14 @@ run_button = ttk.Button(
 )
 run_button.pack(pady=10)
 
+progress_frame = ttk.Frame(main_frame)
+progress_frame.pack(fill="x", pady=(0, 10))
+progress_bar = ttk.Progressbar(progress_frame, mode="determinate")
+progress_bar.pack(side="left", fill="x", expand=True, padx=5)
+executor = ExecutorTarefas(root, progress_bar)
+cancel_button = ttk.Button(progress_frame, text="Cancelar", command=executor.cancelar)
+cancel_button.pack(side="right", padx=5)
+
 output_frame = ttk.LabelFrame(main_frame, text="Resultados", padding="10")
 output_frame.pack(fill="both", expand=True)
 
@@ -148,4 +165,5 @@ copy_button.pack(pady=5, side="bottom")
 
 style.configure("Accent.TButton", foreground="white", background="#0078D7")
 
+preaquecer(root, ["financeiro.motor", "yfinance"])
 root.mainloop()
@@ -0,0 +1 @@
+"""Motor de backtests compartilhado pelos scripts do projeto."""
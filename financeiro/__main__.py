@@ -0,0 +1,6 @@
+import sys
+
+from financeiro.cli import main
+
+
+sys.exit(main())
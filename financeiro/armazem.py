@@ -0,0 +1,240 @@
+"""
+Armazém colunar de preços para o universo inteiro, aberto com numpy.memmap:
+
+    python -m financeiro.armazem universo.txt ~/precos --inicio 2000-01-01
+
+Cada campo (close, dividends, splits) é uma matriz pregões x tickers em um
+.npy com ordem de Fortran, então a série de um ticker é contígua e pode ser
+lida sem cópia. Todos os tickers compartilham o mesmo calendário (a união dos
+pregões locais); dias sem negociação ficam com NaN. O close é o bruto do
+Yahoo (auto_adjust=False, já ajustado por desdobramentos); o ajustado por
+dividendos, como no auto_adjust=True, é calculado na gravação e fica em
+ajustado.npy, então os backtests leem tudo direto do mapa:
+
+    armazem = ArmazemPrecos("~/precos")
+    lote = armazem.aportes_mensais(1000, inicio="2005-01-01")
+
+Todos os campos são float32 (sete algarismos significativos, de sobra para
+preços e proventos): 5.000 tickers em 25 anos ocupam cerca de 520 MB em disco,
+e só as páginas lidas entram na memória. Quem precisar de precisão dupla em
+algum campo passa tipos={"ajustado": "float64"} a construir_armazem.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+from financeiro.cache import historicos
+from financeiro.dca import COLUNAS_POR_BLOCO, aportes_mensais_lote, datas_locais
+from financeiro.proventos import fatores_proventos
+
+
+CAMPOS = {"close": "float32", "dividends": "float32", "splits": "float32"}
+COLUNAS_YFINANCE = {"close": "Close", "dividends": "Dividends", "splits": "Stock Splits"}
+# Campos calculados na gravação a partir dos de CAMPOS
+DERIVADOS = {"ajustado": "float32"}
+
+
+class ArmazemPrecos:
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        with open(os.path.join(diretorio, "indice.json"), encoding="utf-8") as arquivo:
+            self.meta = json.load(arquivo)
+        self.tickers = self.meta["tickers"]
+        self.indice = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.datas = np.load(os.path.join(diretorio, "datas.npy"))
+        self._campos = {}
+
+    def campo(self, nome):
+        """Matriz pregões x tickers do campo, mapeada do disco (somente leitura)."""
+        if nome not in self._campos:
+            caminho = os.path.join(self.diretorio, f"{nome}.npy")
+            self._campos[nome] = np.load(caminho, mmap_mode="r")
+        return self._campos[nome]
+
+    def linhas(self, inicio=None, fim=None):
+        """slice dos pregões em [inicio, fim)."""
+        a = 0 if inicio is None else np.searchsorted(self.datas, np.datetime64(inicio, "D"))
+        b = len(self.datas) if fim is None else np.searchsorted(self.datas, np.datetime64(fim, "D"))
+        return slice(int(a), int(b))
+
+    def coluna(self, ticker, campo="close", inicio=None, fim=None):
+        """Série do ticker no calendário comum, sem cópia (NaN onde não houve pregão)."""
+        return self.campo(campo)[self.linhas(inicio, fim), self.indice[ticker]]
+
+    def matriz(self, tickers=None, campo="close", inicio=None, fim=None):
+        """
+        Matriz pregões x tickers. Sem `tickers` (ou com um intervalo contíguo
+        deles) é uma visão sem cópia; uma seleção arbitrária vira cópia.
+        """
+        dados = self.campo(campo)[self.linhas(inicio, fim)]
+        if tickers is None:
+            return dados
+        colunas = [self.indice[t] for t in tickers]
+        if colunas and colunas == list(range(colunas[0], colunas[0] + len(colunas))):
+            return dados[:, colunas[0] : colunas[0] + len(colunas)]
+        return dados[:, colunas]
+
+    def fechamento_ajustado(self, ticker, inicio=None, fim=None):
+        """Close ajustado por dividendos como no auto_adjust=True do Yahoo (NaN sem pregão)."""
+        return self.coluna(ticker, "ajustado", inicio, fim)
+
+    def aportes_mensais(
+        self,
+        monthly_investment,
+        tickers=None,
+        inicio=None,
+        fim=None,
+        colunas_por_bloco=COLUNAS_POR_BLOCO,
+    ):
+        """
+        LoteDCA (dca.aportes_mensais_lote) dos tickers, todos de uma vez, sobre
+        o close ajustado lido do mapa em blocos de colunas; sem `tickers` (ou
+        com um intervalo contíguo deles) só um bloco por vez vai para a memória.
+        """
+        datas = self.datas[self.linhas(inicio, fim)]
+        precos = self.matriz(tickers, "ajustado", inicio, fim)
+        return aportes_mensais_lote(datas, precos, monthly_investment, colunas_por_bloco)
+
+    def historico(self, ticker, inicio=None, fim=None, auto_adjust=True):
+        """DataFrame no formato do yfinance (índice sem fuso), só com os pregões do ticker."""
+        linhas = self.linhas(inicio, fim)
+        colunas = {nome: self.coluna(ticker, nome, inicio, fim) for nome in CAMPOS}
+        if auto_adjust:
+            colunas["close"] = self.fechamento_ajustado(ticker, inicio, fim)
+        valido = ~np.isnan(colunas["close"])
+        return pd.DataFrame(
+            {
+                COLUNAS_YFINANCE[nome]: np.asarray(coluna[valido], dtype=float)
+                for nome, coluna in colunas.items()
+            },
+            index=pd.DatetimeIndex(
+                self.datas[linhas][valido].astype("datetime64[ns]"), name="Date"
+            ),
+        )
+
+
+def _dias(hist):
+    return datas_locais(hist.index).astype("datetime64[D]")
+
+
+def _ajustar(fechamento, dividendos):
+    """Close ajustado pelos dividendos, na base "anterior" do Yahoo, só com pregões válidos."""
+    acumulado = np.cumprod(fatores_proventos(fechamento, dividendos, base="anterior"))
+    return fechamento * acumulado / acumulado[-1] if len(fechamento) else fechamento
+
+
+def construir_armazem(diretorio, tickers, inicio, fim, tipos=None, lote=200):
+    """
+    Baixa (ou lê do cache) o histórico bruto dos tickers e grava o armazém em
+    `diretorio`, substituindo o anterior. Os tickers passam em lotes de
+    `lote`, duas vezes: uma para montar o calendário e outra para preencher
+    as matrizes, então a memória usada não cresce com o universo.
+    """
+    tipos = {**CAMPOS, **DERIVADOS, **(tipos or {})}
+    tickers = list(dict.fromkeys(tickers))
+    lotes = [tickers[i : i + lote] for i in range(0, len(tickers), lote)]
+
+    calendario = np.array([], dtype="datetime64[D]")
+    com_dados = []
+    for parte in lotes:
+        for ticker, hist in historicos(parte, inicio, fim, auto_adjust=False).items():
+            hist = hist.dropna(subset=["Close"]) if "Close" in hist else hist.iloc[:0]
+            if not hist.empty:
+                calendario = np.union1d(calendario, _dias(hist))
+                com_dados.append(ticker)
+
+    temporario = f"{diretorio.rstrip(os.sep)}.{os.getpid()}.tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+    np.save(os.path.join(temporario, "datas.npy"), calendario)
+
+    matrizes = {
+        nome: np.lib.format.open_memmap(
+            os.path.join(temporario, f"{nome}.npy"),
+            mode="w+",
+            dtype=tipos[nome],
+            shape=(len(calendario), len(com_dados)),
+            fortran_order=True,
+        )
+        for nome in {**CAMPOS, **DERIVADOS}
+    }
+    for matriz in matrizes.values():
+        matriz[:] = np.nan
+
+    coluna = {ticker: i for i, ticker in enumerate(com_dados)}
+    for parte in lotes:
+        parte = [t for t in parte if t in coluna]
+        for ticker, hist in historicos(parte, inicio, fim, auto_adjust=False).items():
+            hist = hist.dropna(subset=["Close"])
+            # Se houver dois registros no mesmo dia local, vale o último
+            dias = _dias(hist)
+            ultimo = np.append(dias[1:] != dias[:-1], True)
+            linhas = np.searchsorted(calendario, dias[ultimo])
+            valores = {}
+            for nome in CAMPOS:
+                origem = COLUNAS_YFINANCE[nome]
+                serie = hist[origem].to_numpy(dtype=float) if origem in hist else 0.0
+                valores[nome] = np.broadcast_to(serie, len(hist))[ultimo]
+            valores["ajustado"] = _ajustar(valores["close"], valores["dividends"])
+            for nome, matriz in matrizes.items():
+                matriz[linhas, coluna[ticker]] = valores[nome]
+
+    for matriz in matrizes.values():
+        matriz.flush()
+    del matrizes
+
+    meta = {
+        "tickers": com_dados,
+        "sem_dados": [t for t in tickers if t not in coluna],
+        "inicio": str(inicio),
+        "fim": str(fim),
+        "tipos": tipos,
+    }
+    with open(os.path.join(temporario, "indice.json"), "w", encoding="utf-8") as arquivo:
+        json.dump(meta, arquivo, indent=1)
+
+    antigo = f"{diretorio.rstrip(os.sep)}.{os.getpid()}.antigo"
+    if os.path.exists(diretorio):
+        os.replace(diretorio, antigo)
+    os.replace(temporario, diretorio)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return ArmazemPrecos(diretorio)
+
+
+def main(argv=None):
+    from financeiro.cli import ler_universo
+    from financeiro.tickers import ajustar_ticker
+
+    parser = argparse.ArgumentParser(
+        prog="python -m financeiro.armazem", description="Grava o armazém colunar de preços."
+    )
+    parser.add_argument("universo", help="arquivo com os tickers")
+    parser.add_argument("destino", help="diretório do armazém")
+    parser.add_argument("--inicio", default="2000-01-01")
+    parser.add_argument("--fim", default=str((pd.Timestamp.today() + pd.Timedelta(days=1)).date()))
+    parser.add_argument("--lote", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    tickers = [ajustar_ticker(t) for t in ler_universo(args.universo)]
+    armazem = construir_armazem(args.destino, tickers, args.inicio, args.fim, lote=args.lote)
+    tamanho = sum(
+        os.path.getsize(os.path.join(args.destino, nome)) for nome in os.listdir(args.destino)
+    )
+    print(
+        f"{len(armazem.tickers)} tickers x {len(armazem.datas)} pregões, "
+        f"{tamanho / 2**20:.0f} MB em {args.destino}",
+        file=sys.stderr,
+    )
+    if armazem.meta["sem_dados"]:
+        print("Sem dados: " + " ".join(armazem.meta["sem_dados"]), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
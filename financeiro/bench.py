@@ -0,0 +1,231 @@
+"""
+Benchmark dos motores com históricos gravados, sem acesso à rede:
+
+    python -m financeiro.bench                 # compara com a referência gravada
+    python -m financeiro.bench --gravar        # regrava a referência
+    python -m financeiro.bench --tamanhos 1 10
+
+Cada caso roda em um processo novo e reporta tempo, pico de RSS e linhas
+diárias por segundo. Sai com código 1 se algum resultado divergir da
+referência (financeiro/bench_referencia.json) ou, para até 10 tickers, do
+laço iterrows original do get_stock_data.
+"""
+
+import argparse
+import json
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+
+INICIO = "2000-01-01"
+FIM = "2025-01-01"
+APORTE = 1000
+TAMANHOS = (1, 10, 100, 1000)
+REFERENCIA = os.path.join(os.path.dirname(__file__), "bench_referencia.json")
+TOLERANCIA = 1e-9
+
+
+def tickers_sinteticos(n):
+    return [f"SINT{i:04d}Z" for i in range(n)]
+
+
+def preparar(diretorio, n):
+    """Grava no diretório o cache de preços e a cópia local do SGS usados pelos casos."""
+    from financeiro.cache import CacheHistorico
+    from financeiro.offline import ServidorSGSFalso, historico_sintetico, series_sgs_sinteticas
+    from financeiro.sgs import ClienteSGS
+
+    def baixar(ticker, start, end, auto_adjust):
+        return historico_sintetico(int(ticker[4:8]), start, end, auto_adjust)
+
+    cache = CacheHistorico(os.path.join(diretorio, "precos"), orcamento_bytes=2**40, baixar=baixar)
+    linhas = 0
+    for ticker in tickers_sinteticos(n):
+        linhas += len(cache.history(ticker, INICIO, FIM, auto_adjust=True))
+        cache.history(ticker, INICIO, FIM, auto_adjust=False)
+
+    series = series_sgs_sinteticas()
+    with ServidorSGSFalso(series) as servidor:
+        cliente = ClienteSGS(os.path.join(diretorio, "sgs"), url=servidor.url)
+        for codigo in series:
+            cliente.serie(codigo)
+    return linhas
+
+
+def _sem_rede(*args, **kwargs):
+    raise RuntimeError("o benchmark não deve acessar a rede")
+
+
+def _usar_diretorio(diretorio):
+    import financeiro.cache as cache
+    import financeiro.provedores as provedores
+    import financeiro.sgs as sgs
+
+    # Provedor "remoto" que nunca é chamado: tudo sai do cache preparado
+    provedores._provedor = provedores.Provedor()
+    provedores._provedor.remoto = True
+    cache._cache = cache.CacheHistorico(
+        os.path.join(diretorio, "precos"), orcamento_bytes=2**40, baixar=_sem_rede
+    )
+    sgs._cliente = sgs.ClienteSGS(os.path.join(diretorio, "sgs"), url="http://127.0.0.1:9/{codigo}")
+
+
+def _dca_iterrows(hist, monthly_investment):
+    """Laço original de get_stock_data, mantido só como referência de conferência."""
+    hist = hist.dropna(subset=["Close"])
+    df = hist[["Close"]].reset_index()
+    df.columns = ["Date", "Close"]
+    df["Month"] = df["Date"].dt.tz_localize(None).dt.to_period("M")
+    investment_days_set = set(df.groupby("Month")["Date"].first())
+
+    shares = 0
+    for _, row in df.iterrows():
+        if row["Date"] in investment_days_set and row["Close"] > 0:
+            shares += monthly_investment / row["Close"]
+    return shares * df.iloc[-1]["Close"]
+
+
+def caso_dca(tickers):
+    from financeiro.motor import get_stock_data
+
+    resultados = [get_stock_data(t, APORTE, INICIO, FIM) for t in tickers]
+    return [r[1] for r in resultados], [r[0] for r in resultados if r[0]]
+
+
+def caso_aporte_unico(tickers):
+    from financeiro.motor import calculate_lump_sum
+
+    resultados = [calculate_lump_sum(t, APORTE, INICIO, FIM) for t in tickers]
+    return [r[1] for r in resultados], [r[0] for r in resultados if r[0]]
+
+
+def caso_selic_mensal(tickers):
+    from financeiro.selic import simulate_tesouro_selic
+
+    return list(simulate_tesouro_selic(INICIO, APORTE, FIM).patrimonio), []
+
+
+def caso_selic_diario(tickers):
+    from financeiro.selic import simulate_tesouro_selic
+
+    return list(simulate_tesouro_selic(INICIO, APORTE, FIM, modo="diario").patrimonio), []
+
+
+def caso_ipca_anual(tickers):
+    from financeiro.inflacao import IndiceIPCA
+    from financeiro.sgs import IPCA, cliente_padrao
+
+    # Mesma agregação de inflação.py
+    datas, valores = cliente_padrao().serie(IPCA, INICIO, FIM)
+    return list(IndiceIPCA(datas, valores).acumulado_anual()[1]), []
+
+
+# Casos que dependem do número de tickers; os demais rodam uma vez só
+CASOS_POR_TICKER = {"dca": caso_dca, "aporte_unico": caso_aporte_unico}
+CASOS_UNICOS = {
+    "selic_mensal": caso_selic_mensal,
+    "selic_diario": caso_selic_diario,
+    "ipca_anual": caso_ipca_anual,
+}
+
+
+def _executar(diretorio, nome, n):
+    _usar_diretorio(diretorio)
+    caso = CASOS_POR_TICKER.get(nome) or CASOS_UNICOS[nome]
+    tickers = tickers_sinteticos(n)
+
+    inicio = time.perf_counter()
+    valores, erros = caso(tickers)
+    tempo = time.perf_counter() - inicio
+
+    legado = None
+    if nome == "dca" and n <= 10:
+        from financeiro.cache import historico
+
+        legado = [_dca_iterrows(historico(t, INICIO, FIM), APORTE) for t in tickers]
+
+    # ru_maxrss vem em KiB no Linux
+    pico_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"tempo": tempo, "pico_mb": pico_mb, "valores": valores, "erros": erros, "legado": legado}
+
+
+def _resumo(valores):
+    return {"n": len(valores), "soma": math.fsum(valores), "amostra": valores[:3]}
+
+
+def _diverge(a, b):
+    return not math.isclose(a, b, rel_tol=TOLERANCIA, abs_tol=1e-6)
+
+
+def comparar(resumo, referencia):
+    if referencia is None:
+        return "sem referência"
+    if resumo["n"] != referencia["n"] or _diverge(resumo["soma"], referencia["soma"]):
+        return f"DIVERGIU: soma {resumo['soma']!r} != {referencia['soma']!r}"
+    for a, b in zip(resumo["amostra"], referencia["amostra"]):
+        if _diverge(a, b):
+            return f"DIVERGIU: {a!r} != {b!r}"
+    return "ok"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m financeiro.bench")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS))
+    parser.add_argument("--gravar", action="store_true", help="regrava a referência")
+    parser.add_argument("--diretorio", help="reaproveita fixtures já preparadas neste diretório")
+    args = parser.parse_args(argv)
+
+    referencia = {}
+    if os.path.exists(REFERENCIA):
+        with open(REFERENCIA, encoding="utf-8") as arquivo:
+            referencia = json.load(arquivo)
+
+    diretorio = args.diretorio or tempfile.mkdtemp(prefix="financeiro-bench-")
+    print(f"Preparando fixtures em {diretorio}...", file=sys.stderr)
+    linhas_por_ticker = preparar(diretorio, max(args.tamanhos)) / max(args.tamanhos)
+
+    rodadas = [(nome, n) for n in sorted(args.tamanhos) for nome in CASOS_POR_TICKER]
+    rodadas += [(nome, 1) for nome in CASOS_UNICOS]
+
+    falhou = False
+    print(f"{'caso':<14}{'tickers':>8}{'tempo (s)':>12}{'pico (MB)':>11}{'linhas/s':>14}  resultado")
+    for nome, n in rodadas:
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+            medida = executor.submit(_executar, diretorio, nome, n).result()
+
+        chave = f"{nome}/{n}"
+        resumo = _resumo(medida["valores"])
+        if args.gravar:
+            referencia[chave] = resumo
+            situacao = "gravado"
+        else:
+            situacao = comparar(resumo, referencia.get(chave))
+
+        if medida["erros"]:
+            situacao = f"ERRO: {medida['erros'][0]}"
+        if medida["legado"] is not None:
+            if any(round(a, 2) != round(b, 2) for a, b in zip(medida["valores"], medida["legado"])):
+                situacao = "DIVERGIU do laço iterrows original"
+
+        falhou |= situacao.startswith(("DIVERGIU", "ERRO"))
+        linhas = linhas_por_ticker * n if nome in CASOS_POR_TICKER else len(medida["valores"])
+        print(
+            f"{nome:<14}{n:>8}{medida['tempo']:>12.4f}{medida['pico_mb']:>11.1f}"
+            f"{linhas / medida['tempo']:>14,.0f}  {situacao}"
+        )
+
+    if args.gravar:
+        with open(REFERENCIA, "w", encoding="utf-8") as arquivo:
+            json.dump(referencia, arquivo, indent=1, sort_keys=True)
+            arquivo.write("\n")
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Orçamento de inicialização das janelas e da linha de comando:
+
+    python -m financeiro.bench_importacao
+    python -m financeiro.bench_importacao --orcamento 100 painel.py
+
+Para cada alvo, roda os imports de nível de módulo em um processo novo com
+`python -X importtime` e soma o tempo de importação (sem o que o próprio
+interpretador já importa ao iniciar). Dos scripts, os imports são lidos do
+arquivo com ast, sem abrir a janela; módulos do pacote são importados
+inteiros. Sai com código 1 se algum alvo passar do orçamento ou carregar um
+dos módulos pesados, que só devem entrar no primeiro uso.
+"""
+
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALVOS = ("backtest.py", "experimento.py", "oneshot.py", "painel.py", "financeiro.cli")
+PESADOS = ("numpy", "pandas", "yfinance", "matplotlib", "requests")
+ORCAMENTO_MS = 150
+REPETICOES = 5
+
+
+def codigo_de_importacao(alvo):
+    """Código que reproduz os imports do alvo (script .py ou módulo do pacote)."""
+    if not alvo.endswith(".py"):
+        return f"import {alvo}"
+    with open(os.path.join(RAIZ, alvo), encoding="utf-8") as arquivo:
+        arvore = ast.parse(arquivo.read(), alvo)
+    return "\n".join(
+        ast.unparse(no) for no in arvore.body if isinstance(no, (ast.Import, ast.ImportFrom))
+    )
+
+
+def _importtime(codigo):
+    """({módulo de nível zero: tempo acumulado em µs}, pacotes carregados)."""
+    codigo += "\nimport sys\nprint(' '.join(sorted({m.split('.')[0] for m in sys.modules})))"
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        capture_output=True,
+        text=True,
+        cwd=RAIZ,
+        env={**os.environ, "PYTHONPATH": RAIZ},
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1])
+
+    tempos = {}
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "[us]" in linha:
+            continue
+        _, acumulado, nome = linha.split("|")
+        # Os módulos importados por outros vêm indentados; só o nível zero soma
+        if not nome[1:].startswith(" "):
+            tempos[nome.strip()] = int(acumulado)
+    return tempos, set(processo.stdout.split())
+
+
+def medir(alvo, repeticoes=REPETICOES):
+    """(melhor tempo de importação em ms, módulos pesados carregados)."""
+    inicio, _ = _importtime("pass")
+    codigo = codigo_de_importacao(alvo)
+    tempos = []
+    for _ in range(max(repeticoes, 1)):
+        importados, carregados = _importtime(codigo)
+        tempos.append(sum(us for nome, us in importados.items() if nome not in inicio) / 1000)
+    # O menor tempo é o menos afetado pelo resto da máquina
+    return min(tempos), sorted(carregados & set(PESADOS))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m financeiro.bench_importacao",
+        description="Confere o tempo de importação dos scripts contra um orçamento.",
+    )
+    parser.add_argument("alvos", nargs="*", default=list(ALVOS))
+    parser.add_argument("--orcamento", type=float, default=ORCAMENTO_MS, help="em ms")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    args = parser.parse_args(argv)
+
+    falhou = False
+    print(f"{'alvo':<18} {'tempo (ms)':>10}  resultado")
+    for alvo in args.alvos:
+        tempo, pesados = medir(alvo, args.repeticoes)
+        problemas = []
+        if tempo > args.orcamento:
+            problemas.append(f"acima de {args.orcamento:g} ms")
+        if pesados:
+            problemas.append("carrega " + ", ".join(pesados))
+        falhou |= bool(problemas)
+        print(f"{alvo:<18} {tempo:>10.1f}  {'; '.join(problemas) or 'ok'}")
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from financeiro.provedores import provedor_padrao
+
+
+DIRETORIO_PADRAO = os.environ.get(
+    "FINANCEIRO_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "projetofinanceiro"),
+)
+ORCAMENTO_PADRAO = int(os.environ.get("FINANCEIRO_CACHE_MB", "500")) * 1024 * 1024
+
+
+def baixar_do_provedor(ticker, start, end, auto_adjust):
+    return provedor_padrao().history(ticker, start, end, auto_adjust=auto_adjust)
+
+
+def baixar_muitos_do_provedor(tickers, start, end, auto_adjust):
+    return provedor_padrao().history_many(tickers, start, end, auto_adjust=auto_adjust)
+
+
+def _sem_fuso(index):
+    return index.tz_localize(None) if index.tz is not None else index
+
+
+class CacheHistorico:
+    """
+    Cache em disco do histórico de preços, um arquivo .npz (uma coluna por
+    array) por ticker e modo de ajuste. Só baixa o que falta: o começo, se o
+    pedido começa antes do que está salvo, e a cauda desde o último pregão.
+
+    - validade: segundos em que um download recente é considerado atual;
+    - dias_revisao: últimos dias rebaixados a cada atualização, porque o
+      Yahoo revisa os pregões mais recentes. Se o Close desses dias mudou
+      ou se a parte nova traz dividendo ou desdobramento, o Yahoo reescreveu
+      o histórico inteiro (preços ajustados, escala do desdobramento) e o
+      arquivo é baixado de novo desde o início;
+    - orcamento_bytes: tamanho máximo do diretório; os arquivos usados há
+      mais tempo são apagados primeiro (LRU pelo mtime).
+    """
+
+    def __init__(
+        self,
+        diretorio=DIRETORIO_PADRAO,
+        orcamento_bytes=ORCAMENTO_PADRAO,
+        validade=12 * 3600,
+        dias_revisao=5,
+        baixar=baixar_do_provedor,
+        baixar_muitos=baixar_muitos_do_provedor,
+    ):
+        self.diretorio = diretorio
+        self.orcamento_bytes = orcamento_bytes
+        self.validade = validade
+        self.dias_revisao = dias_revisao
+        self.baixar = baixar
+        self.baixar_muitos = baixar_muitos
+        os.makedirs(diretorio, exist_ok=True)
+
+    def caminho(self, ticker, auto_adjust):
+        modo = "ajustado" if auto_adjust else "bruto"
+        nome = ticker.replace(os.sep, "_")
+        return os.path.join(self.diretorio, f"{nome}.{modo}.npz")
+
+    def history(self, ticker, start, end, auto_adjust=True):
+        inicio = pd.Timestamp(start)
+        fim = pd.Timestamp(end)
+        caminho = self.caminho(ticker, auto_adjust)
+        agora = time.time()
+
+        hist, meta = self._ler(caminho)
+        if hist is None:
+            hist = self._baixar(ticker, inicio, fim, auto_adjust)
+            if hist.empty:
+                return hist
+            meta = {"inicio": str(inicio.date()), "fim": str(fim.date()), "baixado_em": agora}
+            self._gravar(caminho, hist, meta)
+            return self._recortar(hist, inicio, fim)
+
+        alterado = False
+        if inicio < pd.Timestamp(meta["inicio"]):
+            cabeca = self._baixar(ticker, inicio, pd.Timestamp(meta["inicio"]), auto_adjust)
+            hist = self._juntar(cabeca, hist)
+            meta["inicio"] = str(inicio.date())
+            alterado = True
+
+        baixado_em = pd.Timestamp(meta["baixado_em"], unit="s").normalize()
+        recente = agora - meta["baixado_em"] < self.validade
+        if fim > pd.Timestamp(meta["fim"]) or (fim > baixado_em and not recente):
+            if hist.empty:
+                desde = pd.Timestamp(meta["inicio"])
+            else:
+                ultimo = _sem_fuso(hist.index)[-1].normalize()
+                desde = max(ultimo - pd.Timedelta(days=self.dias_revisao), pd.Timestamp(meta["inicio"]))
+            ate = max(fim, pd.Timestamp(meta["fim"]))
+            cauda = self._baixar(ticker, desde, ate, auto_adjust)
+            if self._reescrito(hist, cauda):
+                hist = self._baixar(ticker, pd.Timestamp(meta["inicio"]), ate, auto_adjust)
+            else:
+                hist = self._juntar(hist, cauda)
+            meta["fim"] = str(ate.date())
+            meta["baixado_em"] = agora
+            alterado = True
+
+        if alterado:
+            self._gravar(caminho, hist, meta)
+        else:
+            os.utime(caminho)
+        return self._recortar(hist, inicio, fim)
+
+    def history_many(self, tickers, start, end, auto_adjust=True):
+        """
+        {ticker: history} de vários tickers. Os que ainda não estão em disco
+        são pedidos ao provedor numa chamada só; os demais seguem o history.
+        """
+        inicio = pd.Timestamp(start)
+        fim = pd.Timestamp(end)
+        tickers = list(dict.fromkeys(tickers))
+        frios = [t for t in tickers if not os.path.exists(self.caminho(t, auto_adjust))]
+
+        resultados = {}
+        if frios:
+            agora = time.time()
+            baixados = self.baixar_muitos(frios, str(inicio.date()), str(fim.date()), auto_adjust)
+            for ticker, hist in baixados.items():
+                if not hist.empty:
+                    meta = {"inicio": str(inicio.date()), "fim": str(fim.date()), "baixado_em": agora}
+                    self._gravar(self.caminho(ticker, auto_adjust), hist, meta)
+                    hist = self._recortar(hist, inicio, fim)
+                resultados[ticker] = hist
+
+        for ticker in tickers:
+            if ticker not in resultados:
+                resultados[ticker] = self.history(ticker, start, end, auto_adjust)
+        return {t: resultados[t] for t in tickers}
+
+    def _baixar(self, ticker, inicio, fim, auto_adjust):
+        return self.baixar(ticker, str(inicio.date()), str(fim.date()), auto_adjust)
+
+    @staticmethod
+    def _reescrito(antigo, cauda):
+        """
+        Se a cauda baixada mostra que o Yahoo reescreveu o histórico salvo: Close
+        diferente nos dias em comum (menos o último salvo, que pode ter sido um
+        pregão em andamento) ou dividendo/desdobramento que o arquivo não tem.
+        """
+        if antigo.empty or cauda.empty:
+            return False
+        comum = cauda.index.intersection(antigo.index[:-1])
+        if "Close" in cauda and not np.allclose(
+            cauda.loc[comum, "Close"].to_numpy(dtype=float),
+            antigo.loc[comum, "Close"].to_numpy(dtype=float),
+            rtol=1e-6,
+            equal_nan=True,
+        ):
+            return True
+        for coluna in ("Dividends", "Stock Splits"):
+            if coluna not in cauda:
+                continue
+            eventos = cauda[coluna].fillna(0)
+            eventos = eventos[eventos != 0]
+            salvos = antigo[coluna].reindex(eventos.index) if coluna in antigo else None
+            if len(eventos) and (salvos is None or not np.allclose(salvos.fillna(0), eventos)):
+                return True
+        return False
+
+    @staticmethod
+    def _juntar(antigo, novo):
+        if novo.empty:
+            return antigo
+        if antigo.empty:
+            return novo
+        juntos = pd.concat([antigo, novo])
+        juntos = juntos[~juntos.index.duplicated(keep="last")]
+        return juntos.sort_index()
+
+    @staticmethod
+    def _recortar(hist, inicio, fim):
+        datas = _sem_fuso(hist.index)
+        return hist[(datas >= inicio) & (datas < fim)]
+
+    def _ler(self, caminho):
+        if not os.path.exists(caminho):
+            return None, None
+        try:
+            with np.load(caminho, allow_pickle=False) as arquivo:
+                meta = json.loads(str(arquivo["__meta__"]))
+                index = pd.DatetimeIndex(arquivo["__datas__"].astype("datetime64[ns]"), name="Date")
+                if meta["fuso"]:
+                    index = index.tz_localize("UTC").tz_convert(meta["fuso"])
+                colunas = {nome: arquivo[nome] for nome in meta["colunas"]}
+        except (OSError, ValueError, KeyError):
+            # Arquivo corrompido ou de formato antigo: baixa tudo de novo.
+            return None, None
+        return pd.DataFrame(colunas, index=index), meta
+
+    def _gravar(self, caminho, hist, meta):
+        index = hist.index
+        meta["fuso"] = str(index.tz) if index.tz is not None else None
+        meta["colunas"] = list(hist.columns)
+        if index.tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+
+        arrays = {nome: hist[nome].to_numpy() for nome in hist.columns}
+        arrays["__datas__"] = index.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        arrays["__meta__"] = np.array(json.dumps(meta))
+
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "wb") as arquivo:
+            np.savez(arquivo, **arrays)
+        os.replace(temporario, caminho)
+        self._despejar(manter=caminho)
+
+    def _despejar(self, manter):
+        arquivos = []
+        for nome in os.listdir(self.diretorio):
+            if nome.endswith(".npz"):
+                st = os.stat(os.path.join(self.diretorio, nome))
+                arquivos.append((st.st_mtime, st.st_size, os.path.join(self.diretorio, nome)))
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.orcamento_bytes:
+                break
+            if caminho == manter:
+                continue
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+
+
+_cache = None
+
+
+def cache_padrao():
+    global _cache
+    if _cache is None:
+        _cache = CacheHistorico()
+    return _cache
+
+
+def historico(ticker, start, end, auto_adjust=True):
+    """
+    Equivalente a yf.Ticker(ticker).history(...), pelo provedor configurado e,
+    se ele for remoto, pelo cache em disco.
+    """
+    provedor = provedor_padrao()
+    if not provedor.remoto:
+        return provedor.history(ticker, start, end, auto_adjust=auto_adjust)
+    return cache_padrao().history(ticker, start, end, auto_adjust=auto_adjust)
+
+
+def historicos(tickers, start, end, auto_adjust=True):
+    """historico() de vários tickers de uma vez: {ticker: DataFrame}."""
+    provedor = provedor_padrao()
+    if not provedor.remoto:
+        return provedor.history_many(tickers, start, end, auto_adjust=auto_adjust)
+    return cache_padrao().history_many(tickers, start, end, auto_adjust=auto_adjust)
@@ -0,0 +1,94 @@
+"""
+Câmbio em memória: a série diária completa de cada moeda em reais é baixada
+uma vez por processo (e por dia) e as médias anuais e mensais do dólar são
+calculadas junto, então converter os números de qualquer quantidade de
+tickers custa um único download por moeda.
+
+Para converter preços, dólar, euro e libra vêm da PTAX de venda do Banco
+Central (SGS, o dólar desde 1984); as demais moedas, do par <moeda>BRL=X do
+Yahoo, que só começa por volta de 2003.
+"""
+
+import datetime
+from functools import lru_cache
+
+import numpy as np
+
+from financeiro.cache import historico
+from financeiro.dca import datas_locais
+from financeiro.sgs import cliente_padrao
+
+
+USDBRL = "USDBRL=X"
+INICIO_CAMBIO = "2000-01-01"
+# Séries do SGS com a PTAX de venda (reais por unidade da moeda)
+PTAX = {"USD": 1, "EUR": 21619, "GBP": 21623}
+
+
+def _hoje():
+    return datetime.date.today()
+
+
+def par_brl(moeda):
+    """Ticker do Yahoo com a cotação da moeda em reais (ex.: "EURBRL=X")."""
+    return f"{moeda}BRL=X"
+
+
+@lru_cache(maxsize=16)
+def _em_brl(moeda, hoje):
+    fim = hoje + datetime.timedelta(days=1)
+    hist = historico(par_brl(moeda), INICIO_CAMBIO, fim, auto_adjust=True)
+    if hist.empty:
+        raise ValueError(f"Não foi possível obter o câmbio {moeda}/BRL.")
+    return hist["Close"].dropna()
+
+
+def _usdbrl(hoje):
+    return _em_brl("USD", hoje)
+
+
+@lru_cache(maxsize=2)
+def _medias(hoje):
+    serie = _usdbrl(hoje)
+    anual = serie.groupby(serie.index.year).mean()
+    mensal = serie.groupby(serie.index.tz_localize(None).to_period("M")).mean()
+    return anual, mensal
+
+
+def usdbrl():
+    """Fechamento diário do USDBRL=X desde 2000."""
+    return _usdbrl(_hoje())
+
+
+@lru_cache(maxsize=16)
+def _cotacoes(moeda, hoje):
+    if moeda in PTAX:
+        dias, valores = cliente_padrao().serie(PTAX[moeda])
+        if not len(dias):
+            raise ValueError(f"Não foi possível obter a PTAX {moeda}/BRL.")
+        return dias, valores
+    serie = _em_brl(moeda, hoje)
+    return datas_locais(serie.index).astype("datetime64[D]"), serie.to_numpy(dtype=float)
+
+
+def cotacoes_brl(moeda, datas):
+    """
+    Quantos reais vale uma unidade de `moeda` em cada data (datetime64): a
+    última cotação até a data, ou NaN antes da primeira. Em BRL, tudo 1.
+    """
+    datas = np.asarray(datas, dtype="datetime64[D]")
+    if moeda == "BRL":
+        return np.ones(len(datas))
+    dias, valores = _cotacoes(moeda, _hoje())
+    posicao = np.searchsorted(dias, datas, side="right") - 1
+    return np.where(posicao >= 0, valores[np.maximum(posicao, 0)], np.nan)
+
+
+def media_anual():
+    """Dólar médio de cada ano, indexado pelo ano (int)."""
+    return _medias(_hoje())[0]
+
+
+def media_mensal():
+    """Dólar médio de cada mês, indexado por Period mensal."""
+    return _medias(_hoje())[1]
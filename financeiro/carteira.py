@@ -0,0 +1,202 @@
+"""
+Simulador de carteira com pesos-alvo, aportes mensais e rebalanceamento:
+
+    python -m financeiro.carteira BOVA11 IVVB11 SELIC USD --pesos 40 20 30 10
+    python -m financeiro.carteira BOVA11 IVVB11 SELIC USD --grade 0.05
+
+Além de tickers, a carteira aceita a perna de caixa SELIC (índice da taxa
+diária do BCB, série 11) e a perna de dólar USD (USDBRL=X). Todas viram uma
+matriz pregões x ativos; o aporte entra no primeiro pregão de cada mês e é
+dividido conforme a política:
+
+    subalocado        todo o aporte vai para os ativos abaixo do peso-alvo,
+                      proporcional à falta de cada um, sem vender nada
+    rebalanceamento   o aporte segue os pesos e, a cada `periodo` meses, a
+                      carteira inteira volta aos pesos-alvo
+
+Os preços de tickers negociados em outra moeda passam para reais pelo câmbio
+de cada dia (moedas.converter_precos), como a perna de dólar, então a
+carteira inteira fica em reais.
+"""
+
+import argparse
+import sys
+from collections import namedtuple
+from itertools import combinations
+
+import numpy as np
+
+from financeiro.cache import historicos
+from financeiro.cambio import USDBRL
+from financeiro.dca import alinhar_colunas, inicio_de_mes
+from financeiro.moedas import converter_precos, moedas
+from financeiro.sgs import SELIC_DIARIA, cliente_padrao
+from financeiro.taxa import DIAS_POR_MES, tir_aportes_iguais
+
+
+SELIC = "SELIC"
+DOLAR = "USD"
+POLITICAS = ("subalocado", "rebalanceamento")
+
+SimulacaoCarteira = namedtuple("SimulacaoCarteira", "patrimonio total_aportes tir cotas valores")
+
+
+def _preencher_para_frente(matriz):
+    """Repete o último valor válido de cada coluna nos NaN seguintes."""
+    linhas = np.where(np.isnan(matriz), 0, np.arange(len(matriz))[:, None])
+    return matriz[np.maximum.accumulate(linhas, axis=0), np.arange(matriz.shape[1])]
+
+
+def precos_carteira(ativos, inicio, fim, cliente=None):
+    """
+    (datas, matriz pregões x ativos) no calendário comum, com o último preço
+    repetido nos dias em que um ativo não negocia e começando no primeiro
+    dia em que todos têm preço. Tickers usam o Close ajustado; SELIC é o
+    índice da taxa diária (a taxa de um dia rende até o dia útil seguinte);
+    USD é o USDBRL=X. Tudo em reais: tickers de outras bolsas são
+    convertidos pelo câmbio do dia. `fim` é exclusivo.
+    """
+    ativos = list(ativos)
+    negociados = [a for a in ativos if a != SELIC]
+    series = {}
+    if negociados:
+        tickers = [USDBRL if a == DOLAR else a for a in negociados]
+        brutos = historicos(tickers, inicio, fim, auto_adjust=True)
+        datas, (fechamentos,) = alinhar_colunas([brutos[t] for t in tickers], ["Close"])
+        # O USDBRL=X já é cotado em reais
+        cotadas = iter(moedas([t for a, t in zip(negociados, tickers) if a != DOLAR]))
+        de = ["BRL" if a == DOLAR else next(cotadas) for a in negociados]
+        fechamentos = converter_precos(datas, fechamentos, de, para="BRL")
+        series.update((a, (datas, fechamentos[:, j])) for j, a in enumerate(negociados))
+    if SELIC in ativos:
+        cliente = cliente or cliente_padrao()
+        dias, taxas = cliente.serie(SELIC_DIARIA, inicio, np.datetime64(fim, "D") - 1)
+        fatores = 1 + taxas / 100
+        # Valor no começo de cada dia: o produto das taxas dos dias anteriores
+        series[SELIC] = (dias, np.cumprod(fatores) / fatores)
+
+    calendario = np.unique(np.concatenate([d for d, _ in series.values()]))
+    matriz = np.full((len(calendario), len(ativos)), np.nan)
+    for j, ativo in enumerate(ativos):
+        dias, valores = series[ativo]
+        matriz[np.searchsorted(calendario, dias), j] = valores
+
+    matriz = _preencher_para_frente(matriz)
+    completo = ~np.isnan(matriz).any(axis=1)
+    if not completo.any():
+        raise ValueError("Os ativos não têm nenhum dia com preço em comum.")
+    comeco = int(np.argmax(completo))
+    return calendario[comeco:], matriz[comeco:]
+
+
+def grade_de_pesos(n_ativos, passo=0.1):
+    """Matriz combinações x ativos com todos os pesos múltiplos de `passo` que somam 1."""
+    partes = int(round(1 / passo))
+    barras = np.array(list(combinations(range(partes + n_ativos - 1), n_ativos - 1)), dtype=int)
+    barras = barras.reshape(-1, n_ativos - 1)
+    bordas = np.column_stack(
+        (np.full(len(barras), -1), barras, np.full(len(barras), partes + n_ativos - 1))
+    )
+    return (np.diff(bordas, axis=1) - 1) / partes
+
+
+def simular_carteira(datas, precos, pesos, aporte, politica="subalocado", periodo=12, curvas=False):
+    """
+    Aportes mensais de `aporte` em uma carteira com pesos-alvo `pesos`
+    (vetor de ativos ou matriz combinações x ativos; cada linha é
+    normalizada). Todas as combinações andam juntas, mês a mês, como
+    operações sobre matrizes combinações x ativos; entre um aporte e outro as
+    cotas não mudam, então só os preços dos dias de aporte e do último dia
+    entram na conta.
+
+    Devolve um SimulacaoCarteira com patrimônio, total aportado e TIR anual
+    por combinação, as cotas finais e, com curvas=True, o valor da carteira
+    logo depois de cada aporte (combinações x meses).
+    """
+    if politica not in POLITICAS:
+        raise ValueError(f"politica precisa ser uma de {POLITICAS}, não {politica!r}")
+    datas = np.asarray(datas, dtype="datetime64[D]")
+    precos = np.asarray(precos, dtype=float)
+    if not len(datas) or np.isnan(precos).any() or (precos <= 0).any():
+        raise ValueError("precos precisa ser uma matriz sem lacunas e com preços positivos.")
+    if not aporte > 0:
+        raise ValueError(f"aporte precisa ser positivo, não {aporte}.")
+    pesos = np.atleast_2d(np.asarray(pesos, dtype=float))
+    somas = pesos.sum(axis=1, keepdims=True)
+    if (pesos < 0).any() or not (somas > 0).all():
+        raise ValueError("Os pesos precisam ser não negativos e somar mais que zero.")
+    pesos = pesos / somas
+
+    dias_de_aporte = np.flatnonzero(inicio_de_mes(datas))
+    cotas = np.zeros(pesos.shape)
+    valores = np.empty((len(pesos), len(dias_de_aporte))) if curvas else None
+
+    for mes, preco in enumerate(precos[dias_de_aporte]):
+        carteira = cotas * preco
+        total = carteira.sum(axis=1, keepdims=True) + aporte
+        if politica == "rebalanceamento" and mes % periodo == 0:
+            cotas = pesos * total / preco
+        elif politica == "rebalanceamento":
+            cotas = cotas + pesos * aporte / preco
+        else:
+            # A falta somada é pelo menos o aporte, então ninguém passa do alvo
+            falta = np.maximum(pesos * total - carteira, 0)
+            cotas = cotas + falta * (aporte / falta.sum(axis=1, keepdims=True)) / preco
+        if curvas:
+            valores[:, mes] = (cotas * preco).sum(axis=1)
+
+    patrimonio = cotas @ precos[-1]
+    n_aportes = len(dias_de_aporte)
+    meses = (datas[-1] - datas[dias_de_aporte[0]]) / np.timedelta64(1, "D") / DIAS_POR_MES
+    tir = tir_aportes_iguais(patrimonio, aporte, n_aportes, meses)
+    return SimulacaoCarteira(patrimonio, aporte * n_aportes, tir, cotas, valores)
+
+
+def main(argv=None):
+    from financeiro.tickers import ajustar_ticker
+
+    parser = argparse.ArgumentParser(
+        prog="python -m financeiro.carteira",
+        description="Simula aportes mensais em uma carteira com pesos-alvo.",
+    )
+    parser.add_argument("ativos", nargs="+", help=f"tickers, {SELIC} ou {DOLAR}")
+    pesos = parser.add_mutually_exclusive_group()
+    pesos.add_argument("--pesos", type=float, nargs="+", help="pesos-alvo (padrão: iguais)")
+    pesos.add_argument("--grade", type=float, help="testa todas as combinações com esse passo")
+    parser.add_argument("--aporte", type=float, default=1000)
+    parser.add_argument("--inicio", default="2000-01-01")
+    parser.add_argument("--fim", default="2025-01-01")
+    parser.add_argument("--politica", choices=POLITICAS, default="subalocado")
+    parser.add_argument("--periodo", type=int, default=12, help="meses entre rebalanceamentos")
+    parser.add_argument("--melhores", type=int, default=10, help="carteiras mostradas com --grade")
+    args = parser.parse_args(argv)
+
+    ativos = [a if a in (SELIC, DOLAR) else ajustar_ticker(a) for a in args.ativos]
+    if args.pesos and len(args.pesos) != len(ativos):
+        parser.error("Informe um peso para cada ativo.")
+    if args.pesos and (min(args.pesos) < 0 or sum(args.pesos) <= 0):
+        parser.error("Os pesos precisam ser não negativos e somar mais que zero.")
+    if args.aporte <= 0:
+        parser.error("O aporte precisa ser positivo.")
+    datas, precos = precos_carteira(ativos, args.inicio, args.fim)
+
+    if args.grade:
+        grade = grade_de_pesos(len(ativos), args.grade)
+    else:
+        grade = np.atleast_2d(args.pesos or np.ones(len(ativos)))
+    simulacao = simular_carteira(datas, precos, grade, args.aporte, args.politica, args.periodo)
+
+    grade = grade / grade.sum(axis=1, keepdims=True)
+    print(f"{len(grade)} carteiras de {datas[0]} a {datas[-1]}", file=sys.stderr)
+    print(" ".join(f"{a:>8}" for a in ativos) + f" {'patrimônio':>16} {'TIR':>8}")
+    for i in np.argsort(-np.nan_to_num(simulacao.tir, nan=-np.inf))[: args.melhores]:
+        print(
+            " ".join(f"{p:>8.0%}" for p in grade[i])
+            + f" {simulacao.patrimonio[i]:>16,.2f} {simulacao.tir[i]:>8.2%}"
+        )
+    print(f"Total aportado: {simulacao.total_aportes:,.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Backtests em lote, sem interface gráfica:
+
+    python -m financeiro universo.txt --inicio 2000-01-01 --fim 2025-02-01 \\
+        --aporte 1000 --saida resultados.csv --retomar
+
+O universo é um arquivo texto com tickers separados por espaço ou quebra de
+linha (linhas começando com # são ignoradas). Cada ticker vira uma linha do
+CSV (ou Parquet) de saída assim que termina, então uma execução interrompida
+pode continuar de onde parou com --retomar; tickers que terminaram com erro
+(limite de requisições, queda de rede) são tentados de novo. Com --moeda BRL (ou USD) todos
+os valores saem nessa moeda, pelo câmbio de cada pregão, e com --real, em
+dinheiro de hoje (deflacionados pelo IPCA ou pelo CPI).
+"""
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+CAMPOS = {
+    "dca": [
+        "ticker",
+        "erro",
+        "patrimonio",
+        "total_aportes",
+        "primeira_data",
+        "max_drawdown",
+        "cagr",
+        "tir",
+        "volatilidade",
+        "sharpe",
+    ],
+    "aporte-unico": ["ticker", "erro", "patrimonio", "primeira_data"],
+}
+
+
+def ler_universo(caminho):
+    tickers = []
+    with open(caminho, encoding="utf-8") as arquivo:
+        for linha in arquivo:
+            linha = linha.split("#", 1)[0]
+            tickers.extend(linha.split())
+    # Remove repetidos mantendo a ordem do arquivo
+    return list(dict.fromkeys(tickers))
+
+
+def executar_ticker(modo, ticker, valor, inicio, fim, moeda=None, real=False):
+    from financeiro.motor import calculate_lump_sum, get_stock_data
+    from financeiro.tickers import ajustar_ticker
+
+    ticker = ajustar_ticker(ticker)
+    if modo == "dca":
+        erro, patrimonio, total_aportes, data, analise = get_stock_data(
+            ticker, valor, inicio, fim, analise="resumo", para=moeda, real=real
+        )
+        metricas = list(analise.metricas) if analise else [""] * 5
+        return [ticker, erro or "", patrimonio, total_aportes, data or ""] + metricas
+
+    erro, patrimonio, data = calculate_lump_sum(ticker, valor, inicio, fim, moeda, real)
+    return [ticker, erro or "", patrimonio, data.date() if data is not None else ""]
+
+
+def concluidos(caminho, campos):
+    """
+    {ticker: linha} das linhas do checkpoint que terminaram sem erro; as com
+    erro ficam de fora para serem refeitas.
+    """
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        leitor = csv.reader(arquivo)
+        cabecalho = next(leitor, None)
+        if cabecalho and cabecalho != campos:
+            raise SystemExit(
+                f"{caminho} tem outras colunas ({', '.join(cabecalho)}); "
+                "rode sem --retomar para recomeçar."
+            )
+        erro = campos.index("erro")
+        return {
+            linha[0]: linha for linha in leitor if len(linha) == len(campos) and not linha[erro]
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m financeiro", description="Backtests em lote para um universo de tickers."
+    )
+    parser.add_argument("universo", help="arquivo com os tickers")
+    parser.add_argument("--inicio", default="2000-01-01")
+    parser.add_argument("--fim", default="2025-02-01")
+    parser.add_argument(
+        "--aporte", type=float, default=1000, help="aporte mensal (ou inicial, no aporte único)"
+    )
+    parser.add_argument("--modo", choices=sorted(CAMPOS), default="dca")
+    parser.add_argument(
+        "--moeda", type=str.upper, help="converte tudo para essa moeda (padrão: a de cada ticker)"
+    )
+    parser.add_argument(
+        "--real", action="store_true", help="valores em dinheiro de hoje (IPCA em BRL, CPI em USD)"
+    )
+    parser.add_argument("--saida", default="resultados.csv", help=".csv ou .parquet")
+    parser.add_argument(
+        "--processos", type=int, default=os.cpu_count(), help="padrão: número de núcleos"
+    )
+    parser.add_argument(
+        "--retomar", action="store_true", help="pula os tickers que já estão no checkpoint"
+    )
+    args = parser.parse_args(argv)
+
+    parquet = args.saida.endswith(".parquet")
+    checkpoint = args.saida + ".parcial.csv" if parquet else args.saida
+    campos = CAMPOS[args.modo]
+
+    # O checkpoint guarda o ticker já com o sufixo .SA
+    from financeiro.tickers import ajustar_ticker
+
+    universo = ler_universo(args.universo)
+    feitos = concluidos(checkpoint, campos) if args.retomar else {}
+    pendentes = [t for t in universo if ajustar_ticker(t) not in feitos]
+    print(
+        f"{len(universo)} tickers, {len(universo) - len(pendentes)} já concluídos.",
+        file=sys.stderr,
+    )
+
+    # O checkpoint é reescrito só com as linhas sem erro; as refeitas entram no fim
+    temporario = f"{checkpoint}.{os.getpid()}.tmp"
+    with open(temporario, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(campos)
+        escritor.writerows(feitos.values())
+    os.replace(temporario, checkpoint)
+
+    with open(checkpoint, "a", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo)
+
+        with ProcessPoolExecutor(max_workers=args.processos) as executor:
+            futuros = {
+                executor.submit(
+                    executar_ticker,
+                    args.modo,
+                    ticker,
+                    args.aporte,
+                    args.inicio,
+                    args.fim,
+                    args.moeda,
+                    args.real,
+                ): ticker
+                for ticker in pendentes
+            }
+            for i, futuro in enumerate(as_completed(futuros), start=1):
+                linha = futuro.result()
+                escritor.writerow(linha)
+                arquivo.flush()
+                print(f"[{i}/{len(pendentes)}] {linha[0]} {linha[1]}", file=sys.stderr)
+
+    if parquet:
+        import pandas as pd
+
+        pd.read_csv(checkpoint, keep_default_na=False).to_parquet(args.saida, index=False)
+        os.remove(checkpoint)
+    return 0
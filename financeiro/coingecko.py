@@ -0,0 +1,179 @@
+"""
+Cliente assíncrono do market_chart/range da CoinGecko, com cache em disco.
+
+A CoinGecko escolhe a granularidade pelo tamanho do intervalo pedido (até 1
+dia: 5 minutos; até 90 dias: horária; acima disso: diária), então intervalos
+longos são quebrados em blocos de tamanho fixo que mantêm a granularidade
+pedida. Os blocos seguem uma grade fixa (múltiplos do tamanho máximo do bloco
+desde 1970), para o mesmo bloco ser reaproveitado do cache em pedidos
+diferentes; só o bloco que ainda não terminou é baixado de novo.
+
+    cliente = ClienteCoinGecko()
+    grafico = await cliente.market_chart("bitcoin", "2014-01-01", "2025-01-01")
+"""
+
+import asyncio
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from financeiro.cache import DIRETORIO_PADRAO
+from financeiro.rede import sessao_padrao
+
+
+URL_COINGECKO = "https://api.coingecko.com/api/v3"
+
+# (dias mínimos, dias máximos) de um bloco para a API devolver essa granularidade
+GRANULARIDADES = {"diaria": (91, 365), "horaria": (2, 90)}
+
+Grafico = namedtuple("Grafico", "datas precos capitalizacao volumes")
+
+DIA_MS = 86_400_000
+
+
+def _decodificar(pontos):
+    """Lista [[timestamp_ms, valor], ...] em (datetime64[ms], float64), sem laço."""
+    pontos = np.asarray(pontos, dtype=float).reshape(-1, 2)
+    return pontos[:, 0].astype(np.int64).astype("datetime64[ms]"), pontos[:, 1]
+
+
+def _ms(data):
+    data = pd.Timestamp(data)
+    data = data.tz_convert("UTC") if data.tz is not None else data.tz_localize("UTC")
+    return data.value // 1_000_000
+
+
+class ClienteCoinGecko:
+    """
+    - max_em_voo: blocos baixados ao mesmo tempo (todas as moedas e intervalos
+      de uma chamada a market_chart_varios dividem o mesmo limite);
+    - chave: chave da API demo, se houver (cabeçalho x-cg-demo-api-key).
+
+    A taxa de chamadas ao host e as novas tentativas em 429 ficam com a
+    sessão (financeiro.rede e TAXAS_POR_HOST em financeiro.paralelo).
+    """
+
+    def __init__(
+        self,
+        diretorio=os.path.join(DIRETORIO_PADRAO, "coingecko"),
+        url=URL_COINGECKO,
+        sessao=None,
+        max_em_voo=4,
+        timeout=30,
+        chave=None,
+    ):
+        self.diretorio = diretorio
+        self.url = url
+        self.sessao = sessao or sessao_padrao()
+        self.max_em_voo = max_em_voo
+        self.timeout = timeout
+        self.chave = chave
+        os.makedirs(diretorio, exist_ok=True)
+
+    async def market_chart(self, moeda, inicio, fim, vs="usd", granularidade="diaria"):
+        """Grafico com os pontos de [inicio, fim) da moeda (id da CoinGecko, ex.: "bitcoin")."""
+        semaforo = asyncio.Semaphore(self.max_em_voo)
+        return await self._market_chart(semaforo, moeda, inicio, fim, vs, granularidade)
+
+    async def market_chart_varios(self, pedidos, vs="usd", granularidade="diaria"):
+        """
+        Vários (moeda, inicio, fim) ao mesmo tempo, sob um só limite de
+        concorrência. Devolve os Graficos na ordem dos pedidos.
+        """
+        semaforo = asyncio.Semaphore(self.max_em_voo)
+        return await asyncio.gather(
+            *(
+                self._market_chart(semaforo, moeda, inicio, fim, vs, granularidade)
+                for moeda, inicio, fim in pedidos
+            )
+        )
+
+    async def _market_chart(self, semaforo, moeda, inicio, fim, vs, granularidade):
+        minimo, maximo = GRANULARIDADES[granularidade]
+        a, b = _ms(inicio), _ms(fim)
+        agora = int(time.time() * 1000)
+        passo = maximo * DIA_MS
+
+        blocos = [
+            (inicio_bloco, min(inicio_bloco + passo, agora))
+            for inicio_bloco in range(a // passo * passo, min(b, agora), passo)
+        ]
+
+        async def baixar(bloco):
+            async with semaforo:
+                return await asyncio.to_thread(
+                    self._bloco, moeda, vs, granularidade, bloco[0], bloco[1], minimo
+                )
+
+        partes = await asyncio.gather(*(baixar(bloco) for bloco in blocos))
+
+        if partes:
+            colunas = [np.concatenate(coluna) for coluna in zip(*partes)]
+        else:
+            colunas = [np.array([], dtype="datetime64[ms]")] + [np.array([])] * 3
+        datas = colunas[0]
+        ordem = np.argsort(datas, kind="stable")
+        # Blocos vizinhos podem repetir a borda; fica a última ocorrência
+        datas = datas[ordem]
+        unico = np.append(datas[1:] != datas[:-1], True)
+        dentro = (datas >= np.datetime64(a, "ms")) & (datas < np.datetime64(b, "ms")) & unico
+        return Grafico(*(coluna[ordem][dentro] for coluna in colunas))
+
+    def _caminho(self, moeda, vs, granularidade, inicio_bloco):
+        nome = f"{moeda}.{vs}.{granularidade}.{inicio_bloco // DIA_MS}.npz"
+        return os.path.join(self.diretorio, nome)
+
+    def _bloco(self, moeda, vs, granularidade, a, b, minimo):
+        completo = b - a == GRANULARIDADES[granularidade][1] * DIA_MS
+        caminho = self._caminho(moeda, vs, granularidade, a)
+        if completo and os.path.exists(caminho):
+            with np.load(caminho) as arquivo:
+                return tuple(arquivo[nome] for nome in Grafico._fields)
+
+        # O bloco em andamento pode ser curto demais para a granularidade;
+        # pede mais dias para trás e descarta o que sobrar depois
+        dados = self._pedir(moeda, vs, min(a, b - minimo * DIA_MS), b)
+        datas, precos = _decodificar(dados.get("prices", []))
+        _, capitalizacao = _decodificar(dados.get("market_caps", []))
+        _, volumes = _decodificar(dados.get("total_volumes", []))
+        if not (len(datas) == len(capitalizacao) == len(volumes)):
+            capitalizacao = np.full(len(datas), np.nan)
+            volumes = np.full(len(datas), np.nan)
+
+        dentro = datas >= np.datetime64(a, "ms")
+        bloco = (datas[dentro], precos[dentro], capitalizacao[dentro], volumes[dentro])
+        if completo:
+            temporario = f"{caminho}.{os.getpid()}.tmp"
+            with open(temporario, "wb") as arquivo:
+                np.savez(arquivo, **dict(zip(Grafico._fields, bloco)))
+            os.replace(temporario, caminho)
+        return bloco
+
+    def _pedir(self, moeda, vs, a, b):
+        url = f"{self.url}/coins/{moeda}/market_chart/range"
+        params = {"vs_currency": vs, "from": a // 1000, "to": b // 1000}
+        cabecalhos = {"x-cg-demo-api-key": self.chave} if self.chave else None
+        resposta = self.sessao.get(url, params=params, headers=cabecalhos, timeout=self.timeout)
+        resposta.raise_for_status()
+        return resposta.json()
+
+
+def para_historico(grafico):
+    """
+    Grafico diário no formato do yfinance (índice em UTC, Close, Dividends e
+    Stock Splits), para entrar nos mesmos backtests das ações.
+    """
+    index = pd.DatetimeIndex(grafico.datas.astype("datetime64[ns]"), name="Date")
+    index = index.tz_localize("UTC")
+    return pd.DataFrame(
+        {
+            "Close": grafico.precos,
+            "Volume": grafico.volumes,
+            "Dividends": 0.0,
+            "Stock Splits": 0.0,
+        },
+        index=index,
+    )
@@ -0,0 +1,264 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from financeiro.taxa import DIAS_POR_MES, tir_aportes_iguais, xirr
+
+
+PREGOES_POR_ANO = 252
+# Colunas por bloco em aportes_mensais_lote: 256 x 25 anos de pregões dá
+# temporários de uns 13 MB
+COLUNAS_POR_BLOCO = 256
+
+Metricas = namedtuple("Metricas", "max_drawdown cagr tir volatilidade sharpe")
+AnaliseDCA = namedtuple("AnaliseDCA", "metricas curva")
+
+LoteDCA = namedtuple(
+    "LoteDCA",
+    "cotas total_aportes patrimonio primeiras_datas tir "
+    "patrimonio_carteira aportes_carteira tir_carteira",
+)
+
+
+def datas_locais(index):
+    """Converte um DatetimeIndex (com ou sem fuso) em datetime64 no horário local."""
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)
+    return np.asarray(index, dtype="datetime64[ns]")
+
+
+def inicio_de_mes(datas):
+    """
+    Máscara do primeiro pregão de cada mês. As datas precisam estar em ordem
+    crescente, como vêm do yfinance.
+    """
+    meses = datas.astype("datetime64[M]")
+    mascara = np.ones(len(meses), dtype=bool)
+    np.not_equal(meses[1:], meses[:-1], out=mascara[1:])
+    return mascara
+
+
+def aportes_mensais(datas, precos, monthly_investment):
+    """
+    Aporta `monthly_investment` no primeiro pregão de cada mês.
+    Retorna (cotas, total_aportes, patrimonio).
+    """
+    compra = inicio_de_mes(datas) & (precos > 0)
+    cotas = np.cumsum(monthly_investment / precos[compra])
+    cotas = cotas[-1] if len(cotas) else 0.0
+    total_aportes = monthly_investment * int(compra.sum())
+    return cotas, total_aportes, cotas * precos[-1]
+
+
+def analisar_aportes(datas, precos, monthly_investment, curvas=True, livre_de_risco=0.0):
+    """
+    aportes_mensais com a curva diária e as métricas de risco, no mesmo passo.
+    Retorna (total_aportes, patrimonio, metricas, curva), onde curva é
+    (patrimonio diário, aportes acumulados) ou None com curvas=False.
+
+    Drawdown, CAGR, volatilidade e Sharpe são medidos no valor da cota
+    (retorno ponderado pelo tempo, desde o primeiro aporte), para os aportes
+    não mascararem as quedas; a TIR é a taxa anual ponderada pelo dinheiro.
+    `livre_de_risco` é a taxa anual descontada no Sharpe.
+    """
+    compra = inicio_de_mes(datas) & (precos > 0)
+    cotas = np.cumsum(np.where(compra, monthly_investment / np.where(compra, precos, 1), 0.0))
+    n_aportes = int(compra.sum())
+    total_aportes = monthly_investment * n_aportes
+    patrimonio = cotas[-1] * precos[-1] if len(cotas) else 0.0
+
+    curva = None
+    if curvas:
+        curva = (cotas * precos, monthly_investment * np.cumsum(compra))
+
+    if not n_aportes:
+        return total_aportes, patrimonio, Metricas(*[np.nan] * 5), curva
+
+    primeiro = int(np.argmax(compra))
+    cota = precos[primeiro:]
+    retornos = cota[1:] / cota[:-1] - 1
+    dias = (datas[-1] - datas[primeiro]) / np.timedelta64(1, "D")
+
+    max_drawdown = float(np.min(cota / np.maximum.accumulate(cota)) - 1)
+    cagr = (cota[-1] / cota[0]) ** (365.25 / dias) - 1 if dias > 0 else np.nan
+    tir = float(tir_aportes_iguais(patrimonio, monthly_investment, n_aportes, dias / DIAS_POR_MES))
+    if len(retornos) > 1:
+        desvio = retornos.std(ddof=1)
+        volatilidade = desvio * np.sqrt(PREGOES_POR_ANO)
+        excesso = retornos.mean() - ((1 + livre_de_risco) ** (1 / PREGOES_POR_ANO) - 1)
+        sharpe = excesso / desvio * np.sqrt(PREGOES_POR_ANO) if desvio > 0 else np.nan
+    else:
+        volatilidade = sharpe = np.nan
+
+    metricas = Metricas(*map(float, (max_drawdown, cagr, tir, volatilidade, sharpe)))
+    return total_aportes, patrimonio, metricas, curva
+
+
+def aportes_mensais_lote(datas, precos, monthly_investment, colunas_por_bloco=COLUNAS_POR_BLOCO):
+    """
+    aportes_mensais para todos os tickers de uma vez. `precos` é uma matriz
+    pregões x tickers alinhada a `datas`, com NaN onde o ticker não negociou
+    (antes do IPO, feriados locais). Cada coluna aporta no seu primeiro pregão
+    válido de cada mês. Devolve um LoteDCA com arrays por ticker (primeiras_datas
+    é NaT nas colunas vazias) e os totais da carteira. A TIR de cada ticker
+    sai da forma fechada dos aportes iguais; a da carteira, que recebe aportes
+    diferentes a cada mês conforme os tickers começam a negociar, do xirr.
+
+    As colunas passam em blocos de `colunas_por_bloco`, então os temporários
+    têm o tamanho de um bloco e uma matriz mapeada do disco (armazem) não é
+    carregada inteira na memória.
+    """
+    if not len(datas):
+        precos = np.full((1, np.shape(precos)[1]), np.nan)
+        datas = np.array(["NaT"], dtype="datetime64[ns]")
+    inicio = np.flatnonzero(inicio_de_mes(datas))
+
+    # Pelo menos um bloco, mesmo sem colunas, para os arrays saírem vazios
+    blocos = [
+        _aportes_bloco(datas, inicio, precos[:, a : a + colunas_por_bloco], monthly_investment)
+        for a in range(0, max(np.shape(precos)[1], 1), colunas_por_bloco)
+    ]
+    partes = list(zip(*blocos))
+    cotas, compras, patrimonio, primeiras_datas, primeiras_compras, ultimo = map(
+        np.concatenate, partes[:-1]
+    )
+    aportes_por_dia = np.sum(partes[-1], axis=0)
+
+    total_aportes = monthly_investment * compras
+    dias = (datas[ultimo] - datas[primeiras_compras]) / np.timedelta64(1, "D")
+    tir = tir_aportes_iguais(patrimonio, monthly_investment, compras, dias / DIAS_POR_MES)
+
+    # Fluxos da carteira: os aportes de cada pregão e o resgate no último
+    fluxos = -monthly_investment * aportes_por_dia
+    fluxos[-1] += patrimonio.sum()
+    tir_carteira = xirr(fluxos, datas) if compras.any() else np.nan
+
+    return LoteDCA(
+        cotas,
+        total_aportes,
+        patrimonio,
+        primeiras_datas,
+        tir,
+        patrimonio.sum(),
+        total_aportes.sum(),
+        tir_carteira,
+    )
+
+
+def _aportes_bloco(datas, inicio, precos, monthly_investment):
+    """
+    Um bloco de colunas de aportes_mensais_lote: (cotas, número de aportes,
+    patrimônio, primeira data válida, pregão do primeiro aporte e do último
+    preço de cada coluna, número de aportes de cada pregão).
+    """
+    precos = np.asarray(precos, dtype=float)
+    valido = ~np.isnan(precos)
+
+    # Pregões válidos acumulados até o fim do mês anterior, por coluna
+    contagem = np.cumsum(valido, axis=0)
+    antes = np.zeros((len(inicio), precos.shape[1]), dtype=contagem.dtype)
+    antes[1:] = contagem[inicio[1:] - 1]
+    antes = np.repeat(antes, np.diff(np.append(inicio, len(datas))), axis=0)
+
+    compra = valido & (contagem - antes == 1) & (precos > 0)
+    cotas = np.where(compra, monthly_investment / np.where(compra, precos, 1), 0.0).sum(axis=0)
+
+    tem_dados = valido.any(axis=0)
+    ultimo = len(datas) - 1 - np.argmax(valido[::-1], axis=0)
+    patrimonio = np.where(tem_dados, cotas * precos[ultimo, np.arange(precos.shape[1])], 0.0)
+    primeiras_datas = np.where(tem_dados, datas[np.argmax(valido, axis=0)], np.datetime64("NaT"))
+    return (
+        cotas,
+        compra.sum(axis=0),
+        patrimonio,
+        primeiras_datas,
+        np.argmax(compra, axis=0),
+        ultimo,
+        compra.sum(axis=1),
+    )
+
+
+def alinhar_fechamentos(historicos):
+    """
+    Junta o Close de cada histórico do yfinance em uma matriz pregões x
+    tickers, no calendário formado pela união dos dias de pregão (data
+    local). Devolve (datas datetime64[D], precos), com NaN onde o ticker não
+    tem pregão.
+    """
+    datas, (precos,) = alinhar_colunas(historicos, ["Close"])
+    return datas, precos
+
+
+def alinhar_colunas(historicos, colunas):
+    """
+    Como alinhar_fechamentos, para várias colunas no mesmo calendário:
+    (datas, [matriz de cada coluna]). Coluna ausente num histórico vale 0
+    (como Dividends em quem nunca pagou).
+    """
+    series = []
+    for hist in historicos:
+        hist = hist.dropna(subset=["Close"]) if "Close" in hist else hist.iloc[:0]
+        dias = datas_locais(hist.index).astype("datetime64[D]")
+        valores = [
+            hist[coluna].to_numpy(dtype=float) if coluna in hist else np.zeros(len(hist))
+            for coluna in colunas
+        ]
+        series.append((dias, valores))
+
+    datas = np.unique(np.concatenate([d for d, _ in series] or [np.array([], "datetime64[D]")]))
+    matrizes = [np.full((len(datas), len(series)), np.nan) for _ in colunas]
+    for j, (dias, valores) in enumerate(series):
+        linhas = np.searchsorted(datas, dias)
+        for matriz, v in zip(matrizes, valores):
+            matriz[linhas, j] = v
+    return datas, matrizes
+
+
+def backtest_dca(hist, monthly_investment):
+    """
+    Backtest de aportes mensais sobre o histórico do yfinance.
+    Retorna (erro, patrimonio, total_aportes, first_valid_date).
+    """
+    hist = hist.dropna(subset=["Close"])
+    if hist.empty:
+        return "Erro: histórico sem preços válidos.", 0, 0, None
+
+    first_valid_date = hist.index.min().date()
+    datas = datas_locais(hist.index)
+    precos = hist["Close"].to_numpy(dtype=float)
+
+    _, total_aportes, patrimonio = aportes_mensais(datas, precos, monthly_investment)
+    return None, patrimonio, total_aportes, first_valid_date
+
+
+def analisar_dca(hist, monthly_investment, curvas=True, livre_de_risco=0.0):
+    """
+    backtest_dca com as métricas de risco: (erro, patrimonio, total_aportes,
+    first_valid_date, AnaliseDCA). A curva é um DataFrame com as colunas
+    patrimonio e aportes no índice do histórico, ou None com curvas=False.
+    """
+    hist = hist.dropna(subset=["Close"])
+    if hist.empty:
+        return "Erro: histórico sem preços válidos.", 0, 0, None, None
+
+    first_valid_date = hist.index.min().date()
+    datas = datas_locais(hist.index)
+    precos = hist["Close"].to_numpy(dtype=float)
+
+    total_aportes, patrimonio, metricas, curva = analisar_aportes(
+        datas, precos, monthly_investment, curvas, livre_de_risco
+    )
+    if curva is not None:
+        curva = pd.DataFrame({"patrimonio": curva[0], "aportes": curva[1]}, index=hist.index)
+    return None, patrimonio, total_aportes, first_valid_date, AnaliseDCA(metricas, curva)
+
+
+def acumular(fatores, aportes, axis=-1):
+    """
+    Resolve P[t] = (P[t-1] + aportes[t]) * fatores[t], com P[-1] = 0, sem laço:
+    P = G * cumsum(aportes / G[t-1]), onde G é o produto acumulado dos fatores.
+    """
+    crescimento = np.cumprod(fatores, axis=axis)
+    anterior = crescimento / fatores
+    return crescimento * np.cumsum(aportes / anterior, axis=axis)
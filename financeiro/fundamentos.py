@@ -0,0 +1,20 @@
+from functools import lru_cache
+
+from financeiro.provedores import provedor_padrao
+
+
+@lru_cache(maxsize=256)
+def financials(ticker):
+    """stock.financials do provedor, memorizado por processo (os LRU mais antigos saem primeiro)."""
+    return provedor_padrao().financials(ticker)
+
+
+def get_lucro_anual(ticker):
+    dados = financials(ticker)
+
+    if dados.empty or "Net Income" not in dados.index:
+        raise ValueError("Lucro líquido não disponível.")
+
+    lucro = dados.loc["Net Income"].sort_index()
+    lucro.index = lucro.index.year
+    return lucro
@@ -0,0 +1,250 @@
+"""
+Atualização diária dos backtests de DCA, sem refazer o histórico:
+
+    python -m financeiro.incremental universo.txt estado.npz --aporte 1000
+
+No preço ajustado do Yahoo (base "anterior" de fatores_proventos), um aporte
+no pregão t compra m / C[t] cotas em Close bruto, multiplicadas depois pelo
+fator de cada dividendo posterior, e o patrimônio é cotas x último Close
+bruto. Então o backtest inteiro cabe em um estado pequeno por ticker: cotas
+nessa unidade, total aportado, primeira data, data do primeiro aporte e o
+último pregão processado com seu Close (o mês dele diz se o aporte do mês já
+foi feito). Atualizar lê só os pregões novos: aplica os dividendos deles às
+cotas, os desdobramentos (o Yahoo reescala o Close antigo) e os aportes dos
+meses que começaram.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from financeiro.cache import historicos
+from financeiro.dca import alinhar_colunas
+from financeiro.taxa import DIAS_POR_MES, tir_aportes_iguais
+
+
+INICIO = "2000-01-01"
+
+EstadoDCA = namedtuple(
+    "EstadoDCA",
+    "tickers aporte inicio cotas total_aportes primeira_data primeiro_aporte "
+    "ultima_data ultimo_fechamento",
+)
+
+_SEM_DATA = np.datetime64("NaT", "D")
+_ANTES_DE_TUDO = np.datetime64("0001-01-01", "D")
+
+
+def estado_vazio(tickers, aporte, inicio=INICIO):
+    n = len(tickers)
+    return EstadoDCA(
+        np.array(tickers, dtype=str),
+        float(aporte),
+        str(inicio),
+        np.zeros(n),
+        np.zeros(n),
+        np.full(n, _SEM_DATA),
+        np.full(n, _SEM_DATA),
+        np.full(n, _SEM_DATA),
+        np.full(n, np.nan),
+    )
+
+
+def incluir_tickers(estado, tickers):
+    """Estado com os `tickers` que ainda não estão nele, vazios, no fim."""
+    existentes = set(estado.tickers)
+    novos = [t for t in dict.fromkeys(tickers) if t not in existentes]
+    if not novos:
+        return estado
+    vazio = estado_vazio(novos, estado.aporte, estado.inicio)
+    return EstadoDCA(
+        np.concatenate((estado.tickers, vazio.tickers)),
+        estado.aporte,
+        estado.inicio,
+        *(np.concatenate((a, b)) for a, b in zip(estado[3:], vazio[3:])),
+    )
+
+
+def avancar(estado, datas, fechamentos, dividendos, desdobramentos):
+    """
+    Aplica ao estado os pregões de `datas` posteriores ao último processado
+    de cada ticker. As matrizes são pregões x tickers na ordem do estado, com
+    Close, Dividends e Stock Splits brutos do Yahoo (NaN fora dos pregões),
+    como os devolvidos pelo Yahoo agora: já na escala dos desdobramentos
+    recentes.
+    """
+    datas = np.asarray(datas, dtype="datetime64[D]")
+    fechamentos = np.asarray(fechamentos, dtype=float)
+    if not len(datas):
+        return estado
+    dividendos = np.nan_to_num(np.asarray(dividendos, dtype=float))
+    desdobramentos = np.nan_to_num(np.asarray(desdobramentos, dtype=float))
+    linhas, colunas = np.arange(len(datas))[:, None], np.arange(fechamentos.shape[1])
+
+    ultima = np.where(np.isnat(estado.ultima_data), _ANTES_DE_TUDO, estado.ultima_data)
+    novo = ~np.isnan(fechamentos) & (datas[:, None] > ultima)
+    tem_novo = novo.any(axis=0)
+
+    # O Close devolvido já está na escala de todos os desdobramentos novos;
+    # as cotas e o último Close guardados passam para essa escala
+    escala = np.where(novo & (desdobramentos > 0), desdobramentos, 1.0).prod(axis=0)
+    cotas = estado.cotas * escala
+    ultimo_fechamento = estado.ultimo_fechamento / escala
+
+    # Pregão novo anterior de cada ticker (-1: o último do estado)
+    anterior = np.maximum.accumulate(np.where(novo, linhas, -1), axis=0)
+    anterior = np.vstack((np.full(len(colunas), -1), anterior[:-1]))
+    tem_anterior = anterior >= 0
+    fechamento_anterior = np.where(
+        tem_anterior, fechamentos[np.maximum(anterior, 0), colunas], ultimo_fechamento
+    )
+    mes_anterior = np.where(
+        tem_anterior,
+        datas[np.maximum(anterior, 0)].astype("datetime64[M]"),
+        estado.ultima_data.astype("datetime64[M]"),
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fator = 1 / (1 - dividendos / fechamento_anterior)
+    fator = np.where(novo & (dividendos > 0) & np.isfinite(fator), fator, 1.0)
+
+    compra = novo & (datas[:, None].astype("datetime64[M]") != mes_anterior) & (fechamentos > 0)
+    compradas = np.where(compra, estado.aporte / np.where(compra, fechamentos, 1), 0.0)
+
+    # cotas[t] = cotas[t-1] * fator[t] + compradas[t], em forma fechada:
+    # cada compra cresce pelos fatores dos pregões seguintes
+    seguintes = np.vstack((np.cumprod(fator[::-1], axis=0)[::-1][1:], np.ones(len(colunas))))
+    cotas = cotas * np.prod(fator, axis=0) + (compradas * seguintes).sum(axis=0)
+
+    ultimo = len(datas) - 1 - np.argmax(novo[::-1], axis=0)
+    primeira = datas[np.argmax(novo, axis=0)]
+    primeira_compra = datas[np.argmax(compra, axis=0)]
+    return EstadoDCA(
+        estado.tickers,
+        estado.aporte,
+        estado.inicio,
+        cotas,
+        estado.total_aportes + estado.aporte * compra.sum(axis=0),
+        np.where(np.isnat(estado.primeira_data) & tem_novo, primeira, estado.primeira_data),
+        np.where(
+            np.isnat(estado.primeiro_aporte) & compra.any(axis=0),
+            primeira_compra,
+            estado.primeiro_aporte,
+        ),
+        np.where(tem_novo, datas[ultimo], estado.ultima_data),
+        np.where(tem_novo, fechamentos[ultimo, colunas], ultimo_fechamento),
+    )
+
+
+def resumo(estado):
+    """
+    DataFrame com o resultado de get_stock_data de cada ticker até o último
+    pregão processado (patrimonio, total_aportes, primeira_data) e a TIR anual.
+    """
+    processado = ~np.isnat(estado.ultima_data)
+    patrimonio = np.where(processado, estado.cotas * estado.ultimo_fechamento, 0.0)
+    n_aportes = np.rint(estado.total_aportes / estado.aporte)
+    dias = (estado.ultima_data - estado.primeiro_aporte) / np.timedelta64(1, "D")
+    tir = tir_aportes_iguais(patrimonio, estado.aporte, n_aportes, dias / DIAS_POR_MES)
+    return pd.DataFrame(
+        {
+            "patrimonio": patrimonio,
+            "total_aportes": estado.total_aportes,
+            "primeira_data": pd.to_datetime(estado.primeira_data),
+            "ultima_data": pd.to_datetime(estado.ultima_data),
+            "tir": np.where(n_aportes > 0, tir, np.nan),
+        },
+        index=pd.Index(estado.tickers, name="ticker"),
+    )
+
+
+def atualizar(estado, fim=None):
+    """
+    Baixa (ou lê do cache) só o trecho que falta de cada ticker e avança o
+    estado. Tickers nunca processados vêm desde estado.inicio. `fim` é
+    exclusivo e, por padrão, hoje, para um pregão ainda em andamento não
+    entrar no estado.
+    """
+    if fim is None:
+        fim = str(pd.Timestamp.today().date())
+    tickers = list(estado.tickers)
+    processados = ~np.isnat(estado.ultima_data)
+
+    brutos = {}
+    if (~processados).any():
+        novos = [t for t, feito in zip(tickers, processados) if not feito]
+        brutos.update(historicos(novos, estado.inicio, fim, auto_adjust=False))
+    if processados.any():
+        # O último pregão processado vem junto, mas avancar() o ignora
+        desde = str(estado.ultima_data[processados].min())
+        antigos = [t for t, feito in zip(tickers, processados) if feito]
+        brutos.update(historicos(antigos, desde, fim, auto_adjust=False))
+
+    datas, matrizes = alinhar_colunas(
+        [brutos[t] for t in tickers], ["Close", "Dividends", "Stock Splits"]
+    )
+    return avancar(estado, datas, *matrizes)
+
+
+def salvar_estado(caminho, estado):
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as arquivo:
+        np.savez(arquivo, **estado._asdict())
+    os.replace(temporario, caminho)
+
+
+def carregar_estado(caminho):
+    with np.load(caminho) as arquivo:
+        campos = {nome: arquivo[nome] for nome in EstadoDCA._fields}
+    campos["aporte"] = float(campos["aporte"])
+    campos["inicio"] = str(campos["inicio"])
+    return EstadoDCA(**campos)
+
+
+def main(argv=None):
+    from financeiro.cli import ler_universo
+    from financeiro.tickers import ajustar_ticker
+
+    parser = argparse.ArgumentParser(
+        prog="python -m financeiro.incremental",
+        description="Avança os backtests de DCA guardados em um estado até o último pregão.",
+    )
+    parser.add_argument("universo", help="arquivo com os tickers")
+    parser.add_argument("estado", help="arquivo .npz do estado (criado se não existir)")
+    parser.add_argument("--aporte", type=float, default=1000)
+    parser.add_argument("--inicio", default=INICIO, help="início dos backtests novos")
+    parser.add_argument("--fim", help="fim exclusivo (padrão: hoje)")
+    parser.add_argument("--saida", help="CSV com o resumo de cada ticker")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.estado):
+        estado = carregar_estado(args.estado)
+        if estado.aporte != args.aporte:
+            parser.error(f"O estado em {args.estado} usa aporte de {estado.aporte:g}.")
+    else:
+        estado = estado_vazio([], args.aporte, args.inicio)
+
+    tickers = [ajustar_ticker(t) for t in ler_universo(args.universo)]
+    comeco = time.perf_counter()
+    estado = atualizar(incluir_tickers(estado, tickers), args.fim)
+    salvar_estado(args.estado, estado)
+
+    tabela = resumo(estado)
+    if args.saida:
+        tabela.to_csv(args.saida)
+    print(
+        f"{len(tabela)} tickers até {tabela['ultima_data'].max()} em "
+        f"{time.perf_counter() - comeco:.2f} s; patrimônio total "
+        f"{tabela['patrimonio'].sum():,.2f}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
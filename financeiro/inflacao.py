@@ -0,0 +1,137 @@
+"""
+IPCA como número-índice. A série mensal 433 vira, uma vez só, o índice
+acumulado com capitalização (não a soma das variações); a partir dele,
+trazer um valor nominal de uma data para outra é a razão entre dois níveis
+do índice, sem laço. O CPI americano (CPIAUCSL, do FRED) vira o mesmo tipo
+de índice, para deflacionar valores em dólar.
+"""
+
+import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from financeiro.dca import datas_locais
+from financeiro.rede import sessao_padrao
+from financeiro.sgs import IPCA, cliente_padrao
+
+
+URL_CPI = "https://fred.stlouisfed.org/graph/fredgraph.csv?id=CPIAUCSL"
+
+
+class IndiceIPCA:
+    """
+    Índice de preços a partir das variações mensais do IPCA (em %). O nível
+    de uma data é o do início do seu mês, ou seja, com a inflação dos meses
+    anteriores já acumulada; datas depois do último mês divulgado ficam com o
+    último nível e datas antes do primeiro mês, com NaN.
+    """
+
+    def __init__(self, datas, variacoes):
+        meses = np.asarray(datas, dtype="datetime64[M]")
+        if len(meses) and np.any(np.diff(meses) != np.timedelta64(1, "M")):
+            raise ValueError("A série do IPCA precisa ter um valor por mês, sem lacunas.")
+        self.primeiro_mes = meses[0] if len(meses) else None
+        self.variacoes = np.asarray(variacoes, dtype=float)
+        # niveis[k] = índice no início do k-ésimo mês; o último é o fim do último mês
+        self.niveis = np.concatenate(([1.0], np.cumprod(1 + self.variacoes / 100)))
+
+    def nivel(self, datas):
+        """Nível do índice em cada data (escalar ou array de datas)."""
+        datas = _como_datas(datas)
+        posicao = (datas.astype("datetime64[M]") - self.primeiro_mes).astype(int)
+        nivel = self.niveis[np.clip(posicao, 0, len(self.niveis) - 1)]
+        nivel = np.where(posicao >= 0, nivel, np.nan)
+        return nivel if np.ndim(nivel) else float(nivel)
+
+    def fator(self, de, para):
+        """Quanto um real de `de` vale em reais de `para` (a inflação acumulada entre as duas, + 1)."""
+        return self.nivel(para) / self.nivel(de)
+
+    def deflacionar(self, valores, datas, para=None):
+        """
+        Valores nominais nas `datas`, em reais de `para` (padrão: o último mês
+        com IPCA divulgado).
+        """
+        alvo = self.niveis[-1] if para is None else self.nivel(para)
+        return np.asarray(valores, dtype=float) * (alvo / self.nivel(datas))
+
+    def acumulado_anual(self):
+        """(anos, inflação de cada ano em %), compondo os meses de cada ano."""
+        meses = self.primeiro_mes + np.arange(len(self.variacoes))
+        anos = meses.astype("datetime64[Y]")
+        inicio = np.flatnonzero(np.append(True, anos[1:] != anos[:-1]))
+        fatores = np.multiply.reduceat(1 + self.variacoes / 100, inicio)
+        return anos[inicio].astype(int) + 1970, (fatores - 1) * 100
+
+
+def _como_datas(datas):
+    """datetime64[ns] no horário local, de uma data só, lista, array ou índice com fuso."""
+    if isinstance(datas, np.ndarray):
+        return datas.astype("datetime64[ns]")
+    if np.ndim(datas) == 0:
+        data = pd.Timestamp(datas)
+        return np.datetime64(data.tz_localize(None) if data.tz else data, "ns")
+    return datas_locais(pd.DatetimeIndex(datas))
+
+
+def _hoje():
+    return datetime.date.today()
+
+
+@lru_cache(maxsize=2)
+def _indice(hoje):
+    datas, valores = cliente_padrao().serie(IPCA)
+    if not len(datas):
+        raise ValueError("Não foi possível obter o IPCA.")
+    return IndiceIPCA(datas, valores)
+
+
+def indice_padrao():
+    """IndiceIPCA da série 433 inteira, montado uma vez por processo (e por dia)."""
+    return _indice(_hoje())
+
+
+def _variacoes_cpi(texto):
+    """(meses, variações em %) do CSV do FRED, com o nível do índice de cada mês."""
+    meses, niveis = [], []
+    for linha in texto.splitlines()[1:]:
+        data, _, valor = linha.partition(",")
+        if valor.strip() not in ("", "."):
+            meses.append(data[:7])
+            niveis.append(float(valor))
+    meses = np.array(meses, dtype="datetime64[M]")
+    niveis = np.array(niveis)
+    return meses[1:], (niveis[1:] / niveis[:-1] - 1) * 100
+
+
+@lru_cache(maxsize=2)
+def _indice_cpi(hoje):
+    resposta = sessao_padrao().get(URL_CPI)
+    resposta.raise_for_status()
+    meses, variacoes = _variacoes_cpi(resposta.text)
+    if not len(meses):
+        raise ValueError("Não foi possível obter o CPI.")
+    return IndiceIPCA(meses, variacoes)
+
+
+def indice_cpi():
+    """Índice do CPI americano (mesma interface do IndiceIPCA), uma vez por processo e dia."""
+    return _indice_cpi(_hoje())
+
+
+def deflate(equity_curve, dates=None, para=None, indice=None):
+    """
+    Curva nominal em reais de `para` (padrão: último mês com IPCA). Aceita
+    array com `dates`, ou Series/DataFrame com índice de datas (como a curva
+    de get_stock_data(analise="curvas")), e devolve o mesmo tipo.
+    """
+    indice = indice or indice_padrao()
+    if isinstance(equity_curve, (pd.Series, pd.DataFrame)):
+        datas = equity_curve.index if dates is None else dates
+        fator = indice.deflacionar(1.0, datas, para)
+        if isinstance(equity_curve, pd.DataFrame):
+            return equity_curve.mul(fator, axis=0)
+        return equity_curve * fator
+    return indice.deflacionar(equity_curve, dates, para)
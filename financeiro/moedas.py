@@ -0,0 +1,208 @@
+"""
+Moeda de negociação de cada ticker e conversão de preços entre moedas:
+
+    datas, precos = alinhar_fechamentos(historicos)
+    precos = converter_precos(datas, precos, moedas(tickers), para="BRL", real=True)
+
+A moeda vem do provedor (fast_info do Yahoo, moedas.json nos arquivos locais)
+uma vez por ticker e fica guardada em moedas.json no diretório do cache, então
+só o primeiro backtest de um ticker pergunta. Quando o provedor não responde,
+vale o palpite pelo sufixo (tickers.moeda_pelo_ticker), que não é guardado;
+sem palpite, a moeda fica None e a conversão dá erro só nesse ticker.
+A conversão multiplica a matriz pregões x tickers inteira por uma matriz de
+fatores montada com uma série de câmbio por moeda distinta
+(cambio.cotacoes_brl, um download por moeda) e, com
+real=True, pelo índice de preços da moeda de destino (IPCA em BRL, CPI em
+USD), deixando tudo em dinheiro do último mês com índice divulgado.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+from financeiro.cache import DIRETORIO_PADRAO
+from financeiro.cambio import cotacoes_brl
+from financeiro.dca import datas_locais
+from financeiro.inflacao import indice_cpi, indice_padrao
+from financeiro.paralelo import MAX_EM_VOO, executar_em_paralelo
+from financeiro.provedores import provedor_padrao
+from financeiro.tickers import moeda_pelo_ticker
+
+
+# O Yahoo cota algumas bolsas na subunidade (pence em Londres, cents em Joanesburgo)
+SUBUNIDADES = {
+    "GBp": ("GBP", 0.01),
+    "GBX": ("GBP", 0.01),
+    "ZAc": ("ZAR", 0.01),
+    "ILA": ("ILS", 0.01),
+}
+SIMBOLOS = {"BRL": "R$", "USD": "US$", "EUR": "€", "GBP": "£"}
+INDICES = {"BRL": indice_padrao, "USD": indice_cpi}
+COLUNAS_DE_PRECO = ("Open", "High", "Low", "Close", "Adj Close", "Dividends")
+
+_conhecidas = None
+_trava = threading.Lock()
+
+
+def _caminho():
+    return os.path.join(DIRETORIO_PADRAO, "moedas.json")
+
+
+def _ler_arquivo():
+    if not os.path.exists(_caminho()):
+        return {}
+    with open(_caminho(), encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def _carregar():
+    global _conhecidas
+    with _trava:
+        if _conhecidas is None:
+            _conhecidas = _ler_arquivo()
+        return dict(_conhecidas)
+
+
+def _gravar(novas):
+    global _conhecidas
+    with _trava:
+        # Relê antes de gravar: outros processos podem ter acrescentado tickers
+        _conhecidas = {**_ler_arquivo(), **(_conhecidas or {}), **novas}
+        os.makedirs(DIRETORIO_PADRAO, exist_ok=True)
+        temporario = f"{_caminho()}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(_conhecidas, arquivo, indent=1, sort_keys=True)
+        os.replace(temporario, _caminho())
+
+
+def moedas(tickers, max_em_voo=MAX_EM_VOO):
+    """
+    Moeda de negociação de cada ticker, na ordem de `tickers`. Só os que não
+    estão em moedas.json vão ao provedor, em paralelo. Provedores locais (sem
+    rede) respondem direto, sem passar pelo arquivo. Só o que o provedor
+    informou é guardado: um palpite pelo sufixo (provedor sem resposta, erro
+    de rede) é refeito na próxima vez. None quando o provedor não informa e o
+    sufixo não diz; se o provedor falhou nesse caso, a exceção sobe.
+    """
+    provedor = provedor_padrao()
+    conhecidas = _carregar() if provedor.remoto else {}
+    faltam = [t for t in dict.fromkeys(tickers) if t not in conhecidas]
+
+    def perguntar(ticker):
+        # Uma falha do provedor só é contornada quando o sufixo dá o palpite
+        try:
+            return provedor.moeda(ticker)
+        except Exception:
+            if moeda_pelo_ticker(ticker) is None:
+                raise
+            return None
+
+    novas = {}
+    for i, codigo in executar_em_paralelo(perguntar, faltam, max_em_voo):
+        if codigo:
+            novas[faltam[i]] = codigo
+    if novas and provedor.remoto:
+        _gravar(novas)
+    conhecidas.update(novas)
+    return [conhecidas.get(t) or moeda_pelo_ticker(t) for t in tickers]
+
+
+def moeda(ticker):
+    return moedas([ticker])[0]
+
+
+def normalizar(codigo):
+    """(código ISO, escala) de uma moeda do Yahoo: "GBp" é ("GBP", 0.01)."""
+    return SUBUNIDADES.get(codigo, (codigo, 1.0))
+
+
+def simbolo(codigo):
+    """Símbolo para exibir valores na moeda ("R$", "US$"), ou o próprio código."""
+    return SIMBOLOS.get(codigo, codigo)
+
+
+def indice_de_precos(codigo):
+    if codigo not in INDICES:
+        raise ValueError(f"Sem índice de preços para {codigo}; use uma de {sorted(INDICES)}.")
+    return INDICES[codigo]()
+
+
+def converter_precos(datas, precos, de, para=None, real=False, erros=None):
+    """
+    Matriz pregões x tickers de preços, cada coluna na moeda da lista `de`,
+    convertida para `para` (padrão: cada coluna fica na sua moeda) pelo
+    câmbio de cada dia; antes da primeira cotação da moeda, NaN. Com
+    real=True os preços também são deflacionados pelo índice da moeda de
+    destino, para o dinheiro do último mês divulgado: um aporte mensal fixo
+    sobre esses preços é um aporte constante em termos reais, e o patrimônio
+    sai em dinheiro de hoje.
+
+    Com um dicionário `erros`, uma falha ao obter o câmbio ou o índice de uma
+    moeda não interrompe a conversão: as colunas afetadas ficam com NaN e
+    erros[coluna] recebe o motivo. O mesmo vale para colunas com moeda None
+    (desconhecida) quando há conversão; sem `erros`, ValueError.
+    """
+    datas = np.asarray(datas, dtype="datetime64[D]")
+    precos = np.asarray(precos, dtype=float)
+    origens, escalas = zip(*map(normalizar, de)) if len(de) else ((), ())
+    destinos = origens if para is None else (para,) * len(origens)
+    fator = np.tile(np.array(escalas, dtype=float), (len(datas), 1))
+
+    em_brl = {}
+
+    def cotacao(codigo):
+        if codigo not in em_brl:
+            em_brl[codigo] = cotacoes_brl(codigo, datas)
+        return em_brl[codigo]
+
+    def falhar(colunas, motivo):
+        fator[:, colunas] = np.nan
+        for j in colunas:
+            erros.setdefault(j, motivo)
+
+    def aplicar(colunas, descricao, calcular):
+        try:
+            fator[:, colunas] *= calcular()[:, None]
+        except Exception as e:
+            if erros is None:
+                raise
+            falhar(colunas, f"{descricao}: {e}")
+
+    desconhecidas = [j for j, origem in enumerate(origens) if origem is None]
+    if desconhecidas and (para is not None or real):
+        motivo = "moeda de negociação desconhecida; o provedor não informou e o sufixo não diz"
+        if erros is None:
+            raise ValueError(motivo)
+        falhar(desconhecidas, motivo)
+
+    # Um vetor de câmbio por par de moedas distinto, aplicado a todos os tickers do par
+    pares = list(zip(origens, destinos))
+    for origem, destino in dict.fromkeys(pares):
+        if origem is not None and origem != destino:
+            colunas = [j for j, par in enumerate(pares) if par == (origem, destino)]
+            aplicar(
+                colunas,
+                f"sem câmbio {origem}/{destino}",
+                lambda: cotacao(origem) / cotacao(destino),
+            )
+    if real:
+        for destino in dict.fromkeys(d for d in destinos if d is not None):
+            colunas = [j for j, d in enumerate(destinos) if d == destino]
+            aplicar(
+                colunas,
+                f"sem índice de preços em {destino}",
+                lambda: indice_de_precos(destino).deflacionar(1.0, datas),
+            )
+    return precos * fator
+
+
+def converter_historico(hist, de, para=None, real=False):
+    """Histórico do yfinance com preços e dividendos convertidos de `de` para `para`."""
+    fator = converter_precos(datas_locais(hist.index), np.ones((len(hist), 1)), [de], para, real)
+    hist = hist.copy()
+    for coluna in COLUNAS_DE_PRECO:
+        if coluna in hist:
+            hist[coluna] = hist[coluna].to_numpy(dtype=float) * fator[:, 0]
+    return hist
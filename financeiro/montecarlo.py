@@ -0,0 +1,244 @@
+"""
+Distribuição do resultado de aportes mensais por bootstrap em blocos:
+
+    python -m financeiro.montecarlo BOVA11 SELIC --anos 20 --caminhos 100000
+
+Cada ativo vira uma série de fatores mensais de crescimento entre dias de
+aporte (do Close ajustado em reais, ou da SELIC diária para o caixa),
+alinhada ao IPCA do mesmo mês. Um caminho é uma colagem de blocos de `bloco` meses
+sorteados do histórico, os mesmos meses para todos os ativos e para o IPCA,
+preservando a correlação entre eles e a autocorrelação dentro do bloco. A
+recorrência dos aportes roda em todos os caminhos de uma vez, em lotes que
+cabem em `memoria_mb` e que podem ser divididos entre processos. Cada grupo
+fixo de CAMINHOS_POR_SEMENTE caminhos tem sua própria semente derivada, então
+o resultado é o mesmo para a mesma semente com qualquer número de processos e
+qualquer `memoria_mb`.
+
+Com um único caminho e bloco do tamanho do histórico, o único sorteio
+possível é o próprio histórico, e o patrimônio é o de get_stock_data.
+"""
+
+import argparse
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from financeiro.cache import historicos
+from financeiro.dca import datas_locais, inicio_de_mes
+from financeiro.moedas import converter_precos, moedas
+from financeiro.sgs import IPCA, SELIC_DIARIA, cliente_padrao
+
+
+SELIC = "SELIC"
+PERCENTIS = (5, 25, 50, 75, 95)
+MEMORIA_MB = 256
+# Caminhos sorteados com a mesma semente derivada; os lotes juntam grupos inteiros
+CAMINHOS_POR_SEMENTE = 256
+
+SeriesMensais = namedtuple("SeriesMensais", "meses ativos fatores inflacao")
+DistribuicaoDCA = namedtuple("DistribuicaoDCA", "patrimonio real total_aportes")
+
+
+def fatores_dca(datas, precos):
+    """
+    (meses, fatores) do DCA de get_stock_data: o fator do mês m é o
+    crescimento do preço entre o aporte de m e o seguinte; o do último mês
+    vai até o último pregão.
+    """
+    datas = np.asarray(datas, dtype="datetime64[ns]")
+    precos = np.asarray(precos, dtype=float)
+    compra = np.flatnonzero(inicio_de_mes(datas) & (precos > 0))
+    if not len(compra):
+        return np.array([], dtype="datetime64[M]"), np.array([])
+    fim = np.append(precos[compra[1:]], precos[-1])
+    return datas[compra].astype("datetime64[M]"), fim / precos[compra]
+
+
+def _fatores_selic(cliente, inicio, fim):
+    dias, taxas = cliente.serie(SELIC_DIARIA, inicio, fim)
+    meses = dias.astype("datetime64[M]")
+    comeco = np.flatnonzero(np.append(True, meses[1:] != meses[:-1]))
+    return meses[comeco], np.multiply.reduceat(1 + taxas / 100, comeco)
+
+
+def series_mensais(ativos, inicio, fim, cliente=None):
+    """
+    SeriesMensais com os fatores mensais (meses x ativos) de cada ticker ou
+    da SELIC e o fator do IPCA de cada mês, só nos meses em que todos existem.
+    Tickers de outras bolsas entram em reais, pelo câmbio de cada pregão.
+    """
+    cliente = cliente or cliente_padrao()
+    ativos = list(ativos)
+    tickers = [a for a in ativos if a != SELIC]
+    brutos = historicos(tickers, inicio, fim, auto_adjust=True) if tickers else {}
+
+    series = {}
+    for ticker, moeda in zip(tickers, moedas(tickers)):
+        hist = brutos[ticker].dropna(subset=["Close"]) if "Close" in brutos[ticker] else None
+        if hist is None or hist.empty:
+            raise ValueError(f"Sem preços de {ticker} entre {inicio} e {fim}.")
+        datas = datas_locais(hist.index)
+        precos = hist["Close"].to_numpy(dtype=float)[:, None]
+        precos = converter_precos(datas, precos, [moeda], para="BRL")[:, 0]
+        com_cambio = ~np.isnan(precos)
+        if not com_cambio.any():
+            raise ValueError(f"Sem câmbio {moeda}/BRL para {ticker} entre {inicio} e {fim}.")
+        series[ticker] = fatores_dca(datas[com_cambio], precos[com_cambio])
+    if SELIC in ativos:
+        series[SELIC] = _fatores_selic(cliente, inicio, np.datetime64(fim, "D") - 1)
+    meses_ipca, ipca = cliente.serie(IPCA, inicio, np.datetime64(fim, "D") - 1)
+    inflacao = (meses_ipca.astype("datetime64[M]"), 1 + ipca / 100)
+
+    meses = inflacao[0]
+    for m, _ in series.values():
+        meses = np.intersect1d(meses, m)
+    if not len(meses):
+        raise ValueError("Os ativos e o IPCA não têm nenhum mês em comum.")
+
+    def no_calendario(serie):
+        m, valores = serie
+        return valores[np.searchsorted(m, meses)]
+
+    fatores = np.column_stack([no_calendario(series[a]) for a in ativos])
+    return SeriesMensais(meses, ativos, fatores, no_calendario(inflacao))
+
+
+def _blocos(rng, n_meses, caminhos, horizonte, bloco):
+    """Índices (caminhos x horizonte) de meses do histórico, em blocos contíguos."""
+    n_blocos = -(-horizonte // bloco)
+    inicios = rng.integers(0, n_meses - bloco + 1, size=(caminhos, n_blocos))
+    indices = inicios[:, :, None] + np.arange(bloco)
+    return indices.reshape(caminhos, -1)[:, :horizonte]
+
+
+def _simular_lote(fatores, inflacao, aporte, horizonte, bloco, corrigir_aporte, grupos):
+    """Caminhos de uma lista de grupos (semente, número de caminhos)."""
+    indices = np.concatenate(
+        [
+            _blocos(np.random.default_rng(semente), len(fatores), n, horizonte, bloco)
+            for semente, n in grupos
+        ]
+    )
+
+    # Inflação acumulada antes de cada mês do caminho e no fim dele
+    ipca = inflacao[indices]
+    acumulada = np.cumprod(ipca, axis=1)
+    aportes = aporte * (acumulada / ipca if corrigir_aporte else np.ones_like(ipca))
+
+    # Só o patrimônio final de dca.acumular, G[-1] * soma(aportes / G[t-1]):
+    # nada do tamanho caminhos x horizonte x ativos sobrevive ao lote
+    sorteados = fatores[indices]
+    crescimento = np.cumprod(sorteados, axis=1)
+    patrimonio = crescimento[:, -1] * (aportes[:, :, None] * sorteados / crescimento).sum(axis=1)
+    real = patrimonio / acumulada[:, -1:]
+    return patrimonio, real, aportes.sum(axis=1)
+
+
+def simular_dca(
+    fatores,
+    aporte,
+    caminhos=100_000,
+    horizonte=None,
+    bloco=12,
+    inflacao=None,
+    corrigir_aporte=False,
+    semente=None,
+    processos=1,
+    memoria_mb=MEMORIA_MB,
+):
+    """
+    DistribuicaoDCA de `caminhos` caminhos de `horizonte` meses (padrão: o
+    tamanho do histórico), com patrimônio nominal e real (em dinheiro do
+    início, deflacionado pela `inflacao` do caminho) por caminho e ativo, e o
+    total aportado por caminho. `fatores` é meses x ativos (ou um vetor);
+    `inflacao`, os fatores mensais do IPCA nos mesmos meses (sem ela, real =
+    nominal). Com corrigir_aporte=True o aporte acompanha a inflação do
+    caminho, para um aporte constante em termos reais.
+    """
+    fatores = np.asarray(fatores, dtype=float)
+    fatores = fatores[:, None] if fatores.ndim == 1 else fatores
+    n_meses, n_ativos = fatores.shape
+    horizonte = horizonte or n_meses
+    inflacao = np.ones(n_meses) if inflacao is None else np.asarray(inflacao, dtype=float)
+    if not 1 <= bloco <= n_meses:
+        raise ValueError(f"bloco precisa estar entre 1 e {n_meses} meses.")
+
+    # Uma semente derivada por grupo de caminhos e lotes de grupos inteiros
+    # pelo limite de memória (índices, fatores sorteados e os intermediários
+    # do patrimônio final)
+    grupos = [
+        min(CAMINHOS_POR_SEMENTE, caminhos - i) for i in range(0, caminhos, CAMINHOS_POR_SEMENTE)
+    ]
+    grupos = list(zip(np.random.SeedSequence(semente).spawn(len(grupos)), grupos))
+    por_grupo = CAMINHOS_POR_SEMENTE * horizonte * 8 * (4 + 5 * n_ativos)
+    tamanho = max(1, memoria_mb * 2**20 // por_grupo)
+    lotes = [grupos[i : i + tamanho] for i in range(0, len(grupos), tamanho)]
+    argumentos = (fatores, inflacao, aporte, horizonte, bloco, corrigir_aporte)
+
+    if processos == 1 or len(lotes) == 1:
+        partes = [_simular_lote(*argumentos, lote) for lote in lotes]
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = [executor.submit(_simular_lote, *argumentos, lote) for lote in lotes]
+            partes = [futuro.result() for futuro in futuros]
+    return DistribuicaoDCA(*(np.concatenate(coluna) for coluna in zip(*partes)))
+
+
+def faixas(valores, percentis=PERCENTIS):
+    """Percentis (linhas) de cada ativo (colunas) de uma matriz caminhos x ativos."""
+    return np.percentile(valores, percentis, axis=0)
+
+
+def main(argv=None):
+    from financeiro.tickers import ajustar_ticker
+
+    parser = argparse.ArgumentParser(
+        prog="python -m financeiro.montecarlo",
+        description="Faixas de patrimônio real de aportes mensais por bootstrap em blocos.",
+    )
+    parser.add_argument("ativos", nargs="+", help=f"tickers ou {SELIC}")
+    parser.add_argument("--aporte", type=float, default=1000)
+    parser.add_argument("--anos", type=int, default=20, help="horizonte simulado")
+    parser.add_argument("--caminhos", type=int, default=100_000)
+    parser.add_argument("--bloco", type=int, default=12, help="meses por bloco sorteado")
+    parser.add_argument("--inicio", default="2000-01-01", help="início do histórico")
+    parser.add_argument("--fim", default="2025-01-01")
+    parser.add_argument("--corrigir-aporte", action="store_true", help="aporte corrigido pelo IPCA")
+    parser.add_argument("--semente", type=int)
+    parser.add_argument("--processos", type=int, default=os.cpu_count())
+    parser.add_argument("--memoria-mb", type=int, default=MEMORIA_MB, help="por lote")
+    args = parser.parse_args(argv)
+
+    ativos = [a if a == SELIC else ajustar_ticker(a) for a in args.ativos]
+    series = series_mensais(ativos, args.inicio, args.fim)
+    distribuicao = simular_dca(
+        series.fatores,
+        args.aporte,
+        args.caminhos,
+        12 * args.anos,
+        args.bloco,
+        series.inflacao,
+        args.corrigir_aporte,
+        args.semente,
+        args.processos,
+        args.memoria_mb,
+    )
+
+    print(
+        f"{args.caminhos:,} caminhos de {args.anos} anos, blocos de {args.bloco} meses sorteados "
+        f"de {series.meses[0]} a {series.meses[-1]}",
+        file=sys.stderr,
+    )
+    print("Patrimônio real (em dinheiro do início):")
+    print(f"{'percentil':>10} " + " ".join(f"{a:>16}" for a in ativos))
+    for p, linha in zip(PERCENTIS, faixas(distribuicao.real)):
+        print(f"{p:>10} " + " ".join(f"{v:>16,.2f}" for v in linha))
+    print(f"Aportado (nominal, mediana): {np.median(distribuicao.total_aportes):,.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import pandas as pd
+
+from financeiro.cache import historico
+from financeiro.dca import (
+    alinhar_fechamentos,
+    analisar_dca,
+    aportes_mensais_lote,
+    backtest_dca,
+    datas_locais,
+)
+from financeiro.moedas import converter_historico, converter_precos, moeda
+from financeiro.paralelo import MAX_EM_VOO, executar_em_paralelo
+from financeiro.proventos import reinvestir_proventos
+from financeiro.tickers import ajustar_ticker
+
+
+def obter_historico(ticker, start, end):
+    """(erro, hist) com o histórico ajustado usado no DCA e as mensagens de get_stock_data."""
+    try:
+        # Preço ajustado = total return series (splits + dividendos)
+        hist = historico(ticker, start, end, auto_adjust=True)
+    except Exception as e:
+        return f"Erro ao processar {ticker}: {e}", None
+
+    if hist.empty:
+        return f"Erro: Não foi possível obter dados para {ticker}", None
+    return None, hist
+
+
+def get_stock_data(
+    ticker, monthly_investment, start, end, analise=None, livre_de_risco=0.0, para=None, real=False
+):
+    """
+    Backtest de aportes mensais: (erro, patrimonio, total_aportes, first_valid_date).
+    Com analise="resumo" acrescenta um AnaliseDCA com drawdown máximo, CAGR,
+    TIR, volatilidade e Sharpe; com analise="curvas", também a curva diária
+    de patrimônio e aportes. Tudo sai do mesmo passo sobre os preços.
+
+    Os valores ficam na moeda do ticker, ou na moeda `para` ("BRL", "USD")
+    pelo câmbio de cada pregão; com real=True, em dinheiro de hoje (ver
+    moedas.converter_precos).
+    """
+    falha = (0, 0, None) if analise is None else (0, 0, None, None)
+    erro, hist = obter_historico(ticker, start, end)
+    if erro:
+        return (erro,) + falha
+
+    try:
+        if para or real:
+            hist = converter_historico(hist, moeda(ticker), para, real)
+        if analise is None:
+            return backtest_dca(hist, monthly_investment)
+        return analisar_dca(hist, monthly_investment, analise == "curvas", livre_de_risco)
+    except Exception as e:
+        return (f"Erro ao processar {ticker}: {e}",) + falha
+
+
+def resumos_dca(
+    tickers,
+    monthly_investment,
+    start,
+    end,
+    livre_de_risco=0.0,
+    max_em_voo=MAX_EM_VOO,
+    para=None,
+    real=False,
+):
+    """
+    get_stock_data(analise="resumo") de cada ticker, gerado à medida que
+    termina como (indice, resultado). Nenhuma curva diária fica em memória,
+    então serve para universos grandes.
+    """
+    return executar_em_paralelo(
+        lambda t: get_stock_data(
+            t, monthly_investment, start, end, "resumo", livre_de_risco, para, real
+        ),
+        tickers,
+        max_em_voo,
+    )
+
+
+def get_stock_data_lote(historicos, monthly_investment, moedas=None, para=None, real=False):
+    """
+    get_stock_data para vários tickers de uma vez, a partir dos (erro, hist)
+    de obter_historico: os preços viram uma matriz pregões x tickers e o DCA
+    roda em um só passo. Devolve (resultados, tirs, patrimonio_total,
+    aportes_total, tir_carteira), com os resultados no formato de
+    get_stock_data e na ordem de `historicos` e as TIRs anuais (NaN nos
+    tickers com erro).
+
+    Com `moedas` (a de cada ticker, na ordem de `historicos`) e `para`, a
+    matriz inteira passa para essa moeda antes do DCA, então os totais da
+    carteira somam tickers de bolsas diferentes na mesma moeda; real=True
+    deflaciona também (ver moedas.converter_precos). Sem câmbio para uma
+    moeda, só os tickers dela saem com erro. Antes da primeira cotação da
+    moeda não há aporte: ver inicio_sem_cambio.
+    """
+    validos = [j for j, (erro, _) in enumerate(historicos) if not erro]
+    datas, precos = alinhar_fechamentos([historicos[j][1] for j in validos])
+    sem_cambio = {}
+    if para or real:
+        if moedas is None:
+            raise ValueError("Informe a moeda de cada ticker para converter os preços.")
+        precos = converter_precos(
+            datas, precos, [moedas[j] for j in validos], para, real, erros=sem_cambio
+        )
+    lote = aportes_mensais_lote(datas, precos, monthly_investment)
+
+    resultados = [(erro, 0, 0, None) for erro, _ in historicos]
+    tirs = [float("nan")] * len(historicos)
+    for k, j in enumerate(validos):
+        if k in sem_cambio:
+            resultados[j] = (f"Erro: {sem_cambio[k]}", 0, 0, None)
+            continue
+        if pd.isna(lote.primeiras_datas[k]):
+            resultados[j] = ("Erro: histórico sem preços válidos.", 0, 0, None)
+            continue
+        primeira = pd.Timestamp(lote.primeiras_datas[k]).date()
+        resultados[j] = (None, lote.patrimonio[k], lote.total_aportes[k], primeira)
+        tirs[j] = float(lote.tir[k])
+    return resultados, tirs, lote.patrimonio_carteira, lote.aportes_carteira, lote.tir_carteira
+
+
+def inicio_sem_cambio(hist, primeira):
+    """
+    Primeiro pregão com preço de `hist` quando ele é anterior a `primeira`
+    (a primeira data do DCA de get_stock_data_lote), ou None: os aportes
+    desse intervalo ficaram de fora por falta de câmbio ou índice de preços.
+    """
+    fechamentos = hist["Close"].to_numpy(dtype=float)
+    com_preco = fechamentos > 0
+    if primeira is None or not com_preco.any():
+        return None
+    inicio = datas_locais(hist.index[com_preco][:1])[0].astype("datetime64[D]").item()
+    return inicio if inicio < primeira else None
+
+
+def calculate_lump_sum(ticker, initial_investment, start, end, para=None, real=False):
+    try:
+        ticker = ajustar_ticker(ticker)
+
+        # Preços sem ajuste de dividendos, com as colunas de proventos alinhadas
+        # aos pregões; os dividendos são reinvestidos abaixo
+        hist = historico(ticker, start, end, auto_adjust=False)
+        if hist.empty:
+            return f"Erro: Não foi possível obter dados para {ticker}", 0, None
+        if para or real:
+            hist = converter_historico(hist, moeda(ticker), para, real)
+
+        hist = hist.dropna(subset=["Close"])
+        if hist.empty:
+            return f"Erro: Nenhum dado encontrado após {start}", 0, None
+
+        first_valid_date = hist.index[0]
+        fechamento = hist["Close"].to_numpy(dtype=float)
+        dividendos = hist["Dividends"].to_numpy(dtype=float) if "Dividends" in hist else 0.0
+
+        # Compra inicial no primeiro fechamento e reinvestimento na data ex
+        cotas = initial_investment / fechamento[0] * reinvestir_proventos(fechamento, dividendos)
+        final_value = cotas[-1] * fechamento[-1]
+
+        return None, final_value, first_valid_date
+
+    except Exception as e:
+        return f"Erro ao processar {ticker}: {e}", 0, None
@@ -0,0 +1,136 @@
+"""Substitutos locais das APIs externas, para rodar sem rede."""
+
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from financeiro.proventos import fatores_proventos
+
+
+class ServidorSGSFalso:
+    """
+    Servidor HTTP local que imita a API do SGS do Banco Central, com as
+    séries passadas como {codigo: (datas, valores)}. Use como context manager
+    e passe `servidor.url` para o ClienteSGS; `servidor.requisicoes` registra
+    (codigo, dataInicial, dataFinal) de cada chamada recebida.
+    """
+
+    def __init__(self, series):
+        self.series = {
+            int(codigo): (np.asarray(datas, dtype="datetime64[D]"), np.asarray(valores, dtype=float))
+            for codigo, (datas, valores) in series.items()
+        }
+        self.requisicoes = []
+        self._http = None
+
+    @property
+    def url(self):
+        host, porta = self._http.server_address[:2]
+        return f"http://{host}:{porta}/dados/serie/bcdata.sgs.{{codigo}}/dados"
+
+    def __enter__(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                servidor._responder(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def _responder(self, handler):
+        pedido = urlparse(handler.path)
+        encontrado = re.search(r"bcdata\.sgs\.(\d+)/dados", pedido.path)
+        params = {k: v[0] for k, v in parse_qs(pedido.query).items()}
+        codigo = int(encontrado.group(1)) if encontrado else None
+        self.requisicoes.append((codigo, params.get("dataInicial"), params.get("dataFinal")))
+
+        if codigo not in self.series:
+            handler.send_error(404)
+            return
+
+        datas, valores = self.series[codigo]
+        filtro = np.ones(len(datas), dtype=bool)
+        if "dataInicial" in params:
+            filtro &= datas >= _ler_data(params["dataInicial"])
+        if "dataFinal" in params:
+            filtro &= datas <= _ler_data(params["dataFinal"])
+
+        registros = [
+            {"data": _escrever_data(d), "valor": repr(float(v))}
+            for d, v in zip(datas[filtro], valores[filtro])
+        ]
+        corpo = json.dumps(registros).encode()
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(corpo)))
+        handler.end_headers()
+        handler.wfile.write(corpo)
+
+
+def _ler_data(texto):
+    dia, mes, ano = texto.split("/")
+    return np.datetime64(f"{ano}-{mes}-{dia}", "D")
+
+
+def _escrever_data(data):
+    ano, mes, dia = str(data).split("-")
+    return f"{dia}/{mes}/{ano}"
+
+
+def historico_sintetico(semente, inicio="2000-01-01", fim="2025-01-01", auto_adjust=True):
+    """
+    Histórico diário determinístico no formato do yfinance (índice com fuso,
+    colunas Close, Dividends e Stock Splits), com dividendos trimestrais e um
+    desdobramento. Com auto_adjust=True o Close é ajustado pelos dividendos
+    como o Yahoo faz; com False vem só ajustado por desdobramentos, como o
+    Close bruto do Yahoo.
+    """
+    rng = np.random.default_rng(semente)
+    datas = pd.bdate_range(inicio, fim, inclusive="left", name="Date")
+    n = len(datas)
+
+    # Alguns ativos começam depois do início, como um IPO no meio do período
+    comeco = int(rng.integers(0, n // 4)) if semente % 3 == 0 else 0
+    fechamento = 20 * np.exp(np.cumsum(rng.normal(0.0003, 0.018, n)))
+
+    dividendos = np.zeros(n)
+    trimestral = np.arange(comeco + 40, n, 63)
+    dividendos[trimestral] = fechamento[trimestral] * rng.uniform(0.005, 0.02, len(trimestral))
+    desdobramentos = np.zeros(n)
+    desdobramentos[int(rng.integers(comeco + 1, n))] = 2.0
+
+    if auto_adjust:
+        acumulado = np.cumprod(fatores_proventos(fechamento, dividendos, base="anterior"))
+        fechamento = fechamento * acumulado / acumulado[-1]
+
+    index = (datas + pd.Timedelta(hours=4)).tz_localize("America/New_York")
+    hist = pd.DataFrame(
+        {"Close": fechamento, "Dividends": dividendos, "Stock Splits": desdobramentos}, index=index
+    )
+    return hist.iloc[comeco:]
+
+
+def series_sgs_sinteticas(semente=0, inicio="1996-01-01", fim="2025-01-01"):
+    """SELIC anual (1178), SELIC diária (11) e IPCA mensal (433) determinísticos, em %."""
+    rng = np.random.default_rng(semente)
+    dias = np.arange(inicio, fim, dtype="datetime64[D]")
+    dias = dias[np.is_busday(dias)]
+    anual = np.clip(12 + np.cumsum(rng.normal(0, 0.04, len(dias))), 2, 45)
+    diaria = ((1 + anual / 100) ** (1 / 252) - 1) * 100
+    meses = np.arange(inicio, fim, dtype="datetime64[M]").astype("datetime64[D]")
+    ipca = np.clip(rng.normal(0.45, 0.3, len(meses)), -0.5, 3)
+    return {1178: (dias, anual), 11: (dias, diaria), 433: (meses, ipca)}
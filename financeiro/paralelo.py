@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+MAX_EM_VOO = int(os.environ.get("FINANCEIRO_MAX_EM_VOO", "8"))
+REQUISICOES_POR_SEGUNDO = float(os.environ.get("FINANCEIRO_REQ_POR_SEGUNDO", "4"))
+
+# Hosts com limite próprio, mais baixo que o padrão (a API pública da
+# CoinGecko aceita algo como 5 a 15 chamadas por minuto)
+TAXAS_POR_HOST = {"api.coingecko.com": 0.2}
+
+
+class LimitadorTaxa:
+    """Balde de fichas: no máximo `por_segundo` chamadas por segundo, com rajadas de até `rajada`."""
+
+    def __init__(self, por_segundo, rajada=1):
+        self.por_segundo = por_segundo
+        self.rajada = rajada
+        self._fichas = float(rajada)
+        self._ultimo = time.monotonic()
+        self._trava = threading.Lock()
+
+    def aguardar(self):
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self._fichas = min(
+                    self.rajada, self._fichas + (agora - self._ultimo) * self.por_segundo
+                )
+                self._ultimo = agora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                espera = (1 - self._fichas) / self.por_segundo
+            time.sleep(espera)
+
+
+_limitadores = {}
+_trava_limitadores = threading.Lock()
+
+
+def limitador_do_host(host, por_segundo=None):
+    """
+    Limitador compartilhado por todas as chamadas feitas ao mesmo host. A taxa
+    vale na primeira chamada; sem ela, usa TAXAS_POR_HOST ou o padrão.
+    """
+    with _trava_limitadores:
+        if host not in _limitadores:
+            if por_segundo is None:
+                por_segundo = TAXAS_POR_HOST.get(host, REQUISICOES_POR_SEGUNDO)
+            _limitadores[host] = LimitadorTaxa(por_segundo)
+        return _limitadores[host]
+
+
+def executar_em_paralelo(funcao, itens, max_em_voo=MAX_EM_VOO):
+    """
+    Chama funcao(item) para cada item com no máximo `max_em_voo` chamadas
+    simultâneas. Gera (indice, resultado) na ordem em que terminam; use o
+    índice para agregar na ordem original.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_em_voo)
+    try:
+        futuros = {executor.submit(funcao, item): i for i, item in enumerate(itens)}
+        for futuro in as_completed(futuros):
+            yield futuros[futuro], futuro.result()
+    finally:
+        # Se o consumidor parar no meio (cancelamento), descarta o que não começou
+        executor.shutdown(wait=False, cancel_futures=True)
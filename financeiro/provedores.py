@@ -0,0 +1,282 @@
+"""
+Provedores de dados de mercado. Todo acesso a preços e demonstrativos passa
+por um provedor, escolhido pela variável de ambiente FINANCEIRO_PROVEDOR:
+
+    yfinance            (padrão) API do Yahoo, com o cache em disco na frente
+    arquivos:<dir>      arquivos Parquet/CSV locais, um por ticker
+    gravar:<dir>        consulta o Yahoo e grava as respostas em <dir>
+    reproduzir:<dir>    responde só com o que foi gravado em <dir>
+
+Os arquivos seguem o formato que o yfinance devolve: `{ticker}.ajustado.csv`
+(ou .parquet) para auto_adjust=True, `{ticker}.bruto.csv` para False e
+`{ticker}.financials.csv` para os demonstrativos. Um `{ticker}.csv` sem modo
+serve para os dois. O fuso de cada ticker gravado em CSV fica em fusos.json
+e a moeda de negociação, em moedas.json.
+"""
+
+import json
+import os
+import threading
+
+import pandas as pd
+
+from financeiro.paralelo import MAX_EM_VOO, executar_em_paralelo
+from financeiro.rede import chamar
+
+
+EXTENSOES = (".parquet", ".csv")
+
+
+def recortar(hist, start, end):
+    """Linhas com data local em [start, end), como o history do yfinance."""
+    datas = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+    return hist[(datas >= pd.Timestamp(start)) & (datas < pd.Timestamp(end))]
+
+
+class Provedor:
+    """
+    Interface comum. `remoto` indica se vale a pena pôr o cache em disco na
+    frente (os provedores locais já leem do disco).
+    """
+
+    remoto = False
+
+    def history(self, ticker, start, end, auto_adjust=True):
+        raise NotImplementedError
+
+    def history_many(self, tickers, start, end, auto_adjust=True):
+        """{ticker: history} de vários tickers; os provedores podem atender tudo de uma vez."""
+        return {t: self.history(t, start, end, auto_adjust) for t in dict.fromkeys(tickers)}
+
+    def financials(self, ticker):
+        raise NotImplementedError
+
+    def moeda(self, ticker):
+        """
+        Código da moeda em que o ticker é negociado (ex.: "BRL", "USD"), ou
+        None se o provedor não sabe; quem chama decide o palpite.
+        """
+        return None
+
+
+class ProvedorYFinance(Provedor):
+    remoto = True
+
+    def __init__(self, max_em_voo=MAX_EM_VOO):
+        self.max_em_voo = max_em_voo
+
+    def history(self, ticker, start, end, auto_adjust=True):
+        import yfinance as yf
+
+        return chamar(
+            "finance.yahoo.com",
+            ("history", ticker, start, end, auto_adjust),
+            lambda: yf.Ticker(ticker).history(start=start, end=end, auto_adjust=auto_adjust),
+        )
+
+    def history_many(self, tickers, start, end, auto_adjust=True):
+        # O yf.download em lote devolve o índice sem fuso e colunas diferentes
+        # do history, então cada ticker vai numa chamada, em paralelo e pela
+        # camada de rede (limitador do host, novas tentativas)
+        tickers = list(dict.fromkeys(tickers))
+        resultados = [None] * len(tickers)
+        for i, hist in executar_em_paralelo(
+            lambda t: self.history(t, start, end, auto_adjust), tickers, self.max_em_voo
+        ):
+            resultados[i] = hist
+        return dict(zip(tickers, resultados))
+
+    def financials(self, ticker):
+        import yfinance as yf
+
+        # Chamadas simultâneas para o mesmo ticker (o painel pede os
+        # demonstrativos de mais de um lugar) viram uma requisição só
+        return chamar(
+            "finance.yahoo.com", ("financials", ticker), lambda: yf.Ticker(ticker).financials
+        )
+
+    def moeda(self, ticker):
+        import yfinance as yf
+
+        def consultar():
+            # Sem a moeda no fast_info, None; falhas de rede sobem
+            try:
+                return yf.Ticker(ticker).fast_info["currency"]
+            except KeyError:
+                return None
+
+        return chamar("finance.yahoo.com", ("moeda", ticker), consultar)
+
+
+class ProvedorArquivos(Provedor):
+    """
+    Lê de um diretório com um arquivo por ticker. Ticker sem arquivo devolve
+    um DataFrame vazio, como o yfinance faz com tickers desconhecidos; com
+    estrito=True levanta LookupError.
+    """
+
+    def __init__(self, diretorio, estrito=False):
+        self.diretorio = diretorio
+        self.estrito = estrito
+
+    def caminho(self, ticker, sufixo):
+        return os.path.join(self.diretorio, ticker.replace(os.sep, "_") + sufixo)
+
+    def _fusos(self):
+        return self._json("fusos.json")
+
+    def _moedas(self):
+        return self._json("moedas.json")
+
+    def _json(self, nome):
+        caminho = os.path.join(self.diretorio, nome)
+        if not os.path.exists(caminho):
+            return {}
+        with open(caminho, encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+
+    def _procurar(self, ticker, auto_adjust):
+        modo = "ajustado" if auto_adjust else "bruto"
+        for sufixo in (f".{modo}", ""):
+            for extensao in EXTENSOES:
+                caminho = self.caminho(ticker, sufixo + extensao)
+                if os.path.exists(caminho):
+                    return caminho
+        return None
+
+    def _ler(self, caminho, ticker):
+        if caminho.endswith(".parquet"):
+            return pd.read_parquet(caminho)
+
+        hist = pd.read_csv(caminho, index_col=0, float_precision="round_trip")
+        fuso = self._fusos().get(ticker)
+        if fuso:
+            index = pd.to_datetime(hist.index, utc=True).tz_convert(fuso)
+        else:
+            try:
+                index = pd.to_datetime(hist.index)
+            except ValueError:
+                # Deslocamentos diferentes (horário de verão) sem fuso conhecido
+                index = pd.to_datetime(hist.index, utc=True)
+        hist.index = pd.DatetimeIndex(index, name="Date")
+        return hist
+
+    def history(self, ticker, start, end, auto_adjust=True):
+        caminho = self._procurar(ticker, auto_adjust)
+        if caminho is None:
+            if self.estrito:
+                raise LookupError(f"Sem histórico gravado para {ticker} em {self.diretorio}")
+            return pd.DataFrame()
+        return recortar(self._ler(caminho, ticker), start, end)
+
+    def financials(self, ticker):
+        caminho = self.caminho(ticker, ".financials.csv")
+        if not os.path.exists(caminho):
+            if self.estrito:
+                raise LookupError(f"Sem demonstrativos gravados para {ticker} em {self.diretorio}")
+            return pd.DataFrame()
+        dados = pd.read_csv(caminho, index_col=0, float_precision="round_trip")
+        dados.columns = pd.to_datetime(dados.columns)
+        return dados
+
+    def moeda(self, ticker):
+        return self._moedas().get(ticker)
+
+
+class ProvedorGravador(Provedor):
+    """
+    Repassa as chamadas a outro provedor e grava cada resposta em `diretorio`,
+    no formato do ProvedorArquivos; depois `ProvedorArquivos(diretorio,
+    estrito=True)` reproduz a sessão sem rede. Gravações do mesmo ticker com
+    períodos diferentes são unidas no mesmo arquivo.
+    """
+
+    def __init__(self, provedor, diretorio, formato="csv"):
+        self.provedor = provedor
+        self.arquivos = ProvedorArquivos(diretorio)
+        self.formato = formato
+        self._trava = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def history(self, ticker, start, end, auto_adjust=True):
+        hist = self.provedor.history(ticker, start, end, auto_adjust=auto_adjust)
+        self._gravar(ticker, auto_adjust, hist)
+        return hist
+
+    def history_many(self, tickers, start, end, auto_adjust=True):
+        resultados = self.provedor.history_many(tickers, start, end, auto_adjust=auto_adjust)
+        for ticker, hist in resultados.items():
+            self._gravar(ticker, auto_adjust, hist)
+        return resultados
+
+    def financials(self, ticker):
+        dados = self.provedor.financials(ticker)
+        with self._trava:
+            dados.to_csv(self.arquivos.caminho(ticker, ".financials.csv"))
+        return dados
+
+    def moeda(self, ticker):
+        moeda = self.provedor.moeda(ticker)
+        with self._trava:
+            moedas = self.arquivos._moedas()
+            if moeda and moedas.get(ticker) != moeda:
+                moedas[ticker] = moeda
+                self._gravar_json("moedas.json", moedas)
+        return moeda
+
+    def _gravar(self, ticker, auto_adjust, hist):
+        modo = "ajustado" if auto_adjust else "bruto"
+        caminho = self.arquivos.caminho(ticker, f".{modo}.{self.formato}")
+        with self._trava:
+            if os.path.exists(caminho):
+                antigo = self.arquivos._ler(caminho, ticker)
+                if not antigo.empty and not hist.empty:
+                    hist = pd.concat([antigo, hist])
+                    hist = hist[~hist.index.duplicated(keep="last")].sort_index()
+                elif hist.empty:
+                    hist = antigo
+
+            if self.formato == "parquet":
+                hist.to_parquet(caminho)
+            else:
+                hist.to_csv(caminho)
+                self._gravar_fuso(ticker, hist)
+
+    def _gravar_fuso(self, ticker, hist):
+        fuso = getattr(hist.index, "tz", None)
+        fusos = self.arquivos._fusos()
+        if fuso is None or fusos.get(ticker) == str(fuso):
+            return
+        fusos[ticker] = str(fuso)
+        self._gravar_json("fusos.json", fusos)
+
+    def _gravar_json(self, nome, dados):
+        caminho = os.path.join(self.arquivos.diretorio, nome)
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(dados, arquivo, indent=1, sort_keys=True)
+
+
+def criar_provedor(especificacao):
+    """Monta o provedor descrito como em FINANCEIRO_PROVEDOR (veja o início do módulo)."""
+    nome, _, diretorio = especificacao.partition(":")
+    if nome == "yfinance":
+        return ProvedorYFinance()
+    if not diretorio:
+        raise ValueError(f"O provedor {nome!r} precisa de um diretório: {nome}:<dir>")
+    if nome == "arquivos":
+        return ProvedorArquivos(diretorio)
+    if nome == "gravar":
+        return ProvedorGravador(ProvedorYFinance(), diretorio)
+    if nome == "reproduzir":
+        return ProvedorArquivos(diretorio, estrito=True)
+    raise ValueError(f"Provedor desconhecido: {especificacao!r}")
+
+
+_provedor = None
+
+
+def provedor_padrao():
+    global _provedor
+    if _provedor is None:
+        _provedor = criar_provedor(os.environ.get("FINANCEIRO_PROVEDOR", "yfinance"))
+    return _provedor
@@ -0,0 +1,44 @@
+import numpy as np
+
+
+def fatores_proventos(fechamento, dividendos, desdobramentos=None, base="ex"):
+    """
+    Fator pelo qual a quantidade de cotas é multiplicada em cada pregão
+    (1 onde não há evento).
+
+    base="ex": o dividendo é reinvestido no fechamento da data ex, 1 + D/C[t].
+    base="anterior": convenção do Yahoo no auto_adjust=True, 1 / (1 - D/C[t-1]);
+    serve para reproduzir exatamente a série ajustada.
+
+    Passe `desdobramentos` só quando os preços não estiverem ajustados por
+    desdobramentos. O Close do yfinance já vem ajustado, mesmo com
+    auto_adjust=False, e aplicar o fator de novo contaria o desdobramento duas vezes.
+    """
+    fechamento = np.asarray(fechamento, dtype=float)
+    dividendos = np.nan_to_num(np.asarray(dividendos, dtype=float))
+
+    if base == "ex":
+        fator = 1 + dividendos / fechamento
+    elif base == "anterior":
+        anterior = np.concatenate(([np.nan], fechamento[:-1]))
+        fator = 1 / (1 - dividendos / anterior)
+    else:
+        raise ValueError(f"base desconhecida: {base}")
+    fator = np.where(dividendos > 0, fator, 1.0)
+
+    if desdobramentos is not None:
+        desdobramentos = np.nan_to_num(np.asarray(desdobramentos, dtype=float))
+        fator = fator * np.where(desdobramentos > 0, desdobramentos, 1.0)
+
+    return np.where(np.isfinite(fator), fator, 1.0)
+
+
+def reinvestir_proventos(fechamento, dividendos, desdobramentos=None, base="ex"):
+    """
+    Cotas acumuladas em cada pregão para uma cota comprada no fechamento do
+    primeiro pregão. Eventos desse primeiro pregão não contam: quem compra na
+    data ex não recebe o provento.
+    """
+    fatores = fatores_proventos(fechamento, dividendos, desdobramentos, base)
+    fatores[:1] = 1.0
+    return np.cumprod(fatores)
@@ -0,0 +1,233 @@
+"""
+Camada única para chamadas de rede. Toda chamada remota passa por chamar():
+
+- limitador de taxa por host (o balde de fichas de financeiro.paralelo);
+- novas tentativas com espera exponencial e aleatória em falhas transitórias
+  (429, 5xx, queda de conexão, timeout), respeitando o Retry-After;
+- voo único: chamadas idênticas simultâneas esperam a primeira e recebem o
+  mesmo resultado, em vez de repetir a requisição;
+- métricas por host (chamadas, coalescidas, tentativas, erros, latência).
+
+SessaoHTTP aplica isso sobre um requests.Session com pool de conexões
+keep-alive e timeout padrão; sessao_padrao() é a sessão compartilhada pelo
+processo. O yfinance usa a própria sessão HTTP, então o ProvedorYFinance
+passa pelo chamar() em volta das chamadas dele.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from financeiro.paralelo import MAX_EM_VOO, limitador_do_host
+
+
+TENTATIVAS = 4
+ESPERA_BASE = 0.5
+ESPERA_MAXIMA = 30.0
+TIMEOUT = 30
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+# Exceções transitórias pelo nome da classe (ou de uma base), para cobrir
+# requests, curl_cffi (usado pelo yfinance) e o yfinance sem importá-los aqui
+ERROS_TRANSITORIOS = {
+    "ConnectionError",
+    "Timeout",
+    "TimeoutError",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "YFRateLimitError",
+}
+
+
+class MetricasRede:
+    """Contadores por host, seguros entre threads."""
+
+    CAMPOS = ("chamadas", "coalescidas", "tentativas", "retentativas", "erros")
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = dict.fromkeys(self.CAMPOS, 0)
+            self._hosts[host].update(latencia_total=0.0, latencia_maxima=0.0)
+        return self._hosts[host]
+
+    def somar(self, host, **valores):
+        with self._trava:
+            contadores = self._host(host)
+            for nome, valor in valores.items():
+                contadores[nome] += valor
+
+    def latencia(self, host, segundos):
+        with self._trava:
+            contadores = self._host(host)
+            contadores["latencia_total"] += segundos
+            contadores["latencia_maxima"] = max(contadores["latencia_maxima"], segundos)
+
+    def resumo(self):
+        """{host: contadores}, com a latência média por tentativa em segundos."""
+        with self._trava:
+            resumo = {host: dict(contadores) for host, contadores in self._hosts.items()}
+        for contadores in resumo.values():
+            tentativas = max(contadores["tentativas"], 1)
+            contadores["latencia_media"] = contadores.pop("latencia_total") / tentativas
+        return resumo
+
+    def zerar(self):
+        with self._trava:
+            self._hosts.clear()
+
+
+class VooUnico:
+    """Executa uma vez cada chave em andamento; quem chega durante a execução espera por ela."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._em_voo = {}
+
+    def executar(self, chave, funcao):
+        """Devolve (resultado, coalescida)."""
+        with self._trava:
+            futuro = self._em_voo.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = self._em_voo[chave] = Future()
+
+        if not lider:
+            return futuro.result(), True
+
+        try:
+            futuro.set_result(funcao())
+        except BaseException as e:
+            futuro.set_exception(e)
+        finally:
+            with self._trava:
+                del self._em_voo[chave]
+        return futuro.result(), False
+
+
+metricas = MetricasRede()
+_voo_unico = VooUnico()
+
+
+def espera_exponencial(tentativa, base=ESPERA_BASE, maxima=ESPERA_MAXIMA):
+    """Espera antes da tentativa seguinte: base * 2^tentativa, limitada, com metade aleatória."""
+    teto = min(maxima, base * 2**tentativa)
+    return teto * random.uniform(0.5, 1.0)
+
+
+def _transitorio_http(resultado, erro):
+    if erro is not None:
+        return isinstance(erro, (requests.ConnectionError, requests.Timeout)), None
+    if resultado.status_code not in STATUS_TRANSITORIOS:
+        return False, None
+    try:
+        return True, float(resultado.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return True, None
+
+
+def erro_transitorio(resultado, erro):
+    """
+    Para chamadas que não devolvem a resposta HTTP (yfinance): repete só
+    queda de conexão, timeout, limite de requisições e 429/5xx; ticker
+    inexistente ou campo ausente falham na hora.
+    """
+    if erro is None:
+        return False, None
+    if ERROS_TRANSITORIOS & {classe.__name__ for classe in type(erro).__mro__}:
+        return True, None
+    status = getattr(getattr(erro, "response", None), "status_code", None)
+    return status in STATUS_TRANSITORIOS, None
+
+
+def chamar(host, chave, funcao, transitorio=erro_transitorio, tentativas=TENTATIVAS):
+    """
+    funcao() sob o limitador do host, com novas tentativas e voo único pela
+    `chave` (None desliga a coalescência). `transitorio(resultado, erro)`
+    diz se vale tentar de novo e, opcionalmente, quanto esperar.
+    """
+    if chave is None:
+        resultado, coalescida = _tentar(host, funcao, transitorio, tentativas), False
+    else:
+        resultado, coalescida = _voo_unico.executar(
+            (host, chave), lambda: _tentar(host, funcao, transitorio, tentativas)
+        )
+    metricas.somar(host, chamadas=1, coalescidas=int(coalescida))
+    return resultado
+
+
+def _tentar(host, funcao, transitorio, tentativas):
+    limitador = limitador_do_host(host)
+    for tentativa in range(tentativas):
+        limitador.aguardar()
+        inicio = time.monotonic()
+        resultado, erro = None, None
+        try:
+            resultado = funcao()
+        except Exception as e:
+            erro = e
+        metricas.latencia(host, time.monotonic() - inicio)
+        metricas.somar(host, tentativas=1, retentativas=int(tentativa > 0))
+
+        repetir, retry_after = transitorio(resultado, erro)
+        if not repetir or tentativa + 1 == tentativas:
+            break
+        time.sleep(retry_after if retry_after is not None else espera_exponencial(tentativa))
+
+    if erro is not None or repetir:
+        metricas.somar(host, erros=1)
+    if erro is not None:
+        raise erro
+    return resultado
+
+
+class SessaoHTTP:
+    """
+    requests.Session com pool keep-alive, timeout padrão e tudo o que chamar()
+    oferece. GETs idênticos em andamento são coalescidos; a resposta final
+    (mesmo 4xx/5xx depois das tentativas) é devolvida para quem chamou tratar.
+    """
+
+    def __init__(self, tentativas=TENTATIVAS, timeout=TIMEOUT, conexoes_por_host=MAX_EM_VOO):
+        self.tentativas = tentativas
+        self.timeout = timeout
+        self._sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=16, pool_maxsize=conexoes_por_host)
+        self._sessao.mount("http://", adaptador)
+        self._sessao.mount("https://", adaptador)
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        chave = (
+            "GET",
+            url,
+            tuple(sorted((params or {}).items())),
+            tuple(sorted((headers or {}).items())),
+        )
+        return chamar(
+            urlparse(url).netloc,
+            chave,
+            lambda: self._sessao.get(
+                url, params=params, headers=headers, timeout=timeout or self.timeout
+            ),
+            _transitorio_http,
+            self.tentativas,
+        )
+
+
+_sessao = None
+_trava_sessao = threading.Lock()
+
+
+def sessao_padrao():
+    global _sessao
+    with _trava_sessao:
+        if _sessao is None:
+            _sessao = SessaoHTTP()
+        return _sessao
@@ -0,0 +1,59 @@
+from collections import namedtuple
+
+import numpy as np
+
+from financeiro.dca import acumular, inicio_de_mes
+from financeiro.sgs import SELIC_ANUAL, SELIC_DIARIA, cliente_padrao
+from financeiro.taxa import tir_aportes_iguais, xirr
+
+
+class ResultadoSelic(namedtuple("ResultadoSelic", "datas patrimonio total_aportes tir")):
+    """
+    Curva do Tesouro Selic: arrays alinhados de datas, patrimônio e total
+    aportado, e a TIR anual dos aportes, comparável à de get_stock_data.
+    """
+
+    def nas_datas(self, datas):
+        """Patrimônio na última data da curva <= cada data pedida (NaN antes do início)."""
+        datas = np.asarray(datas, dtype="datetime64[ns]")
+        i = np.searchsorted(self.datas.astype("datetime64[ns]"), datas, side="right") - 1
+        return np.where(i >= 0, self.patrimonio[np.maximum(i, 0)], np.nan)
+
+
+def simulate_tesouro_selic(
+    start="2000-01-01", monthly_investment=1000, end=None, modo="mensal", cliente=None
+):
+    """
+    Simula aportes mensais no Tesouro Selic.
+
+    modo="mensal": usa a taxa anual do último dia de cada mês (série 1178),
+    rendendo (1 + taxa) ** (1/12) no mês, como a versão original do notebook.
+    modo="diario": capitaliza dia útil a dia útil pela taxa diária (série 11),
+    com o aporte no primeiro dia útil de cada mês.
+    """
+    cliente = cliente or cliente_padrao()
+
+    if modo == "mensal":
+        datas, taxas = cliente.serie(SELIC_ANUAL, start, end)
+        meses = datas.astype("datetime64[M]")
+        ultimo = np.ones(len(meses), dtype=bool)
+        np.not_equal(meses[1:], meses[:-1], out=ultimo[:-1])
+        datas = (meses[ultimo] + 1).astype("datetime64[D]") - 1
+        fatores = (1 + taxas[ultimo] / 100) ** (1 / 12)
+        aportes = np.full(len(fatores), float(monthly_investment))
+        patrimonio = acumular(fatores, aportes)
+        # Cada aporte rende o mês inteiro: n aportes iguais valem o patrimônio n meses depois
+        n = len(aportes)
+        tir = tir_aportes_iguais(patrimonio[-1], monthly_investment, n, n) if n else np.nan
+    elif modo == "diario":
+        datas, taxas = cliente.serie(SELIC_DIARIA, start, end)
+        fatores = 1 + taxas / 100
+        aportes = np.where(inicio_de_mes(datas), float(monthly_investment), 0.0)
+        patrimonio = acumular(fatores, aportes)
+        # O aporte rende já no dia em que entra, então o resgate é no dia seguinte ao último
+        fluxos = np.append(-aportes, patrimonio[-1] if len(patrimonio) else 0.0)
+        tir = xirr(fluxos, np.append(datas, datas[-1] + 1)) if len(datas) else np.nan
+    else:
+        raise ValueError(f"modo desconhecido: {modo}")
+
+    return ResultadoSelic(datas, patrimonio, np.cumsum(aportes), float(tir))
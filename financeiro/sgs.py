@@ -0,0 +1,143 @@
+import os
+import threading
+
+import numpy as np
+
+from financeiro.cache import DIRETORIO_PADRAO
+from financeiro.paralelo import executar_em_paralelo
+from financeiro.rede import sessao_padrao
+
+
+URL_SGS = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.{codigo}/dados"
+
+SELIC_DIARIA = 11
+IPCA = 433
+SELIC_ANUAL = 1178
+
+INICIO_SERIES = np.datetime64("1980-01-01")
+
+
+def _formatar(data):
+    ano, mes, dia = str(data).split("-")
+    return f"{dia}/{mes}/{ano}"
+
+
+def _converter(registros):
+    datas = np.array(
+        [f"{r['data'][6:10]}-{r['data'][3:5]}-{r['data'][:2]}" for r in registros],
+        dtype="datetime64[D]",
+    )
+    valores = np.array([r["valor"] for r in registros], dtype=float)
+    return datas, valores
+
+
+class ClienteSGS:
+    """
+    Séries temporais do SGS do Banco Central com cópia local, um .npz por
+    código de série. Na primeira vez baixa a série inteira em blocos de
+    `anos_por_bloco` anos, em paralelo (a API recusa intervalos longos); depois
+    só pede as observações posteriores à última data salva, no máximo uma vez
+    por dia.
+    """
+
+    def __init__(
+        self,
+        diretorio=os.path.join(DIRETORIO_PADRAO, "sgs"),
+        url=URL_SGS,
+        sessao=None,
+        anos_por_bloco=5,
+        max_em_voo=4,
+        timeout=30,
+    ):
+        self.diretorio = diretorio
+        self.url = url
+        self.sessao = sessao or sessao_padrao()
+        self.anos_por_bloco = anos_por_bloco
+        self.max_em_voo = max_em_voo
+        self.timeout = timeout
+        self._trava = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def serie(self, codigo, inicio=None, fim=None):
+        """Devolve (datas datetime64[D], valores float64) da série, recortada em [inicio, fim]."""
+        with self._trava:
+            datas, valores = self._sincronizar(codigo)
+
+        if inicio is not None:
+            corte = np.searchsorted(datas, np.datetime64(inicio, "D"), side="left")
+            datas, valores = datas[corte:], valores[corte:]
+        if fim is not None:
+            corte = np.searchsorted(datas, np.datetime64(fim, "D"), side="right")
+            datas, valores = datas[:corte], valores[:corte]
+        return datas, valores
+
+    def _sincronizar(self, codigo):
+        caminho = os.path.join(self.diretorio, f"{codigo}.npz")
+        hoje = np.datetime64("today", "D")
+
+        if os.path.exists(caminho):
+            with np.load(caminho) as arquivo:
+                datas, valores = arquivo["datas"], arquivo["valores"]
+                sincronizado_em = arquivo["sincronizado_em"][()]
+            if sincronizado_em >= hoje:
+                return datas, valores
+            desde = datas[-1] + 1 if len(datas) else INICIO_SERIES
+        else:
+            datas = np.array([], dtype="datetime64[D]")
+            valores = np.array([], dtype=float)
+            desde = INICIO_SERIES
+
+        novas_datas, novos_valores = self._baixar(codigo, desde, hoje)
+        if len(novas_datas):
+            # Descarta o que já está salvo caso a API devolva a borda do intervalo
+            novo = novas_datas > datas[-1] if len(datas) else np.ones(len(novas_datas), bool)
+            datas = np.concatenate([datas, novas_datas[novo]])
+            valores = np.concatenate([valores, novos_valores[novo]])
+
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "wb") as arquivo:
+            np.savez(arquivo, datas=datas, valores=valores, sincronizado_em=hoje)
+        os.replace(temporario, caminho)
+        return datas, valores
+
+    def _baixar(self, codigo, desde, ate):
+        limites = [desde]
+        while limites[-1] <= ate:
+            ano = limites[-1].astype("datetime64[Y]") + self.anos_por_bloco
+            limites.append(max(ano.astype("datetime64[D]"), limites[-1] + 1))
+        blocos = [(a, min(b - 1, ate)) for a, b in zip(limites[:-1], limites[1:])]
+
+        partes = [None] * len(blocos)
+        for i, parte in executar_em_paralelo(
+            lambda bloco: self._baixar_bloco(codigo, *bloco), blocos, self.max_em_voo
+        ):
+            partes[i] = parte
+
+        datas = np.concatenate([p[0] for p in partes] or [np.array([], "datetime64[D]")])
+        valores = np.concatenate([p[1] for p in partes] or [np.array([], float)])
+        ordem = np.argsort(datas, kind="stable")
+        return datas[ordem], valores[ordem]
+
+    def _baixar_bloco(self, codigo, inicio, fim):
+        url = self.url.format(codigo=codigo)
+        params = {"formato": "json", "dataInicial": _formatar(inicio), "dataFinal": _formatar(fim)}
+        resposta = self.sessao.get(url, params=params, timeout=self.timeout)
+        # Intervalo sem observações
+        if resposta.status_code == 404:
+            return _converter([])
+        resposta.raise_for_status()
+
+        registros = resposta.json()
+        if not isinstance(registros, list):
+            raise ValueError(f"Resposta inesperada do SGS para a série {codigo}: {registros!r}")
+        return _converter(registros)
+
+
+_cliente = None
+
+
+def cliente_padrao():
+    global _cliente
+    if _cliente is None:
+        _cliente = ClienteSGS()
+    return _cliente
@@ -0,0 +1,140 @@
+import importlib
+import queue
+import threading
+
+
+def preaquecer(root, modulos, atraso_ms=200):
+    """
+    Importa `modulos` numa thread em segundo plano logo depois que a janela
+    aparece, para o primeiro clique não pagar a importação de pandas,
+    yfinance e matplotlib. Quem usa o módulo antes disso só espera a
+    importação já em andamento terminar.
+    """
+
+    def importar():
+        for nome in modulos:
+            try:
+                importlib.import_module(nome)
+            except Exception:
+                # O mesmo erro aparece, no lugar certo, no primeiro uso
+                pass
+
+    root.after(atraso_ms, lambda: threading.Thread(target=importar, daemon=True).start())
+
+
+class Cancelado(Exception):
+    def __init__(self):
+        super().__init__("Cancelado pelo usuário.")
+
+
+class Tarefa:
+    """Handle passado à função de trabalho para emitir texto, progresso e checar cancelamento."""
+
+    def __init__(self, executor, funcao, args, callbacks):
+        self.funcao = funcao
+        self.args = args
+        self.callbacks = callbacks
+        self.cancelado = threading.Event()
+        self._eventos = executor._eventos
+
+    def emitir(self, texto):
+        self._eventos.put(("emitir", self, texto))
+
+    def progresso(self, feito, total):
+        self._eventos.put(("progresso", self, (feito, total)))
+
+    def verificar(self):
+        if self.cancelado.is_set():
+            raise Cancelado()
+
+
+class ExecutorTarefas:
+    """
+    Roda as tarefas, uma de cada vez e na ordem de envio, em uma thread de
+    trabalho. Os eventos voltam por uma fila que a thread do Tk esvazia com
+    root.after a cada `intervalo_ms` (16 ms ~ 60 quadros por segundo), já que
+    widgets só podem ser tocados na thread principal.
+    """
+
+    def __init__(self, root, barra=None, intervalo_ms=16, max_eventos_por_quadro=200):
+        self.root = root
+        self.barra = barra
+        self.intervalo_ms = intervalo_ms
+        self.max_eventos_por_quadro = max_eventos_por_quadro
+        self._pendentes = queue.Queue()
+        self._eventos = queue.Queue()
+        self._atual = None
+        threading.Thread(target=self._trabalhar, daemon=True).start()
+        root.after(intervalo_ms, self._consumir)
+
+    def enviar(
+        self, funcao, *args, ao_iniciar=None, ao_emitir=None, ao_concluir=None, ao_falhar=None
+    ):
+        """
+        Agenda funcao(tarefa, *args). Os callbacks rodam na thread do Tk:
+        ao_iniciar(), ao_emitir(texto), ao_concluir(resultado) e
+        ao_falhar(excecao), que também recebe Cancelado.
+        """
+        callbacks = {
+            "iniciar": ao_iniciar,
+            "emitir": ao_emitir,
+            "concluir": ao_concluir,
+            "falhar": ao_falhar,
+        }
+        tarefa = Tarefa(self, funcao, args, callbacks)
+        self._pendentes.put(tarefa)
+        return tarefa
+
+    def cancelar(self):
+        """Cancela a tarefa em andamento e todas as que estão na fila."""
+        with self._pendentes.mutex:
+            for tarefa in self._pendentes.queue:
+                tarefa.cancelado.set()
+        if self._atual is not None:
+            self._atual.cancelado.set()
+
+    def _trabalhar(self):
+        while True:
+            tarefa = self._pendentes.get()
+            if tarefa.cancelado.is_set():
+                self._eventos.put(("falhar", tarefa, Cancelado()))
+                continue
+
+            self._atual = tarefa
+            self._eventos.put(("iniciar", tarefa, None))
+            try:
+                resultado = tarefa.funcao(tarefa, *tarefa.args)
+                tarefa.verificar()
+            except Exception as e:
+                self._eventos.put(("falhar", tarefa, e))
+            else:
+                self._eventos.put(("concluir", tarefa, resultado))
+            finally:
+                self._atual = None
+
+    def _consumir(self):
+        try:
+            for _ in range(self.max_eventos_por_quadro):
+                try:
+                    tipo, tarefa, valor = self._eventos.get_nowait()
+                except queue.Empty:
+                    break
+                self._despachar(tipo, tarefa, valor)
+        finally:
+            self.root.after(self.intervalo_ms, self._consumir)
+
+    def _despachar(self, tipo, tarefa, valor):
+        if self.barra is not None:
+            if tipo == "iniciar":
+                self.barra.configure(value=0)
+            elif tipo == "progresso":
+                feito, total = valor
+                self.barra.configure(maximum=max(total, 1), value=feito)
+
+        callback = tarefa.callbacks.get(tipo)
+        if callback is None:
+            return
+        if tipo == "iniciar":
+            callback()
+        else:
+            callback(valor)
@@ -0,0 +1,125 @@
+import numpy as np
+
+
+DIAS_POR_MES = 365.25 / 12
+
+
+def _log_soma_e_derivada(x, n, meses):
+    """
+    log(S) e d log(S)/dx para S(x) = sum_{k<n} exp(x * (meses - k)), usando a
+    soma da PG em forma fechada.
+    """
+    pequeno = np.abs(x) < 1e-8
+    xs = np.where(pequeno, 1.0, x)
+    razao = np.expm1(n * xs) / np.expm1(xs)
+    log_s = np.where(pequeno, np.log(n), xs * (meses - n + 1) + np.log(razao))
+    derivada = (meses - n + 1) + n / -np.expm1(-n * xs) - 1 / -np.expm1(-xs)
+    # Em x = 0 a derivada é a média dos expoentes
+    derivada = np.where(pequeno, meses - (n - 1) / 2, derivada)
+    return log_s, derivada
+
+
+def tir_aportes_iguais(patrimonio, aporte, n_aportes, meses, iteracoes=60, tol=1e-12):
+    """
+    TIR anual de `n_aportes` aportes iguais, um por mês a partir do mês 0,
+    que valem `patrimonio` `meses` meses depois do primeiro aporte.
+    Aceita arrays (com broadcast) e resolve todos de uma vez por Newton.
+    Devolve NaN onde não há solução (sem aportes ou patrimônio <= 0).
+    """
+    patrimonio, aporte, n, meses = np.broadcast_arrays(
+        np.asarray(patrimonio, dtype=float),
+        np.asarray(aporte, dtype=float),
+        np.asarray(n_aportes, dtype=float),
+        np.asarray(meses, dtype=float),
+    )
+    valido = (n > 0) & (patrimonio > 0) & (aporte > 0)
+    n = np.where(valido, n, 1.0)
+    alvo = np.log(np.where(valido, patrimonio / aporte, 1.0))
+
+    # log(S) é convexa e crescente em x = log(1 + taxa mensal), então Newton
+    # converge de forma monótona a partir do primeiro passo.
+    media = np.maximum(meses - (n - 1) / 2, 1e-6)
+    x = (alvo - np.log(n)) / media
+    for _ in range(iteracoes):
+        log_s, derivada = _log_soma_e_derivada(x, n, meses)
+        passo = (log_s - alvo) / np.maximum(derivada, 1e-6)
+        x = x - passo
+        if np.all(np.abs(passo) < tol):
+            break
+
+    return np.where(valido, np.expm1(12 * x), np.nan)
+
+
+def _log_valor_futuro(x, fluxos, anos):
+    """
+    log do valor na última data, à taxa contínua x, dos fluxos positivos (por
+    linha), e sua derivada em x. Soma em log (log-sum-exp), sem estourar o
+    float64 em prazos longos; sem fluxos, -inf.
+    """
+    expoente = np.where(fluxos > 0, x[:, None] * anos, -np.inf)
+    maximo = expoente.max(axis=1, keepdims=True)
+    maximo = np.where(np.isfinite(maximo), maximo, 0.0)
+    termos = np.where(fluxos > 0, fluxos, 0.0) * np.exp(expoente - maximo)
+    soma = termos.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.log(soma) + maximo[:, 0], (termos * anos).sum(axis=1) / soma
+
+
+def _valor_futuro(x, fluxos, anos):
+    """
+    log(resgates) - log(aportes) na última data a taxa contínua x, e a
+    derivada: zero exatamente na TIR e quase linear em x (linear com um
+    aporte e um resgate), então Newton converge em poucos passos.
+    """
+    entradas, d_entradas = _log_valor_futuro(x, fluxos, anos)
+    saidas, d_saidas = _log_valor_futuro(x, -fluxos, anos)
+    with np.errstate(invalid="ignore"):
+        return entradas - saidas, d_entradas - d_saidas
+
+
+def xirr(fluxos, datas, iteracoes=100, tol=1e-12):
+    """
+    TIR anual de fluxos de caixa em datas quaisquer (como o XIRR do Excel,
+    base de 365 dias). `fluxos` pode ser uma matriz casos x datas, resolvida
+    de uma vez; `datas` é um vetor comum a todos os casos ou uma matriz do
+    mesmo formato. Datas sem fluxo levam 0.
+
+    Newton em x = log(1 + taxa) sobre log(resgates) - log(aportes) na última
+    data (sem estouro em prazos longos), com bissecção quando o passo sai do
+    intervalo que contém a raiz. Com todos os aportes antes dos resgates a
+    raiz é única; sem troca de sinal no intervalo devolve NaN. Para aportes
+    mensais iguais, tir_aportes_iguais resolve o mesmo problema em forma fechada.
+    """
+    vetor = np.ndim(fluxos) == 1
+    fluxos = np.atleast_2d(np.asarray(fluxos, dtype=float))
+    datas = np.asarray(datas, dtype="datetime64[D]")
+    anos = np.broadcast_to(
+        (datas.max(axis=-1, keepdims=True) - datas) / np.timedelta64(365, "D"), fluxos.shape
+    )
+
+    baixo = np.full(len(fluxos), -10.0)
+    alto = np.full(len(fluxos), 10.0)
+    v_baixo, _ = _valor_futuro(baixo, fluxos, anos)
+    v_alto, _ = _valor_futuro(alto, fluxos, anos)
+    valido = np.sign(v_baixo) * np.sign(v_alto) < 0
+    crescente = v_alto > v_baixo
+
+    x = np.zeros(len(fluxos))
+    for _ in range(iteracoes):
+        valor, derivada = _valor_futuro(x, fluxos, anos)
+        # Estreita o intervalo pelo lado em que a raiz não está
+        abaixo = (valor < 0) == crescente
+        baixo = np.where(abaixo, x, baixo)
+        alto = np.where(abaixo, alto, x)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            novo = x - valor / derivada
+        fora = ~((novo > baixo) & (novo < alto))
+        novo = np.where(fora, (baixo + alto) / 2, novo)
+        convergiu = np.abs(novo - x) < tol
+        x = novo
+        if np.all(convergiu | ~valido):
+            break
+
+    taxa = np.where(valido, np.expm1(x), np.nan)
+    return taxa[0] if vetor else taxa
@@ -0,0 +1,71 @@
+import re
+
+
+# Código da B3: quatro letras e a classe (3 ON, 4 PN, 5/6 PNA/PNB, 11 units,
+# 31-39 BDRs)
+CODIGO_B3 = re.compile(r"[A-Za-z]{4}\d{1,2}")
+
+# Sufixo de bolsa do Yahoo -> moeda em que ela cota (Londres, Joanesburgo e
+# Tel Aviv na subunidade, ver moedas.SUBUNIDADES)
+MOEDAS_POR_SUFIXO = {
+    ".SA": "BRL",
+    ".L": "GBp",
+    ".DE": "EUR",
+    ".F": "EUR",
+    ".PA": "EUR",
+    ".AS": "EUR",
+    ".BR": "EUR",
+    ".MI": "EUR",
+    ".MC": "EUR",
+    ".LS": "EUR",
+    ".IR": "EUR",
+    ".VI": "EUR",
+    ".HE": "EUR",
+    ".SW": "CHF",
+    ".ST": "SEK",
+    ".CO": "DKK",
+    ".OL": "NOK",
+    ".TO": "CAD",
+    ".V": "CAD",
+    ".NE": "CAD",
+    ".MX": "MXN",
+    ".T": "JPY",
+    ".HK": "HKD",
+    ".SS": "CNY",
+    ".SZ": "CNY",
+    ".KS": "KRW",
+    ".TW": "TWD",
+    ".NS": "INR",
+    ".BO": "INR",
+    ".SI": "SGD",
+    ".AX": "AUD",
+    ".NZ": "NZD",
+    ".JO": "ZAc",
+    ".TA": "ILA",
+}
+
+
+def ajustar_ticker(ticker):
+    """Acrescenta .SA aos tickers da B3 (PETR4, USIM5, TAEE11, AAPL34)."""
+    if ticker and (CODIGO_B3.fullmatch(ticker) or ticker[-1] in "341"):
+        return ticker + ".SA"
+    return ticker
+
+
+def moeda_pelo_ticker(ticker):
+    """
+    Palpite da moeda de negociação pelo formato do ticker, para quando o
+    provedor não informa: o sufixo da bolsa (MOEDAS_POR_SUFIXO), a moeda do
+    fim do nome em pares de câmbio (USDBRL=X) e cripto (BTC-USD) e USD para
+    tickers sem sufixo, das bolsas americanas. None quando o formato não diz
+    (sufixo desconhecido, índices, futuros).
+    """
+    if ticker.endswith("=X"):
+        return ticker[:-2][-3:].upper()
+    if "." in ticker:
+        return MOEDAS_POR_SUFIXO.get("." + ticker.rsplit(".", 1)[1].upper())
+    if "-" in ticker and len(ticker.rsplit("-", 1)[1]) == 3:
+        return ticker.rsplit("-", 1)[1].upper()
+    if ticker[:1].isalpha() and "=" not in ticker:
+        return "USD"
+    return None
@@ -0,0 +1,138 @@
+"""
+Triagem de dividendos para um universo inteiro (FIIs e boas pagadoras):
+
+    python -m financeiro.triagem universo.txt --ultimos 48 --saida ranking.csv
+
+Para cada ticker, soma os últimos N dividendos (a conta que o test.py fazia
+com stock.actions["Dividends"].tail(48)) e os pagos nos últimos 12 meses, e
+divide as somas pelo último fechamento. Close e Dividends vêm do histórico
+bruto, uma resposta por ticker (pelo cache e pelo provedor, todos os tickers
+em paralelo), sem o download separado do preço ajustado; as somas saem de
+uma única matriz pregões x tickers de dividendos.
+"""
+
+import argparse
+import sys
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from financeiro.cache import historicos
+from financeiro.dca import alinhar_colunas
+
+
+ULTIMOS = 48
+INICIO = "1990-01-01"
+ORDENACOES = ("dy_12m", "dy_ultimos")
+
+SomasDividendos = namedtuple("SomasDividendos", "datas fechamentos pagamentos soma_ultimos soma_12m")
+
+
+def somar_dividendos(datas, dividendos, fechamentos, ultimos=ULTIMOS):
+    """
+    Somas por coluna de uma matriz pregões x tickers: últimos `ultimos`
+    dividendos pagos e dividendos dos 365 dias até o último fechamento de
+    cada ticker. `datas` e `fechamentos` do resultado são os do último pregão
+    (NaT/NaN para quem não tem preço); `pagamentos` é quantos dividendos
+    entraram na primeira soma (menos de `ultimos` se o histórico for curto).
+    """
+    datas = np.asarray(datas, dtype="datetime64[D]")
+    dividendos = np.nan_to_num(np.asarray(dividendos, dtype=float))
+    fechamentos = np.asarray(fechamentos, dtype=float)
+    colunas = np.arange(dividendos.shape[1])
+    if not len(datas):
+        nada = np.full(len(colunas), np.nan)
+        sem_datas = np.full(len(colunas), np.datetime64("NaT"), dtype="datetime64[D]")
+        return SomasDividendos(sem_datas, nada, np.zeros(len(colunas), dtype=int), nada, nada)
+
+    # Posição de cada pagamento contada do início; ficam os de posição > total - N
+    pagou = dividendos > 0
+    posicao = np.cumsum(pagou, axis=0)
+    total = posicao[-1]
+    soma_ultimos = np.where(pagou & (posicao > total - ultimos), dividendos, 0).sum(axis=0)
+
+    valido = ~np.isnan(fechamentos)
+    tem_preco = valido.any(axis=0)
+    ultimo = len(datas) - 1 - np.argmax(valido[::-1], axis=0)
+    ultimo = np.where(tem_preco, ultimo, 0)
+
+    # Janela móvel de 365 dias como diferença de somas acumuladas
+    acumulado = np.vstack((np.zeros(len(colunas)), np.cumsum(dividendos, axis=0)))
+    data_final = datas[ultimo]
+    corte = np.searchsorted(datas, data_final - np.timedelta64(365, "D"), side="right")
+    soma_12m = acumulado[ultimo + 1, colunas] - acumulado[corte, colunas]
+
+    return SomasDividendos(
+        np.where(tem_preco, data_final, np.datetime64("NaT")),
+        np.where(tem_preco, fechamentos[ultimo, colunas], np.nan),
+        np.minimum(total, ultimos),
+        np.where(tem_preco, soma_ultimos, np.nan),
+        np.where(tem_preco, soma_12m, np.nan),
+    )
+
+
+def triar_dividendos(tickers, ultimos=ULTIMOS, inicio=INICIO, fim=None, ordenar_por="dy_12m"):
+    """
+    Ranking (DataFrame, maior dividend yield primeiro) com, para cada ticker:
+    último fechamento e sua data, soma e yield dos últimos `ultimos`
+    dividendos e dos últimos 12 meses. Tickers sem preço ficam no fim.
+    """
+    if ordenar_por not in ORDENACOES:
+        raise ValueError(f"ordenar_por precisa ser um de {ORDENACOES}, não {ordenar_por!r}")
+    if fim is None:
+        fim = str((pd.Timestamp.today() + pd.Timedelta(days=1)).date())
+
+    tickers = list(dict.fromkeys(tickers))
+    brutos = historicos(tickers, inicio, fim, auto_adjust=False)
+    datas, (fechamentos, dividendos) = alinhar_colunas(
+        [brutos[t] for t in tickers], ["Close", "Dividends"]
+    )
+    somas = somar_dividendos(datas, dividendos, fechamentos, ultimos)
+
+    tabela = pd.DataFrame(
+        {
+            "ticker": tickers,
+            "data": pd.to_datetime(somas.datas),
+            "fechamento": somas.fechamentos,
+            "dividendos": somas.pagamentos,
+            "soma_ultimos": somas.soma_ultimos,
+            "dy_ultimos": somas.soma_ultimos / somas.fechamentos,
+            "soma_12m": somas.soma_12m,
+            "dy_12m": somas.soma_12m / somas.fechamentos,
+        }
+    )
+    tabela = tabela.sort_values(ordenar_por, ascending=False, na_position="last", kind="stable")
+    tabela.index = pd.RangeIndex(1, len(tabela) + 1, name="posicao")
+    return tabela
+
+
+def main(argv=None):
+    from financeiro.cli import ler_universo
+    from financeiro.tickers import ajustar_ticker
+
+    parser = argparse.ArgumentParser(
+        prog="python -m financeiro.triagem",
+        description="Ranking de dividend yield de um universo de tickers.",
+    )
+    parser.add_argument("universo", help="arquivo com os tickers")
+    parser.add_argument("--ultimos", type=int, default=ULTIMOS, help="quantos dividendos somar")
+    parser.add_argument("--inicio", default=INICIO)
+    parser.add_argument("--fim")
+    parser.add_argument("--ordenar", choices=ORDENACOES, default="dy_12m")
+    parser.add_argument("--saida", help="CSV de saída (padrão: imprime a tabela)")
+    args = parser.parse_args(argv)
+
+    tickers = [ajustar_ticker(t) for t in ler_universo(args.universo)]
+    tabela = triar_dividendos(tickers, args.ultimos, args.inicio, args.fim, args.ordenar)
+    if args.saida:
+        tabela.to_csv(args.saida)
+        print(f"{len(tabela)} tickers em {args.saida}", file=sys.stderr)
+    else:
+        with pd.option_context("display.max_rows", None, "display.width", 120):
+            print(tabela.to_string(float_format=lambda x: f"{x:,.4f}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
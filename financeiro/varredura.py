@@ -0,0 +1,60 @@
+from collections import namedtuple
+
+import numpy as np
+
+from financeiro.cache import historico
+from financeiro.dca import datas_locais, inicio_de_mes
+from financeiro.taxa import DIAS_POR_MES, tir_aportes_iguais
+
+
+Varredura = namedtuple("Varredura", "inicios fins patrimonio total_aportes tir")
+
+
+def varrer_janelas(datas, precos, inicios, fins, monthly_investment):
+    """
+    Resultado de get_stock_data para cada par (inicio, fim) em um só passo.
+
+    A série é lida uma vez e vira somas prefixadas de 1/Close nos dias de
+    aporte, então cada janela custa O(1). Devolve matrizes
+    len(inicios) x len(fins); janelas vazias (fim <= inicio) ficam com NaN.
+    """
+    datas = np.asarray(datas, dtype="datetime64[ns]")
+    precos = np.asarray(precos, dtype=float)
+    inicios = np.asarray(inicios, dtype="datetime64[ns]")
+    fins = np.asarray(fins, dtype="datetime64[ns]")
+
+    mes = inicio_de_mes(datas)
+    positivo = precos > 0
+    aporta = mes & positivo
+    cotas = np.concatenate(([0.0], np.cumsum(np.where(aporta, 1 / np.where(positivo, precos, 1), 0))))
+    contagem = np.concatenate(([0], np.cumsum(aporta)))
+
+    s = np.searchsorted(datas, inicios, side="left")[:, None]
+    e = np.searchsorted(datas, fins, side="left")[None, :] - 1
+    valida = (e >= s) & (s < len(datas))
+    s = np.minimum(s, len(datas) - 1)
+    e = np.maximum(e, 0)
+
+    # Se a janela começa no meio do mês, o primeiro pregão dela também recebe
+    # aporte, como acontece quando get_stock_data baixa só aquele intervalo.
+    extra = ~mes[s] & positivo[s]
+    n = contagem[e + 1] - contagem[s] + extra
+    soma = cotas[e + 1] - cotas[s] + np.where(extra, 1 / np.where(positivo[s], precos[s], 1), 0)
+
+    patrimonio = np.where(valida, monthly_investment * soma * precos[e], np.nan)
+    total_aportes = np.where(valida, monthly_investment * n, np.nan)
+
+    meses = (datas[e] - datas[s]) / np.timedelta64(1, "D") / DIAS_POR_MES
+    tir = np.where(valida, tir_aportes_iguais(patrimonio, monthly_investment, n, meses), np.nan)
+    return Varredura(inicios, fins, patrimonio, total_aportes, tir)
+
+
+def varrer_ticker(ticker, inicios, fins, monthly_investment):
+    """Baixa (ou lê do cache) a série do ticker uma única vez e varre todas as janelas."""
+    inicios = np.asarray(inicios, dtype="datetime64[D]")
+    fins = np.asarray(fins, dtype="datetime64[D]")
+    hist = historico(ticker, str(inicios.min()), str(fins.max()), auto_adjust=True)
+    hist = hist.dropna(subset=["Close"])
+    return varrer_janelas(
+        datas_locais(hist.index), hist["Close"].to_numpy(dtype=float), inicios, fins, monthly_investment
+    )
@@ -1,34 +1,21 @@
 import requests
-import pandas as pd
 
+from financeiro.inflacao import IndiceIPCA
+from financeiro.sgs import IPCA, cliente_padrao
 
-url = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.433/dados"
 
-
-params = {"formato": "json", "dataInicial": "01/01/2000", "dataFinal": "31/12/2024"}
-q = []
-c = 1.0
 try:
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-
-    data = response.json()
+    # Série 433 (IPCA mensal), servida pela cópia local e atualizada só com os meses novos
+    datas, valores = cliente_padrao().serie(IPCA, "2000-01-01", "2024-12-31")
 
-    if not data:
+    if not len(datas):
         print("Nenhum dado encontrado.")
     else:
-        df = pd.DataFrame(data)
-        df["data"] = pd.to_datetime(df["data"], format="%d/%m/%Y")
-        df["valor"] = df["valor"].astype(float)
-
-        df["ano"] = df["data"].dt.year
-
-        inflacao_anual = df.groupby("ano")["valor"].sum().reset_index()
-
-        array_inflacao = inflacao_anual.values.tolist()
+        # A inflação do ano compõe os meses: (1 + i1) * (1 + i2) * ... - 1, não a soma
+        anos, inflacao_anual = IndiceIPCA(datas, valores).acumulado_anual()
 
         print("Inflação ano a ano:")
-        for ano, inflacao in array_inflacao:
+        for ano, inflacao in zip(anos, inflacao_anual):
             print(inflacao, " ", end="")
 
 
@@ -1,83 +1,54 @@
-import yfinance as yf
-import pandas as pd
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 
+from financeiro.tarefas import ExecutorTarefas, preaquecer
 
-def calculate_lump_sum(ticker, initial_investment, start, end):
-    try:
-        # Ajustar ticker brasileiro
-        if ticker[-1] in "341":
-            ticker = ticker + ".SA"
 
-        stock = yf.Ticker(ticker)
+def lump_sum_em_segundo_plano(tarefa, tickers, initial_investment, start_date, end_date):
+    from financeiro.motor import calculate_lump_sum
 
-        # Baixar preços
-        hist = stock.history(start=start, end=end, auto_adjust=True)
-        if hist.empty:
-            return f"Erro: Não foi possível obter dados para {ticker}", 0, None
-
-        # Baixar dividendos e splits (corretíssimo para FIIs)
-        actions = stock.actions
-        dividends = actions["Dividends"]
-        splits = actions["Stock Splits"]
-
-        hist = hist[["Close"]].copy()
-        hist.index = pd.to_datetime(hist.index)
-
-        # Achar a primeira data negociada >= start
-        try:
-            first_valid_date = hist.loc[start:].index[0]
-        except:
-            return f"Erro: Nenhum dado encontrado após {start}", 0, None
-
-        first_price = hist.loc[first_valid_date, "Close"]
-
-        # Compra inicial
-        shares = initial_investment / first_price
-
-        # Loop diário
-        for date, row in hist.iterrows():
-            price = row["Close"]
-
-            # Aplicar splits
-        final_price = hist.iloc[-1]["Close"]
-        final_value = shares * final_price
-
-        return None, final_value, first_valid_date
+    for feitos, ticker in enumerate(tickers, start=1):
+        tarefa.verificar()
+        # Em reais pelo câmbio de cada dia, como nos rótulos
+        error_msg, patrimonio, data_inicial = calculate_lump_sum(
+            ticker, initial_investment, start_date, end_date, para="BRL"
+        )
 
-    except Exception as e:
-        return f"Erro ao processar {ticker}: {e}", 0, None
+        if error_msg:
+            tarefa.emitir(error_msg + "\n")
+        else:
+            retorno = (patrimonio / initial_investment - 1) * 100
+            tarefa.emitir(
+                f"Ticker: {ticker}\n"
+                f"Aporte inicial: R${initial_investment:,.2f}\n"
+                f"Patrimônio final: R${patrimonio:,.2f}\n"
+                f"Primeira data válida: {data_inicial}\n"
+                f"Retorno total: {retorno:.2f}%\n\n"
+            )
+        tarefa.progresso(feitos, len(tickers))
 
 
 def run_backtest():
-    output_text.delete("1.0", tk.END)
-
     a = tickers_entry.get().strip()
     initial_investment = float(investment_entry.get() or 1000)
     start_date = start_date_entry.get() or "2000-01-01"
     end_date = end_date_entry.get() or "2025-02-01"
 
     if not a:
+        output_text.delete("1.0", tk.END)
         output_text.insert(tk.END, "Por favor, digite os tickers.")
         return
 
-    tickers = a.split(" ")
-
-    for ticker in tickers:
-        error_msg, patrimonio, data_inicial = calculate_lump_sum(
-            ticker, initial_investment, start_date, end_date
-        )
-
-        if error_msg:
-            output_text.insert(tk.END, error_msg + "\n")
-        else:
-            output_text.insert(tk.END, f"Ticker: {ticker}\n")
-            output_text.insert(tk.END, f"Aporte inicial: R${initial_investment:,.2f}\n")
-            output_text.insert(tk.END, f"Patrimônio final: R${patrimonio:,.2f}\n")
-            output_text.insert(tk.END, f"Primeira data válida: {data_inicial}\n")
-            retorno = (patrimonio / initial_investment - 1) * 100
-            output_text.insert(tk.END, f"Retorno total: {retorno:.2f}%\n\n")
+    executor.enviar(
+        lump_sum_em_segundo_plano,
+        a.split(" "),
+        initial_investment,
+        start_date,
+        end_date,
+        ao_iniciar=lambda: output_text.delete("1.0", tk.END),
+        ao_emitir=lambda texto: output_text.insert(tk.END, texto),
+        ao_falhar=lambda erro: output_text.insert(tk.END, f"{erro}\n"),
+    )
 
 
 # Função copiar
@@ -134,6 +105,14 @@ input_frame.columnconfigure(1, weight=1)
 run_button = ttk.Button(main_frame, text="Executar", command=run_backtest)
 run_button.pack(pady=10)
 
+progress_frame = ttk.Frame(main_frame)
+progress_frame.pack(fill="x", pady=(0, 10))
+progress_bar = ttk.Progressbar(progress_frame, mode="determinate")
+progress_bar.pack(side="left", fill="x", expand=True, padx=5)
+executor = ExecutorTarefas(root, progress_bar)
+cancel_button = ttk.Button(progress_frame, text="Cancelar", command=executor.cancelar)
+cancel_button.pack(side="right", padx=5)
+
 output_frame = ttk.LabelFrame(main_frame, text="Resultados", padding="10")
 output_frame.pack(fill="both", expand=True)
 
@@ -143,4 +122,5 @@ output_text.pack(fill="both", expand=True)
 copy_button = ttk.Button(output_frame, text="Copiar", command=copy_to_clipboard)
 copy_button.pack(pady=5)
 
+preaquecer(root, ["financeiro.motor", "yfinance"])
 root.mainloop()
@@ -1,8 +1,12 @@
-import yfinance as yf
-import pandas as pd
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import matplotlib.pyplot as plt
+
+from financeiro.paralelo import executar_em_paralelo
+from financeiro.tarefas import ExecutorTarefas, preaquecer
+from financeiro.tickers import ajustar_ticker
+
+# pandas, yfinance e matplotlib são importados no primeiro uso (e pré-aquecidos
+# em segundo plano depois que a janela abre), para a janela aparecer na hora
 
 
 # ======================================================
@@ -10,30 +14,19 @@ import matplotlib.pyplot as plt
 # ======================================================
 
 
-def get_lucro_anual(ticker):
-    stock = yf.Ticker(ticker)
-    financials = stock.financials
-
-    if financials.empty or "Net Income" not in financials.index:
-        raise ValueError("Lucro líquido não disponível.")
+def lucro_anual(ticker):
+    from financeiro.fundamentos import get_lucro_anual
 
-    lucro = financials.loc["Net Income"].sort_index()
-    lucro.index = lucro.index.year
-    return lucro
+    return get_lucro_anual(ticker)
 
 
 def converter_lucro_usd(lucro_brl):
-    usd = yf.Ticker("USDBRL=X")
-
-    start = f"{lucro_brl.index.min()}-01-01"
-    end = f"{lucro_brl.index.max()}-12-31"
-
-    cambio = usd.history(start=start, end=end)
+    import pandas as pd
 
-    if cambio.empty:
-        raise ValueError("Não foi possível obter o câmbio USD/BRL.")
+    from financeiro.cambio import media_anual
 
-    dolar_medio = cambio["Close"].groupby(cambio.index.year).mean()
+    # Médias anuais calculadas uma vez sobre a série completa do USDBRL=X
+    dolar_medio = media_anual()
 
     df = pd.DataFrame({"Lucro_BRL": lucro_brl, "USD_BRL": dolar_medio}).dropna()
 
@@ -46,8 +39,8 @@ def converter_lucro_usd(lucro_brl):
 # ======================================================
 
 
-def plot_lucro_brl(ticker):
-    lucro = get_lucro_anual(ticker)
+def plot_lucro_brl(ticker, lucro):
+    import matplotlib.pyplot as plt
 
     plt.figure()
     plt.plot(lucro.index, lucro.values / 1e9, marker="o")
@@ -58,9 +51,8 @@ def plot_lucro_brl(ticker):
     plt.show()
 
 
-def plot_lucro_usd(ticker):
-    lucro = get_lucro_anual(ticker)
-    df = converter_lucro_usd(lucro)
+def plot_lucro_usd(ticker, df):
+    import matplotlib.pyplot as plt
 
     plt.figure()
     plt.plot(df.index, df["Lucro_USD"] / 1e9, marker="o")
@@ -72,91 +64,102 @@ def plot_lucro_usd(ticker):
 
 
 # ======================================================
-# BACKTEST DE APORTES MENSAIS
+# GUI CALLBACKS
 # ======================================================
 
 
-def get_stock_data(ticker, monthly_investment, start, end):
-    stock = yf.Ticker(ticker)
-    hist = stock.history(start=start, end=end, auto_adjust=True)
-
-    if hist.empty:
-        return "Erro ao obter dados.", 0, 0, None
+def backtest_em_segundo_plano(tarefa, tickers, aporte, start, end):
+    from financeiro.moedas import moeda
+    from financeiro.motor import get_stock_data_lote, inicio_sem_cambio, obter_historico
 
-    hist = hist.dropna(subset=["Close"])
-    first_valid_date = hist.index.min().date()
-
-    df = hist[["Close"]].reset_index()
-    df.columns = ["Date", "Close"]
+    historicos = [None] * len(tickers)
+    moedas = [None] * len(tickers)
+    concluidos = executar_em_paralelo(
+        lambda t: (obter_historico(t, start, end), moeda(t)), tickers
+    )
+    for feitos, (i, (historico, codigo)) in enumerate(concluidos, start=1):
+        tarefa.verificar()
+        historicos[i], moedas[i] = historico, codigo
+        # Cada ticker sai assim que chega, já em reais pelo câmbio de cada dia
+        ((err, patrimonio, aportes, data),), (tir_ticker,), *_ = get_stock_data_lote(
+            [historico], aporte, [moedas[i]], para="BRL"
+        )
+        if err:
+            tarefa.emitir(f"{tickers[i]}: {err}\n")
+        else:
+            tarefa.emitir(
+                f"{tickers[i]}: Patrimônio R${patrimonio:,.2f} | "
+                f"Aportado R${aportes:,.2f} | "
+                f"TIR {tir_ticker:.2%} a.a. | "
+                f"Desde {data}\n"
+            )
+            inicio = inicio_sem_cambio(historico[1], data)
+            if inicio:
+                tarefa.emitir(
+                    f"{tickers[i]}: sem câmbio de {inicio} a {data}; "
+                    "aportes desse período ignorados\n"
+                )
+        tarefa.progresso(feitos, len(tickers))
 
-    df["Month"] = df["Date"].dt.to_period("M")
-    investment_days = df.groupby("Month")["Date"].first()
-    investment_days_set = set(investment_days)
+    # Totais da carteira numa só matriz pregões x tickers em reais
+    _, _, total, investido, tir = get_stock_data_lote(historicos, aporte, moedas, para="BRL")
+    return total, investido, tir
 
-    shares = 0
-    total_aportes = 0
 
-    for _, row in df.iterrows():
-        if row["Date"] in investment_days_set and row["Close"] > 0:
-            shares += monthly_investment / row["Close"]
-            total_aportes += monthly_investment
+def mostrar_totais(resultado):
+    total, investido, tir = resultado
 
-    patrimonio = shares * df.iloc[-1]["Close"]
-    return None, patrimonio, total_aportes, first_valid_date
+    output_text.insert(
+        tk.END,
+        f"\nTOTAL PORTFÓLIO: R${total:,.2f}\nTOTAL INVESTIDO: R${investido:,.2f}\n"
+        f"TIR DA CARTEIRA: {tir:.2%} a.a.\n",
+    )
 
 
-# ======================================================
-# GUI CALLBACKS
-# ======================================================
+def mostrar_erro(erro):
+    output_text.insert(tk.END, f"{erro}\n")
 
 
 def run_backtest():
-    output_text.delete("1.0", tk.END)
-
     tickers = tickers_entry.get().strip().split()
     aporte = float(investment_entry.get() or 1000)
     start = start_date_entry.get() or "2000-01-01"
     end = end_date_entry.get() or "2025-01-01"
 
-    total = 0
-    investido = 0
-
-    for ticker in tickers:
-        if ticker[-1] in "341":
-            ticker += ".SA"
-
-        err, patrimonio, aportes, data = get_stock_data(ticker, aporte, start, end)
-
-        if err:
-            output_text.insert(tk.END, f"{ticker}: {err}\n")
-        else:
-            total += patrimonio
-            investido += aportes
-            output_text.insert(
-                tk.END,
-                f"{ticker}: Patrimônio R${patrimonio:,.2f} | "
-                f"Aportado R${aportes:,.2f} | "
-                f"Desde {data}\n",
-            )
-
-    output_text.insert(
-        tk.END,
-        f"\nTOTAL PORTFÓLIO: R${total:,.2f}\nTOTAL INVESTIDO: R${investido:,.2f}\n",
+    tickers = [ajustar_ticker(t) for t in tickers]
+
+    executor.enviar(
+        backtest_em_segundo_plano,
+        tickers,
+        aporte,
+        start,
+        end,
+        ao_iniciar=lambda: output_text.delete("1.0", tk.END),
+        ao_emitir=lambda texto: output_text.insert(tk.END, texto),
+        ao_concluir=mostrar_totais,
+        ao_falhar=mostrar_erro,
     )
 
 
 def gerar_lucro_brl():
-    ticker = tickers_entry.get().strip()
-    if ticker and ticker[-1] in "341":
-        ticker += ".SA"
-    plot_lucro_brl(ticker)
+    ticker = ajustar_ticker(tickers_entry.get().strip())
+
+    # Baixa em segundo plano; o gráfico precisa ser desenhado na thread do Tk
+    executor.enviar(
+        lambda tarefa: lucro_anual(ticker),
+        ao_concluir=lambda lucro: plot_lucro_brl(ticker, lucro),
+        ao_falhar=mostrar_erro,
+    )
 
 
 def gerar_lucro_usd():
-    ticker = tickers_entry.get().strip()
-    if ticker and ticker[-1] in "341":
-        ticker += ".SA"
-    plot_lucro_usd(ticker)
+    ticker = ajustar_ticker(tickers_entry.get().strip())
+
+    executor.enviar(
+        lambda tarefa: converter_lucro_usd(lucro_anual(ticker)),
+        ao_concluir=lambda df: plot_lucro_usd(ticker, df),
+        ao_falhar=mostrar_erro,
+    )
 
 
 def copy_to_clipboard():
@@ -205,6 +208,13 @@ params.columnconfigure(1, weight=1)
 
 ttk.Button(main, text="Executar Backtest", command=run_backtest).pack(pady=5)
 
+progresso = ttk.Frame(main)
+progresso.pack(fill="x")
+progress_bar = ttk.Progressbar(progresso, mode="determinate")
+progress_bar.pack(side="left", fill="x", expand=True, padx=5)
+executor = ExecutorTarefas(root, progress_bar)
+ttk.Button(progresso, text="Cancelar", command=executor.cancelar).pack(side="right")
+
 buttons = ttk.Frame(main)
 buttons.pack(pady=5)
 
@@ -223,4 +233,14 @@ output_text.pack(fill="both", expand=True)
 
 ttk.Button(output, text="Copiar", command=copy_to_clipboard).pack(pady=5)
 
+preaquecer(
+    root,
+    [
+        "financeiro.motor",
+        "financeiro.fundamentos",
+        "financeiro.cambio",
+        "yfinance",
+        "matplotlib.pyplot",
+    ],
+)
 root.mainloop()
@@ -1,34 +1,20 @@
-import yfinance as yf
 import pandas as pd
 
-ticker = input("Digite o ticker: ")
+from financeiro.tickers import ajustar_ticker
+from financeiro.triagem import triar_dividendos
 
-# Ajuste automático do ticker brasileiro
-if not ticker.endswith(".SA"):
-    ticker = ticker + ".SA"
-
-start = "2000-01-01"
-end = "2025-12-31"
-
-stock = yf.Ticker(ticker)
+tickers = input("Digite os tickers: ").split()
 
-# Preço ajustado (inclui reinvestimento implícito)
-hist = stock.history(start=start, end=end, auto_adjust=True)
-
-# Apenas preço ajustado
-df = hist[["Close"]].reset_index()
-df.columns = ["Date", "Close"]
+# Ajuste automático do ticker brasileiro
+tickers = [ajustar_ticker(t) for t in tickers]
 
-print("\n--- Últimos 48 dividendos (fonte: stock.actions) ---")
+print("\n--- Últimos 48 dividendos e últimos 12 meses (ranking por dividend yield) ---")
 try:
-    dividends = stock.actions["Dividends"].dropna()
-    last48 = dividends.tail(48)
-
-    print(last48)
+    # Só o histórico bruto, que já traz os dividendos; sem baixar o preço ajustado
+    ranking = triar_dividendos(tickers, ultimos=48)
 
-    # Soma dos últimos 48 dividendos
-    soma = last48.sum()
-    print(f"\nSoma dos últimos 48 dividendos: R$ {soma:.2f}")
+    with pd.option_context("display.width", 120, "display.max_columns", None):
+        print(ranking)
 
 except Exception as e:
     print("Sem dividendos ou erro ao obter dividendos.")
@@ -0,0 +1,84 @@
+import json
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from financeiro import cache, provedores
+from financeiro.armazem import ArmazemPrecos, construir_armazem
+from financeiro.dca import aportes_mensais_lote, alinhar_fechamentos, backtest_dca
+from financeiro.offline import historico_sintetico
+
+
+TICKERS = ["AAA", "BBB", "CCC"]
+INICIO, FIM = "2010-01-01", "2020-01-01"
+
+
+@pytest.fixture
+def armazem(tmp_path, monkeypatch):
+    arquivos = tmp_path / "arquivos"
+    arquivos.mkdir()
+    for semente, ticker in enumerate(TICKERS, start=1):
+        historico_sintetico(semente, INICIO, FIM, auto_adjust=False).to_csv(
+            arquivos / f"{ticker}.bruto.csv"
+        )
+    (arquivos / "fusos.json").write_text(json.dumps(dict.fromkeys(TICKERS, "America/New_York")))
+    monkeypatch.setattr(provedores, "_provedor", provedores.ProvedorArquivos(str(arquivos)))
+    monkeypatch.setattr(cache, "_cache", cache.CacheHistorico(str(tmp_path / "cache")))
+    return construir_armazem(str(tmp_path / "armazem"), TICKERS, INICIO, FIM)
+
+
+def test_ajustado_igual_ao_do_yahoo(armazem):
+    for semente, ticker in enumerate(TICKERS, start=1):
+        esperado = historico_sintetico(semente, INICIO, FIM)["Close"].to_numpy()
+        coluna = armazem.fechamento_ajustado(ticker)
+        # float32: sete algarismos significativos
+        np.testing.assert_allclose(coluna[~np.isnan(coluna)], esperado, rtol=1e-6)
+
+
+def test_dca_sobre_o_mapa(armazem):
+    precos = armazem.matriz(campo="ajustado")
+    assert isinstance(precos, np.memmap)
+    assert precos.dtype == np.float32
+
+    armazem = ArmazemPrecos(armazem.diretorio)
+    lote = armazem.aportes_mensais(1000)
+    ajustados = [historico_sintetico(s, INICIO, FIM) for s in range(1, len(TICKERS) + 1)]
+    np.testing.assert_allclose(
+        lote.patrimonio, [backtest_dca(h, 1000)[1] for h in ajustados], rtol=1e-6
+    )
+    datas, matriz = alinhar_fechamentos(ajustados)
+    esperado = aportes_mensais_lote(datas, matriz, 1000)
+    np.testing.assert_allclose(lote.patrimonio, esperado.patrimonio, rtol=1e-6)
+
+    # Bloco a bloco, o mesmo resultado
+    por_coluna = armazem.aportes_mensais(1000, colunas_por_bloco=1)
+    np.testing.assert_array_equal(por_coluna.primeiras_datas, lote.primeiras_datas)
+    for campo in ("cotas", "total_aportes", "patrimonio", "tir", "tir_carteira"):
+        np.testing.assert_allclose(getattr(por_coluna, campo), getattr(lote, campo), rtol=1e-12)
+
+
+def test_dca_em_blocos_nao_carrega_a_matriz_inteira(tmp_path):
+    datas = np.arange("2000-01-01", "2010-01-01", dtype="datetime64[D]")
+    mapa = np.lib.format.open_memmap(
+        str(tmp_path / "precos.npy"),
+        mode="w+",
+        dtype="float32",
+        shape=(len(datas), 400),
+        fortran_order=True,
+    )
+    mapa[:] = np.random.default_rng(0).uniform(10, 20, mapa.shape)
+    mapa.flush()
+    precos = np.load(str(tmp_path / "precos.npy"), mmap_mode="r")
+
+    def pico(colunas_por_bloco):
+        tracemalloc.start()
+        try:
+            aportes_mensais_lote(datas, precos, 1000, colunas_por_bloco)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # Nenhuma cópia da matriz inteira em float64 (11,7 MB) chega a existir
+    assert pico(16) < len(datas) * 400 * 8
+    assert pico(16) < pico(400) / 8
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from financeiro.cache import CacheHistorico
+from financeiro.dca import backtest_dca
+from financeiro.offline import historico_sintetico
+
+
+APORTE = 1000
+
+
+class BaixarFalso:
+    """Downloader que recorta `self.historico` e registra os intervalos pedidos."""
+
+    def __init__(self, historico):
+        self.historico = historico
+        self.pedidos = []
+
+    def __call__(self, ticker, start, end, auto_adjust):
+        self.pedidos.append((start, end))
+        datas = self.historico.index.tz_localize(None)
+        return self.historico[(datas >= pd.Timestamp(start)) & (datas < pd.Timestamp(end))]
+
+
+def _mesmo_historico(hist, esperado):
+    np.testing.assert_array_equal(
+        hist.index.tz_localize(None).to_numpy(dtype="datetime64[ns]"),
+        esperado.index.tz_localize(None).to_numpy(dtype="datetime64[ns]"),
+    )
+    for coluna in ("Close", "Dividends", "Stock Splits"):
+        np.testing.assert_array_equal(hist[coluna].to_numpy(), esperado[coluna].to_numpy())
+
+
+def _cache(tmp_path, baixar):
+    return CacheHistorico(str(tmp_path), validade=0, baixar=baixar)
+
+
+def _sem_eventos(hist):
+    hist = hist.copy()
+    hist["Dividends"] = 0.0
+    hist["Stock Splits"] = 0.0
+    return hist
+
+
+def test_cauda_sem_mudancas_baixa_so_o_que_falta(tmp_path):
+    hist = _sem_eventos(historico_sintetico(1, "2020-01-01", "2022-01-01"))
+    baixar = BaixarFalso(hist)
+    cache = _cache(tmp_path, baixar)
+
+    cache.history("AAA", "2020-01-01", "2021-03-01")
+    juntos = cache.history("AAA", "2020-01-01", "2022-01-01")
+
+    assert baixar.pedidos[1][0] > "2021-02-01"
+    assert len(baixar.pedidos) == 2
+    _mesmo_historico(juntos, hist)
+
+
+def test_desdobramento_depois_do_cache_rebaixa_tudo(tmp_path):
+    antes = _sem_eventos(historico_sintetico(2, "2020-01-01", "2022-01-01", auto_adjust=False))
+    baixar = BaixarFalso(antes)
+    cache = _cache(tmp_path, baixar)
+    cache.history("AAA", "2020-01-01", "2021-03-01", auto_adjust=False)
+
+    # Desdobramento 2:1 em junho de 2021: o Yahoo divide todo o Close anterior por 2
+    depois = antes.copy()
+    dia = depois.index.get_indexer(depois.index[depois.index >= "2021-06-01"][:1])[0]
+    depois.iloc[:dia, depois.columns.get_loc("Close")] /= 2
+    depois.iloc[dia, depois.columns.get_loc("Stock Splits")] = 2.0
+    baixar.historico = depois
+
+    hist = cache.history("AAA", "2020-01-01", "2022-01-01", auto_adjust=False)
+    _mesmo_historico(hist, depois)
+    assert backtest_dca(hist, APORTE)[1] == backtest_dca(depois, APORTE)[1]
+
+
+def test_dividendo_novo_no_ajustado_rebaixa_tudo(tmp_path):
+    antes = _sem_eventos(historico_sintetico(3, "2020-01-01", "2022-01-01"))
+    baixar = BaixarFalso(antes)
+    cache = _cache(tmp_path, baixar)
+    cache.history("AAA", "2020-01-01", "2021-03-01")
+
+    # Dividendo novo: o Yahoo reajusta todo o Close ajustado anterior
+    depois = antes.copy()
+    dia = depois.index.get_indexer(depois.index[depois.index >= "2021-09-01"][:1])[0]
+    depois.iloc[:dia, depois.columns.get_loc("Close")] *= 0.98
+    depois.iloc[dia, depois.columns.get_loc("Dividends")] = 0.5
+    baixar.historico = depois
+
+    hist = cache.history("AAA", "2020-01-01", "2022-01-01")
+    _mesmo_historico(hist, depois)
+    assert baixar.pedidos[-1][0] == "2020-01-01"
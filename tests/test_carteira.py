@@ -0,0 +1,100 @@
+from math import comb
+
+import numpy as np
+import pytest
+
+from financeiro.carteira import POLITICAS, grade_de_pesos, simular_carteira
+from financeiro.dca import backtest_dca, datas_locais, inicio_de_mes
+from financeiro.offline import historico_sintetico
+
+
+# Primeiro pregão de três meses: A dobra de preço no segundo, B fica parado
+DATAS = np.array(["2020-01-02", "2020-02-03", "2020-03-02"], dtype="datetime64[D]")
+PRECOS = np.array([[1.0, 1.0], [2.0, 1.0], [2.0, 1.0]])
+
+
+def test_subalocado_a_mao():
+    # Mês 2: carteira [100, 50] + 100 de aporte, alvo [125, 125]; faltam
+    # [25, 75], que levam o aporte todo: 12,5 cotas de A e 75 de B.
+    # Mês 3: carteira [125, 125] + 100, faltam [50, 50]: 25 de A e 50 de B
+    simulacao = simular_carteira(DATAS, PRECOS, [1, 1], 100)
+
+    np.testing.assert_allclose(simulacao.cotas, [[87.5, 175.0]])
+    np.testing.assert_allclose(simulacao.patrimonio, [350.0])
+    assert simulacao.total_aportes == 300
+
+
+@pytest.mark.parametrize("periodo, cotas", [(12, [100.0, 150.0]), (1, [87.5, 175.0])])
+def test_rebalanceamento_a_mao(periodo, cotas):
+    # Com período 12 só o primeiro mês rebalanceia e os aportes seguem os
+    # pesos (25 de A e 50 de B por mês); com período 1 todo mês volta a 50/50
+    simulacao = simular_carteira(DATAS, PRECOS, [1, 1], 100, "rebalanceamento", periodo)
+
+    np.testing.assert_allclose(simulacao.cotas, [cotas])
+
+
+@pytest.mark.parametrize("politica", POLITICAS)
+def test_um_ativo_igual_ao_backtest_dca(politica):
+    hist = historico_sintetico(1, "2005-01-01", "2020-01-01")
+    precos = hist["Close"].to_numpy()[:, None]
+
+    simulacao = simular_carteira(datas_locais(hist.index), precos, [1], 1000, politica)
+
+    _, patrimonio, total_aportes, _ = backtest_dca(hist, 1000)
+    assert simulacao.patrimonio[0] == pytest.approx(patrimonio, rel=1e-12)
+    assert simulacao.total_aportes == total_aportes
+
+
+def _laco_ingenuo(precos, dias_de_aporte, pesos, aporte, politica, periodo):
+    """Um ativo e um mês por vez, sem matrizes."""
+    pesos = [p / sum(pesos) for p in pesos]
+    cotas = [0.0] * len(pesos)
+    for mes, dia in enumerate(dias_de_aporte):
+        preco = precos[dia]
+        valores = [c * p for c, p in zip(cotas, preco)]
+        total = sum(valores) + aporte
+        if politica == "rebalanceamento":
+            for i, peso in enumerate(pesos):
+                if mes % periodo == 0:
+                    cotas[i] = peso * total / preco[i]
+                else:
+                    cotas[i] += peso * aporte / preco[i]
+        else:
+            faltas = [max(peso * total - v, 0.0) for peso, v in zip(pesos, valores)]
+            for i, falta in enumerate(faltas):
+                cotas[i] += aporte * falta / sum(faltas) / preco[i]
+    return sum(c * p for c, p in zip(cotas, precos[-1]))
+
+
+@pytest.mark.parametrize("politica", POLITICAS)
+def test_grade_igual_ao_laco_ingenuo(politica):
+    historicos = [historico_sintetico(s, "2010-01-01", "2016-01-01") for s in (1, 2, 4)]
+    datas = datas_locais(historicos[0].index)
+    precos = np.column_stack([h["Close"].to_numpy() for h in historicos])
+    grade = grade_de_pesos(3, 0.25)
+
+    simulacao = simular_carteira(datas, precos, grade, 1000, politica, periodo=6)
+
+    dias_de_aporte = np.flatnonzero(inicio_de_mes(datas.astype("datetime64[D]")))
+    esperado = [
+        _laco_ingenuo(precos, dias_de_aporte, pesos, 1000, politica, 6) for pesos in grade
+    ]
+    np.testing.assert_allclose(simulacao.patrimonio, esperado, rtol=1e-12)
+
+
+def test_grade_de_pesos_cobre_o_simplex():
+    grade = grade_de_pesos(3, 0.1)
+
+    assert grade.shape == (comb(10 + 2, 2), 3)
+    np.testing.assert_allclose(grade.sum(axis=1), 1.0)
+    assert (grade >= 0).all()
+    np.testing.assert_allclose(grade * 10, np.round(grade * 10), atol=1e-12)
+    assert len(np.unique(np.round(grade * 10).astype(int), axis=0)) == len(grade)
+
+
+@pytest.mark.parametrize(
+    "pesos, aporte", [([1, 1], 0), ([1, 1], -100), ([0, 0], 100), ([[1, 1], [0, 0]], 100)]
+)
+def test_aporte_ou_pesos_invalidos(pesos, aporte):
+    with pytest.raises(ValueError):
+        simular_carteira(DATAS, PRECOS, pesos, aporte)
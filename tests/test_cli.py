@@ -0,0 +1,40 @@
+import csv
+
+from financeiro import cli
+
+
+CAMPOS = cli.CAMPOS["aporte-unico"]
+
+
+def executar_falso(modo, ticker, valor, inicio, fim, moeda=None, real=False):
+    return [ticker, "", 2 * valor, "2000-01-03"]
+
+
+def _ler(caminho):
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        return list(csv.reader(arquivo))
+
+
+def test_retomar_refaz_so_os_tickers_com_erro(tmp_path, monkeypatch):
+    universo = tmp_path / "universo.txt"
+    universo.write_text("AAA BBB\nCCC\n", encoding="utf-8")
+    saida = tmp_path / "resultados.csv"
+    with open(saida, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(CAMPOS)
+        escritor.writerow(["AAA", "", "123.0", "2001-01-02"])
+        escritor.writerow(["BBB", "Erro ao processar BBB: Too Many Requests", "0", ""])
+
+    assert set(cli.concluidos(str(saida), CAMPOS)) == {"AAA"}
+
+    monkeypatch.setattr(cli, "executar_ticker", executar_falso)
+    argumentos = ["--modo", "aporte-unico", "--aporte", "500", "--processos", "1", "--retomar"]
+    cli.main([str(universo), "--saida", str(saida)] + argumentos)
+
+    linhas = _ler(saida)
+    assert linhas[0] == CAMPOS
+    assert sorted(linhas[1:]) == [
+        ["AAA", "", "123.0", "2001-01-02"],
+        ["BBB", "", "1000.0", "2000-01-03"],
+        ["CCC", "", "1000.0", "2000-01-03"],
+    ]
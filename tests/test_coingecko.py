@@ -0,0 +1,93 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+
+from financeiro.coingecko import (
+    DIA_MS,
+    GRANULARIDADES,
+    ClienteCoinGecko,
+    Grafico,
+    _ms,
+    para_historico,
+)
+
+
+class RespostaFalsa:
+    def __init__(self, dados):
+        self.dados = dados
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.dados
+
+
+class SessaoFalsa:
+    """Responde ao market_chart/range com um ponto por dia à meia-noite UTC, valendo o dia."""
+
+    def __init__(self):
+        self.pedidos = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        de, ate = params["from"], params["to"]
+        self.pedidos.append((de, ate))
+        dias = np.arange(-(-de // 86400), ate // 86400 + 1)
+        pontos = [[int(d) * DIA_MS, float(d)] for d in dias]
+        return RespostaFalsa({"prices": pontos, "market_caps": pontos, "total_volumes": pontos})
+
+
+def _grafico(tmp_path, sessao, inicio, fim):
+    cliente = ClienteCoinGecko(str(tmp_path), sessao=sessao)
+    return asyncio.run(cliente.market_chart("bitcoin", inicio, fim))
+
+
+def test_intervalo_longo_em_blocos_da_granularidade_diaria(tmp_path):
+    sessao = SessaoFalsa()
+    minimo, maximo = GRANULARIDADES["diaria"]
+
+    grafico = _grafico(tmp_path, sessao, "2019-06-01", "2022-03-01")
+
+    # Um pedido por bloco da grade de 365 dias, nenhum curto ou longo demais
+    passo = maximo * DIA_MS
+    a, b = _ms("2019-06-01"), _ms("2022-03-01")
+    assert len(sessao.pedidos) == len(range(a // passo * passo, b, passo))
+    for de, ate in sessao.pedidos:
+        assert minimo <= (ate - de) / 86400 <= maximo
+    # Cada dia uma vez, só dentro de [inicio, fim)
+    esperado = np.arange("2019-06-01", "2022-03-01", dtype="datetime64[D]")
+    np.testing.assert_array_equal(grafico.datas, esperado.astype("datetime64[ms]"))
+    np.testing.assert_array_equal(grafico.precos, esperado.astype(np.int64))
+
+
+def test_blocos_completos_saem_do_cache(tmp_path):
+    _grafico(tmp_path, SessaoFalsa(), "2019-06-01", "2022-03-01")
+
+    sessao = SessaoFalsa()
+    # Outro intervalo, dentro dos mesmos blocos da grade
+    grafico = _grafico(tmp_path, sessao, "2020-01-01", "2021-01-01")
+
+    assert sessao.pedidos == []
+    assert len(grafico.datas) == 366
+
+
+def test_bloco_em_andamento_e_baixado_de_novo(tmp_path):
+    amanha = str((pd.Timestamp.now(tz="UTC") + pd.Timedelta(days=1)).date())
+    _grafico(tmp_path, SessaoFalsa(), "2021-01-01", amanha)
+
+    sessao = SessaoFalsa()
+    _grafico(tmp_path, sessao, "2021-01-01", amanha)
+
+    # Só o bloco que ainda não terminou, pedido com pelo menos o mínimo de dias
+    ((de, ate),) = sessao.pedidos
+    assert (ate - de) / 86400 >= GRANULARIDADES["diaria"][0]
+
+
+def test_para_historico():
+    datas = np.array(["2024-01-01", "2024-01-02"], dtype="datetime64[ms]")
+    hist = para_historico(Grafico(datas, np.array([1.0, 2.0]), np.ones(2), np.ones(2)))
+
+    assert str(hist.index.tz) == "UTC"
+    assert list(hist.columns) == ["Close", "Volume", "Dividends", "Stock Splits"]
+    np.testing.assert_array_equal(hist["Close"], [1.0, 2.0])
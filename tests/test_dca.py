@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from financeiro.dca import backtest_dca
+from financeiro.offline import historico_sintetico
+
+
+APORTE = 1000
+
+
+def dca_iterrows(hist, monthly_investment):
+    """Laço original do get_stock_data do backtest.py, como referência."""
+    hist = hist.dropna(subset=["Close"])
+    first_valid_date = hist.index.min().date()
+    df = hist[["Close"]].reset_index()
+    df.columns = ["Date", "Close"]
+
+    shares = 0
+    total_aportes = 0
+    df["Month"] = df["Date"].dt.to_period("M")
+    investment_days_set = set(df.groupby("Month")["Date"].first())
+    for _, row in df.iterrows():
+        if row["Date"] in investment_days_set:
+            if row["Close"] > 0:
+                shares += monthly_investment / row["Close"]
+                total_aportes += monthly_investment
+
+    return None, shares * df.iloc[-1]["Close"], total_aportes, first_valid_date
+
+
+def _sem_fuso(hist):
+    hist = hist.copy()
+    hist.index = hist.index.tz_localize(None)
+    return hist
+
+
+def _com_lacunas(hist):
+    hist = hist.copy()
+    fechamento = hist["Close"].to_numpy(dtype=float).copy()
+    primeiros = np.flatnonzero(pd.Series(hist.index.month).diff().to_numpy() != 0)
+    # NaN no primeiro pregão de alguns meses (o aporte passa para o dia seguinte)
+    # e Close zero no de outros (o mês fica sem aporte)
+    fechamento[primeiros[5::7]] = np.nan
+    fechamento[primeiros[3::11]] = 0.0
+    fechamento[:3] = np.nan
+    hist["Close"] = fechamento
+    return hist
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+@pytest.mark.parametrize("semente", [1, 2, 3])
+@pytest.mark.parametrize(
+    "preparar", [lambda h: h, _sem_fuso, _com_lacunas], ids=["fuso", "sem_fuso", "lacunas"]
+)
+def test_backtest_dca_igual_ao_laco_original(semente, preparar):
+    hist = preparar(historico_sintetico(semente, "2015-01-01", "2025-01-01"))
+
+    erro, patrimonio, total_aportes, primeira = backtest_dca(hist, APORTE)
+    _, esperado, aportes_esperados, primeira_esperada = dca_iterrows(hist, APORTE)
+
+    assert erro is None
+    assert round(patrimonio, 2) == round(esperado, 2)
+    assert total_aportes == aportes_esperados
+    assert primeira == primeira_esperada
+
+
+def test_backtest_dca_sem_precos():
+    hist = historico_sintetico(1, "2024-01-01", "2024-03-01")
+    hist["Close"] = np.nan
+    assert backtest_dca(hist, APORTE) == ("Erro: histórico sem preços válidos.", 0, 0, None)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from financeiro.dca import alinhar_colunas, backtest_dca
+from financeiro.incremental import (
+    avancar,
+    carregar_estado,
+    estado_vazio,
+    incluir_tickers,
+    resumo,
+    salvar_estado,
+)
+from financeiro.offline import historico_sintetico
+
+
+INICIO, FIM = "2000-01-01", "2020-01-01"
+SEMENTES = [1, 2, 3]
+COLUNAS = ["Close", "Dividends", "Stock Splits"]
+
+
+def _visto_em(bruto, corte):
+    """
+    Histórico bruto como o Yahoo devolvia antes de `corte`: o Close e os
+    dividendos ficam na escala de antes dos desdobramentos que ainda não
+    aconteceram.
+    """
+    visto = bruto[bruto.index < pd.Timestamp(corte, tz=bruto.index.tz)].copy()
+    futuros = bruto["Stock Splits"][bruto.index >= pd.Timestamp(corte, tz=bruto.index.tz)]
+    escala = futuros[futuros > 0].prod()
+    visto["Close"] *= escala
+    visto["Dividends"] *= escala
+    return visto
+
+
+@pytest.mark.parametrize(
+    "cortes",
+    [
+        [FIM],
+        ["2003-05-01", "2008-01-15", "2012-07-02", "2019-03-03", FIM],
+        # Um corte por mês: vários desdobramentos e dividendos entre atualizações
+        [str(d.date()) for d in pd.date_range(INICIO, FIM, freq="MS")[1:]] + [FIM],
+    ],
+)
+def test_atualizacoes_em_etapas_iguais_ao_backtest_inteiro(cortes):
+    brutos = [historico_sintetico(s, INICIO, FIM, auto_adjust=False) for s in SEMENTES]
+    ajustados = [historico_sintetico(s, INICIO, FIM) for s in SEMENTES]
+
+    estado = estado_vazio([f"T{s}" for s in SEMENTES], 1000, INICIO)
+    for corte in cortes:
+        datas, matrizes = alinhar_colunas([_visto_em(b, corte) for b in brutos], COLUNAS)
+        estado = avancar(estado, datas, *matrizes)
+
+    tabela = resumo(estado)
+    for ticker, ajustado in zip(tabela.index, ajustados):
+        _, patrimonio, total_aportes, primeira = backtest_dca(ajustado, 1000)
+        assert tabela.loc[ticker, "patrimonio"] == pytest.approx(patrimonio, rel=1e-12)
+        assert tabela.loc[ticker, "total_aportes"] == total_aportes
+        assert tabela.loc[ticker, "primeira_data"].date() == primeira
+
+
+def test_ticker_incluido_depois_comeca_do_inicio(tmp_path):
+    brutos = {f"T{s}": historico_sintetico(s, INICIO, FIM, auto_adjust=False) for s in (1, 2)}
+    estado = estado_vazio(["T2"], 1000, INICIO)
+    datas, matrizes = alinhar_colunas([_visto_em(brutos["T2"], "2010-01-01")], COLUNAS)
+    estado = incluir_tickers(avancar(estado, datas, *matrizes), ["T1", "T2"])
+    salvar_estado(str(tmp_path / "estado.npz"), estado)
+
+    estado = carregar_estado(str(tmp_path / "estado.npz"))
+    datas, matrizes = alinhar_colunas([brutos[t] for t in estado.tickers], COLUNAS)
+    tabela = resumo(avancar(estado, datas, *matrizes))
+
+    assert list(tabela.index) == ["T2", "T1"]
+    for ticker in tabela.index:
+        ajustado = historico_sintetico(int(ticker[1:]), INICIO, FIM)
+        _, patrimonio, total_aportes, _ = backtest_dca(ajustado, 1000)
+        assert tabela.loc[ticker, "patrimonio"] == pytest.approx(patrimonio, rel=1e-12)
+        assert tabela.loc[ticker, "total_aportes"] == total_aportes
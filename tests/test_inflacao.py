@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from financeiro.inflacao import IndiceIPCA, _variacoes_cpi, deflate
+
+
+# Nov/2019 a fev/2020: 0,5%, 1%, 1% e 2%
+MESES = ["2019-11", "2019-12", "2020-01", "2020-02"]
+VARIACOES = [0.5, 1.0, 1.0, 2.0]
+
+
+@pytest.fixture
+def indice():
+    return IndiceIPCA(np.array(MESES, dtype="datetime64[M]"), VARIACOES)
+
+
+def test_nivel_no_inicio_de_cada_mes(indice):
+    # O nível de um mês já inclui a inflação dos meses anteriores
+    assert indice.nivel("2019-11-20") == 1.0
+    assert indice.nivel("2019-12-01") == pytest.approx(1.005)
+    assert indice.nivel("2020-02-29") == pytest.approx(1.005 * 1.01 * 1.01)
+    # Depois do último mês divulgado, o nível do fim dele; antes do primeiro, NaN
+    assert indice.nivel("2024-06-01") == pytest.approx(1.005 * 1.01 * 1.01 * 1.02)
+    assert np.isnan(indice.nivel("2019-10-31"))
+
+
+def test_deflacionar_para_o_ultimo_mes_e_para_uma_data(indice):
+    datas = pd.DatetimeIndex(["2019-11-05", "2020-01-15"], tz="America/Sao_Paulo")
+    total = 1.005 * 1.01 * 1.01 * 1.02
+
+    np.testing.assert_allclose(
+        indice.deflacionar([100.0, 100.0], datas), [100 * total, 100 * total / (1.005 * 1.01)]
+    )
+    # 100 reais de novembro em reais de janeiro
+    assert indice.deflacionar(100.0, "2019-11-05", para="2020-01-01") == pytest.approx(
+        100 * 1.005 * 1.01
+    )
+    assert indice.fator("2019-12-01", "2020-02-01") == pytest.approx(1.01 * 1.01)
+
+
+def test_deflate_mantem_o_tipo(indice):
+    curva = pd.Series([100.0, 200.0], index=pd.DatetimeIndex(["2019-11-05", "2020-02-03"]))
+
+    real = deflate(curva, indice=indice)
+
+    assert isinstance(real, pd.Series)
+    np.testing.assert_allclose(real.to_numpy(), [100 * 1.005 * 1.01 * 1.01 * 1.02, 200 * 1.02])
+
+
+def test_acumulado_anual_compoe_os_meses(indice):
+    anos, acumulado = indice.acumulado_anual()
+
+    np.testing.assert_array_equal(anos, [2019, 2020])
+    np.testing.assert_allclose(acumulado, [(1.005 * 1.01 - 1) * 100, (1.01 * 1.02 - 1) * 100])
+
+
+def test_serie_com_lacuna_e_recusada():
+    with pytest.raises(ValueError):
+        IndiceIPCA(np.array(["2020-01", "2020-03"], dtype="datetime64[M]"), [1.0, 1.0])
+
+
+def test_variacoes_do_csv_do_fred():
+    texto = "DATE,CPIAUCSL\n2020-01-01,200.0\n2020-02-01,202.0\n2020-03-01,201.0\n"
+
+    meses, variacoes = _variacoes_cpi(texto)
+
+    # A variação de cada mês é contra o nível do mês anterior
+    np.testing.assert_array_equal(meses, np.array(["2020-02", "2020-03"], dtype="datetime64[M]"))
+    np.testing.assert_allclose(variacoes, [1.0, (201 / 202 - 1) * 100])
@@ -0,0 +1,152 @@
+import datetime
+import json
+
+import numpy as np
+import pytest
+
+from financeiro import cache, cambio, moedas, provedores
+from financeiro.carteira import precos_carteira
+from financeiro.dca import datas_locais
+from financeiro.motor import get_stock_data_lote, inicio_sem_cambio
+from financeiro.offline import historico_sintetico
+
+
+INICIO, FIM = "2000-01-01", "2010-01-01"
+# PTAX de mentira: o dólar só a partir de 2005, a libra a partir de 2000
+DIAS_USD = np.arange("2005-01-01", FIM, dtype="datetime64[D]")
+DIAS_GBP = np.arange(INICIO, FIM, dtype="datetime64[D]")
+PTAX_FALSA = {
+    cambio.PTAX["USD"]: (DIAS_USD, np.linspace(2.5, 1.7, len(DIAS_USD))),
+    cambio.PTAX["GBP"]: (DIAS_GBP, np.linspace(4.0, 3.0, len(DIAS_GBP))),
+}
+
+
+class ClienteFalso:
+    def serie(self, codigo, inicio=None, fim=None):
+        if codigo not in PTAX_FALSA:
+            raise ConnectionError(f"série {codigo} indisponível")
+        return PTAX_FALSA[codigo]
+
+
+@pytest.fixture(autouse=True)
+def ptax_falsa(monkeypatch):
+    monkeypatch.setattr(cambio, "cliente_padrao", ClienteFalso)
+    cambio._cotacoes.cache_clear()
+    yield
+    cambio._cotacoes.cache_clear()
+
+
+@pytest.fixture
+def arquivos(tmp_path, monkeypatch):
+    diretorio = tmp_path / "arquivos"
+    diretorio.mkdir()
+    tickers = {"AAA.SA": "BRL", "SPY": "USD", "SHEL.L": "GBp", "SAP.DE": "EUR"}
+    for semente, ticker in enumerate(tickers, start=1):
+        historico_sintetico(semente, INICIO, FIM).to_csv(diretorio / f"{ticker}.ajustado.csv")
+    (diretorio / "fusos.json").write_text(json.dumps(dict.fromkeys(tickers, "America/New_York")))
+    (diretorio / "moedas.json").write_text(json.dumps(tickers))
+    monkeypatch.setattr(provedores, "_provedor", provedores.ProvedorArquivos(str(diretorio)))
+    monkeypatch.setattr(cache, "_cache", cache.CacheHistorico(str(tmp_path / "cache")))
+    return list(tickers)
+
+
+def _em_brl(codigo, datas):
+    dias, valores = PTAX_FALSA[cambio.PTAX[codigo]]
+    return valores[np.searchsorted(dias, datas)]
+
+
+def test_conversao_igual_a_multiplicar_pelo_cambio():
+    datas = np.arange("2006-01-02", "2006-03-01", dtype="datetime64[D]")
+    precos = np.column_stack([np.full(len(datas), 10.0), np.full(len(datas), 250.0)])
+
+    convertidos = moedas.converter_precos(datas, precos, ["USD", "GBp"], para="BRL")
+
+    np.testing.assert_allclose(convertidos[:, 0], 10 * _em_brl("USD", datas))
+    np.testing.assert_allclose(convertidos[:, 1], 2.5 * _em_brl("GBP", datas))
+
+
+def test_antes_da_primeira_cotacao_fica_nan():
+    datas = np.array(["2004-12-30", "2005-01-03"], dtype="datetime64[D]")
+
+    convertidos = moedas.converter_precos(datas, np.ones((2, 1)), ["USD"], para="BRL")
+
+    assert np.isnan(convertidos[0, 0])
+    assert convertidos[1, 0] == pytest.approx(_em_brl("USD", datas[1:])[0])
+
+
+def test_falha_de_cambio_fica_nos_tickers_da_moeda():
+    datas = np.arange("2006-01-02", "2006-02-01", dtype="datetime64[D]")
+    erros = {}
+
+    convertidos = moedas.converter_precos(
+        datas, np.ones((len(datas), 3)), ["EUR", "BRL", "USD"], para="BRL", erros=erros
+    )
+
+    assert list(erros) == [0]
+    assert "EUR/BRL" in erros[0]
+    assert np.isnan(convertidos[:, 0]).all()
+    np.testing.assert_array_equal(convertidos[:, 1], 1.0)
+    assert not np.isnan(convertidos[:, 2]).any()
+    with pytest.raises(ConnectionError):
+        moedas.converter_precos(datas, np.ones((len(datas), 1)), ["EUR"], para="BRL")
+
+
+def test_lote_em_reais_com_falha_e_inicio_cortado(arquivos):
+    historicos = [(None, cache.historico(t, INICIO, FIM, auto_adjust=True)) for t in arquivos]
+
+    resultados, _, patrimonio, _, _ = get_stock_data_lote(
+        historicos, 1000, moedas.moedas(arquivos), para="BRL"
+    )
+
+    (erro_brl, _, _, _), (erro_usd, _, _, primeira_usd), (erro_gbp, _, _, _), (erro_eur, *_) = (
+        resultados
+    )
+    assert erro_brl is None and erro_gbp is None and erro_usd is None
+    assert "EUR/BRL" in erro_eur
+    # Primeiro pregão com PTAX
+    assert primeira_usd == datetime.date(2005, 1, 3)
+    assert inicio_sem_cambio(historicos[1][1], primeira_usd) < primeira_usd
+    assert inicio_sem_cambio(historicos[0][1], resultados[0][3]) is None
+    assert patrimonio > 0
+
+
+def test_palpite_de_moeda_nao_fica_gravado(tmp_path, monkeypatch):
+    class ProvedorRemoto(provedores.Provedor):
+        remoto = True
+
+        def moeda(self, ticker):
+            if ticker == "PETR4.SA":
+                raise ConnectionError("sem rede")
+            return {"SHEL.L": "GBp"}.get(ticker)
+
+    monkeypatch.setattr(moedas, "provedor_padrao", ProvedorRemoto)
+    monkeypatch.setattr(moedas, "DIRETORIO_PADRAO", str(tmp_path))
+    monkeypatch.setattr(moedas, "_conhecidas", None)
+
+    assert moedas.moedas(["SHEL.L", "BP.L", "PETR4.SA", "XYZ.QQ"]) == ["GBp", "GBp", "BRL", None]
+    assert json.loads((tmp_path / "moedas.json").read_text()) == {"SHEL.L": "GBp"}
+
+
+def test_moeda_desconhecida_vira_erro_do_ticker(arquivos):
+    historicos = [(None, cache.historico(t, INICIO, FIM, auto_adjust=True)) for t in arquivos]
+
+    resultados, *_ = get_stock_data_lote(historicos, 1000, ["BRL", None, "GBp", "BRL"], "BRL")
+
+    assert "moeda de negociação desconhecida" in resultados[1][0]
+    assert all(erro is None for erro, *_ in resultados[:1] + resultados[2:])
+    with pytest.raises(ValueError, match="desconhecida"):
+        moedas.converter_precos(DIAS_USD[:3], np.ones((3, 1)), [None], para="BRL")
+    # Sem conversão a moeda não importa
+    np.testing.assert_array_equal(moedas.converter_precos(DIAS_USD[:3], np.ones((3, 1)), [None]), 1)
+
+
+def test_carteira_com_ticker_em_dolar_fica_em_reais(arquivos):
+    datas, matriz = precos_carteira(["AAA.SA", "SPY"], INICIO, FIM)
+
+    spy = cache.historico("SPY", INICIO, FIM, auto_adjust=True)
+    dias = datas_locais(spy.index).astype("datetime64[D]")
+    esperado = spy["Close"].to_numpy() * np.where(
+        dias >= DIAS_USD[0], _em_brl("USD", np.maximum(dias, DIAS_USD[0])), np.nan
+    )
+    assert datas[0] >= DIAS_USD[0]
+    np.testing.assert_allclose(matriz[:, 1], esperado[np.searchsorted(dias, datas)])
@@ -0,0 +1,66 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from financeiro import motor
+from financeiro.dca import datas_locais
+from financeiro.montecarlo import fatores_dca, simular_dca
+from financeiro.offline import historico_sintetico
+
+
+def _fatores(sementes, inicio="2000-01-01", fim="2020-01-01"):
+    colunas = []
+    for semente in sementes:
+        hist = historico_sintetico(semente, inicio, fim)
+        colunas.append(fatores_dca(datas_locais(hist.index), hist["Close"].to_numpy())[1])
+    return np.column_stack(colunas)
+
+
+def test_um_caminho_com_o_historico_inteiro_e_o_get_stock_data(monkeypatch):
+    hist = historico_sintetico(1, "2000-01-01", "2020-01-01")
+    monkeypatch.setattr(motor, "historico", lambda ticker, start, end, auto_adjust: hist)
+    fatores = _fatores([1])
+
+    distribuicao = simular_dca(fatores, 1000, caminhos=1, bloco=len(fatores), semente=0)
+
+    erro, patrimonio, total_aportes, _ = motor.get_stock_data("AAA", 1000, "2000", "2020")
+    assert erro is None
+    assert distribuicao.patrimonio[0, 0] == pytest.approx(patrimonio, rel=1e-12)
+    assert distribuicao.total_aportes[0] == total_aportes
+
+
+def test_mesma_semente_mesmo_resultado_com_quaisquer_lotes_e_processos():
+    fatores = _fatores([1, 2])
+    inflacao = np.linspace(1.002, 1.008, len(fatores))
+    parametros = dict(caminhos=3000, horizonte=120, bloco=12, inflacao=inflacao, semente=42)
+
+    referencia = simular_dca(fatores, 1000, **parametros)
+    variantes = [
+        simular_dca(fatores, 1000, **parametros),
+        simular_dca(fatores, 1000, memoria_mb=1, **parametros),
+        simular_dca(fatores, 1000, memoria_mb=1, processos=2, **parametros),
+    ]
+
+    for variante in variantes:
+        for esperado, obtido in zip(referencia, variante):
+            np.testing.assert_array_equal(obtido, esperado)
+    outra = simular_dca(fatores, 1000, **{**parametros, "semente": 43})
+    assert not np.array_equal(outra.patrimonio, referencia.patrimonio)
+
+
+def test_memoria_dos_lotes_nao_se_acumula():
+    fatores = _fatores([1, 2])
+    caminhos, horizonte = 20_000, 240
+
+    tracemalloc.start()
+    try:
+        simular_dca(fatores, 1000, caminhos, horizonte, semente=0, memoria_mb=8)
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    # Um só array caminhos x horizonte x ativos teria 77 MB; os lotes
+    # terminados só deixam os resultados por caminho
+    assert pico < 3 * 8 * 2**20
+    assert pico < caminhos * horizonte * 2 * 8 / 4
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from financeiro import motor
+from financeiro.proventos import fatores_proventos, reinvestir_proventos
+
+
+# Close bruto (já ajustado por desdobramentos, como o do Yahoo) com dividendos
+# de 1,00 na data ex do terceiro pregão e de 0,50 no quinto; nas datas ex o
+# preço cai mais que o dividendo, então as bases "ex" e "anterior" diferem
+FECHAMENTO = np.array([20.0, 20.0, 18.0, 19.0, 18.0, 20.0])
+DIVIDENDOS = np.array([0.0, 0.0, 1.0, 0.0, 0.5, 0.0])
+# Ajuste do Yahoo: antes de cada data ex, os preços são multiplicados por
+# 1 - D/C[t-1], ou seja 19/20 antes do terceiro pregão e 18,5/19 antes do quinto
+AJUSTADO = np.array([18.5, 18.5, 18.0 * 18.5 / 19, 18.5, 18.0, 20.0])
+
+
+def test_base_anterior_reproduz_o_close_ajustado():
+    cotas = reinvestir_proventos(FECHAMENTO, DIVIDENDOS, base="anterior")
+
+    np.testing.assert_allclose(cotas, [1, 1, 20 / 19, 20 / 19, 20 / 18.5, 20 / 18.5], rtol=1e-15)
+    # Valor de uma cota comprada no primeiro pregão = retorno total do Close ajustado
+    np.testing.assert_allclose(
+        FECHAMENTO * cotas / FECHAMENTO[0], AJUSTADO / AJUSTADO[0], rtol=1e-15
+    )
+
+
+def test_base_ex_reinveste_no_fechamento_da_data_ex():
+    fatores = fatores_proventos(FECHAMENTO, DIVIDENDOS)
+    np.testing.assert_allclose(fatores, [1, 1, 19 / 18, 1, 18.5 / 18, 1], rtol=1e-15)
+
+
+def test_desdobramentos_so_quando_pedidos():
+    fechamento = np.array([10.0, 10.0, 5.0, 5.0])
+    dividendos = np.array([0.0, 1.0, 0.0, 0.0])
+    desdobramentos = np.array([0.0, 0.0, 2.0, 0.0])
+    np.testing.assert_allclose(fatores_proventos(fechamento, dividendos), [1, 1.1, 1, 1])
+    np.testing.assert_allclose(
+        fatores_proventos(fechamento, dividendos, desdobramentos), [1, 1.1, 2, 1]
+    )
+
+
+def test_calculate_lump_sum_reinveste_os_dividendos(monkeypatch):
+    # 1000 compram 100 cotas a 10; o dividendo de 1,00 na data ex (fechamento 8)
+    # compra mais 100/8 cotas, e as 112,5 cotas a 8,80 valem 990
+    bruto = pd.DataFrame(
+        {
+            "Close": [10.0, 10.0, 8.0, 8.8],
+            "Dividends": [0.0, 0.0, 1.0, 0.0],
+            # Já refletido no Close: não pode contar de novo
+            "Stock Splits": [0.0, 2.0, 0.0, 0.0],
+        },
+        index=pd.date_range("2020-01-02", periods=4, freq="B", name="Date"),
+    )
+    monkeypatch.setattr(motor, "historico", lambda ticker, start, end, auto_adjust: bruto)
+
+    erro, valor, primeira = motor.calculate_lump_sum("AAA", 1000, "2020-01-01", "2020-02-01")
+
+    assert erro is None
+    assert primeira == bruto.index[0]
+    assert valor == pytest.approx(990, rel=1e-12)
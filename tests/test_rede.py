@@ -0,0 +1,47 @@
+import pytest
+import requests
+
+from financeiro import rede
+
+
+class YFRateLimitError(Exception):
+    pass
+
+
+def _chamar_falhando(erro, monkeypatch):
+    monkeypatch.setattr(rede.time, "sleep", lambda segundos: None)
+    tentativas = []
+
+    def funcao():
+        tentativas.append(1)
+        raise erro
+
+    with pytest.raises(type(erro)):
+        rede.chamar("teste.invalid", None, funcao)
+    return len(tentativas)
+
+
+@pytest.mark.parametrize(
+    "erro",
+    [
+        requests.ConnectionError("queda"),
+        requests.Timeout("lento"),
+        TimeoutError(),
+        YFRateLimitError(),
+    ],
+)
+def test_erros_transitorios_sao_repetidos(erro, monkeypatch):
+    assert _chamar_falhando(erro, monkeypatch) == rede.TENTATIVAS
+
+
+@pytest.mark.parametrize("erro", [KeyError("currency"), ValueError("ticker inexistente")])
+def test_erros_permanentes_falham_na_primeira(erro, monkeypatch):
+    assert _chamar_falhando(erro, monkeypatch) == 1
+
+
+def test_http_error_repete_so_429_e_5xx(monkeypatch):
+    resposta = requests.Response()
+    resposta.status_code = 503
+    assert _chamar_falhando(requests.HTTPError(response=resposta), monkeypatch) == rede.TENTATIVAS
+    resposta.status_code = 404
+    assert _chamar_falhando(requests.HTTPError(response=resposta), monkeypatch) == 1
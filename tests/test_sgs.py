@@ -0,0 +1,53 @@
+import numpy as np
+
+from financeiro.offline import ServidorSGSFalso, _ler_data, series_sgs_sinteticas
+from financeiro.sgs import IPCA, SELIC_DIARIA, ClienteSGS
+
+
+def _cliente(tmp_path, servidor):
+    return ClienteSGS(str(tmp_path), url=servidor.url)
+
+
+def test_sincronizacao_completa_igual_a_serie_servida(tmp_path):
+    series = series_sgs_sinteticas()
+    with ServidorSGSFalso(series) as servidor:
+        for codigo in (SELIC_DIARIA, IPCA):
+            datas, valores = _cliente(tmp_path, servidor).serie(codigo)
+            np.testing.assert_array_equal(datas, series[codigo][0])
+            np.testing.assert_array_equal(valores, series[codigo][1])
+
+
+def test_repeticao_no_mesmo_dia_nao_pede_nada(tmp_path):
+    with ServidorSGSFalso(series_sgs_sinteticas()) as servidor:
+        cliente = _cliente(tmp_path, servidor)
+        primeira = cliente.serie(IPCA)
+        pedidos = len(servidor.requisicoes)
+
+        segunda = _cliente(tmp_path, servidor).serie(IPCA, "2010-01-01", "2010-12-31")
+
+        assert len(servidor.requisicoes) == pedidos
+        assert len(segunda[0]) == 12
+        np.testing.assert_array_equal(segunda[1], primeira[1][(primeira[0] >= segunda[0][0])][:12])
+
+
+def test_copia_desatualizada_pede_so_a_cauda(tmp_path):
+    series = series_sgs_sinteticas()
+    with ServidorSGSFalso(series) as servidor:
+        _cliente(tmp_path, servidor).serie(SELIC_DIARIA)
+
+        # Cópia de ontem que parou em 2024-06-28
+        caminho = tmp_path / f"{SELIC_DIARIA}.npz"
+        with np.load(caminho) as arquivo:
+            datas, valores = arquivo["datas"], arquivo["valores"]
+        corte = np.searchsorted(datas, np.datetime64("2024-07-01"))
+        ontem = np.datetime64("today", "D") - 1
+        np.savez(caminho, datas=datas[:corte], valores=valores[:corte], sincronizado_em=ontem)
+        servidor.requisicoes.clear()
+
+        datas, valores = _cliente(tmp_path, servidor).serie(SELIC_DIARIA)
+
+        inicios = sorted(_ler_data(inicio) for _, inicio, _ in servidor.requisicoes)
+        assert inicios[0] == np.datetime64("2024-06-29")
+        assert all(codigo == SELIC_DIARIA for codigo, _, _ in servidor.requisicoes)
+        np.testing.assert_array_equal(datas, series[SELIC_DIARIA][0])
+        np.testing.assert_array_equal(valores, series[SELIC_DIARIA][1])
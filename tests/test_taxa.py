@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from financeiro.taxa import DIAS_POR_MES, tir_aportes_iguais, xirr
+
+
+def _datas(*datas):
+    return np.array(datas, dtype="datetime64[D]")
+
+
+def test_xirr_de_um_aporte_e_um_resgate():
+    datas = _datas("2020-01-01", "2021-01-01")
+    assert xirr([-100, 110], datas) == pytest.approx(1.1 ** (365 / 366) - 1, rel=1e-9)
+
+
+def test_xirr_em_prazos_longos_nao_estoura():
+    datas = _datas("1950-01-01", "2025-01-01")
+    anos = (datas[1] - datas[0]) / np.timedelta64(365, "D")
+    assert xirr([-100, 1e6], datas) == pytest.approx(1e4 ** (1 / anos) - 1, rel=1e-9)
+
+
+def test_xirr_sem_troca_de_sinal_e_nan():
+    datas = _datas("2020-01-01", "2021-01-01")
+    assert np.isnan(xirr([-100, 0], datas))
+    assert np.isnan(xirr([100, 110], datas))
+
+
+def test_xirr_igual_a_forma_fechada_dos_aportes_iguais():
+    meses = np.arange("2000-01", "2020-01", dtype="datetime64[M]").astype("datetime64[D]")
+    datas = np.append(meses, np.datetime64("2020-01-01"))
+    fluxos = np.append(np.full(len(meses), -1000.0), 900_000.0)
+
+    dias = (datas[-1] - datas[0]) / np.timedelta64(1, "D")
+    fechada = tir_aportes_iguais(900_000, 1000, len(meses), dias / DIAS_POR_MES)
+    # Mesmo problema, com meses de tamanho médio na forma fechada
+    assert xirr(fluxos, datas) == pytest.approx(fechada, abs=2e-3)
+    np.testing.assert_allclose(xirr(np.vstack((fluxos, 2 * fluxos)), datas), xirr(fluxos, datas))
@@ -0,0 +1,48 @@
+import pytest
+
+from financeiro.tickers import ajustar_ticker, moeda_pelo_ticker
+
+
+@pytest.mark.parametrize(
+    "ticker, esperado",
+    [
+        ("PETR4", "PETR4.SA"),
+        ("VALE3", "VALE3.SA"),
+        ("USIM5", "USIM5.SA"),
+        ("BRKM6", "BRKM6.SA"),
+        ("TAEE11", "TAEE11.SA"),
+        ("AAPL34", "AAPL34.SA"),
+        ("AAPL", "AAPL"),
+        ("PETR4.SA", "PETR4.SA"),
+        ("BTC-USD", "BTC-USD"),
+        ("", ""),
+    ],
+)
+def test_ajustar_ticker(ticker, esperado):
+    assert ajustar_ticker(ticker) == esperado
+
+
+@pytest.mark.parametrize(
+    "ticker, esperado",
+    [
+        ("PETR4.SA", "BRL"),
+        ("USDBRL=X", "BRL"),
+        ("EURUSD=X", "USD"),
+        ("BTC-USD", "USD"),
+        ("ETH-EUR", "EUR"),
+        ("AAPL", "USD"),
+        ("BRK-B", "USD"),
+        ("BP.L", "GBp"),
+        ("SAP.DE", "EUR"),
+        ("MC.PA", "EUR"),
+        ("ASML.AS", "EUR"),
+        ("SHOP.TO", "CAD"),
+        ("7203.T", "JPY"),
+        ("NPN.JO", "ZAc"),
+        ("XYZ.QQ", None),
+        ("^GSPC", None),
+        ("GC=F", None),
+    ],
+)
+def test_moeda_pelo_ticker(ticker, esperado):
+    assert moeda_pelo_ticker(ticker) == esperado